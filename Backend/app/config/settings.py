@@ -76,7 +76,13 @@ class Settings:
     DOMAIN = os.getenv("DOMAIN", "https://safelive.in")
     PRIORITY_AI_ENABLED = _env_bool("PRIORITY_AI_ENABLED", True)
     PRIORITY_AI_MODEL = os.getenv("PRIORITY_AI_MODEL", "Qwen/Qwen2.5-VL-3B-Instruct")
+    PRIORITY_AI_VISION_MODE = os.getenv("PRIORITY_AI_VISION_MODE", "score").strip().lower()
+    PRIORITY_AI_VISION_MAX_PIXELS = _env_int("PRIORITY_AI_VISION_MAX_PIXELS", 448 * 448)
+    PRIORITY_AI_VISION_TEMPERATURE = _env_float("PRIORITY_AI_VISION_TEMPERATURE", 1.0)
+    PRIORITY_AI_VISION_PREFIX_CACHE = _env_bool("PRIORITY_AI_VISION_PREFIX_CACHE", False)
     PRIORITY_AI_TEXT_MODEL = os.getenv("PRIORITY_AI_TEXT_MODEL", "facebook/bart-large-mnli")
+    PRIORITY_AI_TEXT_ENGINE = os.getenv("PRIORITY_AI_TEXT_ENGINE", "zero_shot").strip().lower()
+    PRIORITY_AI_FAST_MIN_MARGIN = _env_float("PRIORITY_AI_FAST_MIN_MARGIN", 0.25)
     PRIORITY_AI_MODEL_WEIGHT = _env_float("PRIORITY_AI_MODEL_WEIGHT", 0.35)
     PRIORITY_AI_VISION_WEIGHT = _env_float("PRIORITY_AI_VISION_WEIGHT", 0.5)
     PRIORITY_AI_TEXT_WEIGHT = _env_float("PRIORITY_AI_TEXT_WEIGHT", 0.3)
@@ -87,12 +93,77 @@ class Settings:
     PRIORITY_AI_EXTERNAL_DATASET = os.getenv("PRIORITY_AI_EXTERNAL_DATASET", "")
     PRIORITY_AI_OFFLINE_MODE = _env_bool("PRIORITY_AI_OFFLINE_MODE", False)
     PRIORITY_AI_REQUEST_TIMEOUT_SECONDS = _env_int("PRIORITY_AI_REQUEST_TIMEOUT_SECONDS", 10)
+    PRIORITY_AI_SCORER_WORKERS = _env_int("PRIORITY_AI_SCORER_WORKERS", 6)
+    PRIORITY_AI_VISION_TIMEOUT_SECONDS = _env_float("PRIORITY_AI_VISION_TIMEOUT_SECONDS", 8.0)
+    PRIORITY_AI_TEXT_TIMEOUT_SECONDS = _env_float("PRIORITY_AI_TEXT_TIMEOUT_SECONDS", 3.0)
+    PRIORITY_AI_DATASET_TIMEOUT_SECONDS = _env_float("PRIORITY_AI_DATASET_TIMEOUT_SECONDS", 1.0)
+    PRIORITY_AI_ASYNC_REFINEMENT = _env_bool("PRIORITY_AI_ASYNC_REFINEMENT", False)
+    PRIORITY_RESCORE_BATCH_SIZE = _env_int("PRIORITY_RESCORE_BATCH_SIZE", 32)
+    PRIORITY_RESCORE_MAX_PER_SECOND = _env_float("PRIORITY_RESCORE_MAX_PER_SECOND", 5.0)
     PROGRESS_AI_ENABLED = _env_bool("PROGRESS_AI_ENABLED", True)
     PROGRESS_AI_MODEL = os.getenv("PROGRESS_AI_MODEL", "typeform/distilbert-base-uncased-mnli")
+    PROGRESS_AI_ENGINE = os.getenv("PROGRESS_AI_ENGINE", "zero_shot").strip().lower()
     PROGRESS_AI_OFFLINE_MODE = _env_bool("PROGRESS_AI_OFFLINE_MODE", False)
     PROGRESS_AI_REQUEST_TIMEOUT_SECONDS = _env_int("PROGRESS_AI_REQUEST_TIMEOUT_SECONDS", 10)
+    PROGRESS_AI_BATCH_SIZE = _env_int("PROGRESS_AI_BATCH_SIZE", 16)
+    PROGRESS_AI_SLOT_BATCH_SIZE = _env_int("PROGRESS_AI_SLOT_BATCH_SIZE", 4)
+    PROGRESS_AI_FAST_MIN_WINDOW_MASS = _env_float("PROGRESS_AI_FAST_MIN_WINDOW_MASS", 0.45)
+    AI_INFERENCE_BACKEND = os.getenv("AI_INFERENCE_BACKEND", "transformers").strip().lower()
+    AI_ONNX_CACHE_DIR = os.getenv("AI_ONNX_CACHE_DIR", str(BASE_DIR / "onnx_models"))
+    AI_ONNX_QUANTIZE = _env_bool("AI_ONNX_QUANTIZE", True)
+    AI_ONNX_INTRA_OP_THREADS = _env_int("AI_ONNX_INTRA_OP_THREADS", 0)
+    AI_ONNX_PARITY_CHECK = _env_bool("AI_ONNX_PARITY_CHECK", True)
+    AI_ONNX_PARITY_TOLERANCE = _env_float("AI_ONNX_PARITY_TOLERANCE", 0.08)
+    AI_MODEL_HOST_ENABLED = _env_bool("AI_MODEL_HOST_ENABLED", False)
+    AI_MODEL_HOST_SOCKET = os.getenv("AI_MODEL_HOST_SOCKET", "/tmp/safelive-model-host.sock")
+    AI_MODEL_HOST_AUTHKEY = os.getenv("AI_MODEL_HOST_AUTHKEY", "")
+    AI_MODEL_HOST_TIMEOUT_SECONDS = _env_float("AI_MODEL_HOST_TIMEOUT_SECONDS", 30.0)
+    AI_MODEL_HOST_FALLBACK_LOCAL = _env_bool("AI_MODEL_HOST_FALLBACK_LOCAL", False)
+    AI_MODEL_HOST_MEMORY_BUDGET_MB = _env_int("AI_MODEL_HOST_MEMORY_BUDGET_MB", 4096)
+    AI_MODEL_HOST_IDLE_SECONDS = _env_int("AI_MODEL_HOST_IDLE_SECONDS", 1800)
+    AI_MODEL_HOST_MAX_BATCH = _env_int("AI_MODEL_HOST_MAX_BATCH", 16)
+    AI_MODEL_HOST_BATCH_WAIT_MS = _env_int("AI_MODEL_HOST_BATCH_WAIT_MS", 10)
+    AI_CPU_CORE_BUDGET = _env_int("AI_CPU_CORE_BUDGET", 0)
+    AI_CPU_WORKER_PROCESSES = _env_int("AI_CPU_WORKER_PROCESSES", 0)
+    AI_MAX_CONCURRENT_INFERENCES = _env_int("AI_MAX_CONCURRENT_INFERENCES", 2)
+    AI_BACKGROUND_MAX_CONCURRENT_INFERENCES = _env_int("AI_BACKGROUND_MAX_CONCURRENT_INFERENCES", 1)
+    AI_BREAKER_ENABLED = _env_bool("AI_BREAKER_ENABLED", True)
+    AI_BREAKER_WINDOW = _env_int("AI_BREAKER_WINDOW", 50)
+    AI_BREAKER_MIN_SAMPLES = _env_int("AI_BREAKER_MIN_SAMPLES", 10)
+    AI_BREAKER_MAX_ERROR_RATE = _env_float("AI_BREAKER_MAX_ERROR_RATE", 0.5)
+    AI_BREAKER_COOLDOWN_SECONDS = _env_float("AI_BREAKER_COOLDOWN_SECONDS", 30.0)
+    AI_BREAKER_HALF_OPEN_PROBES = _env_int("AI_BREAKER_HALF_OPEN_PROBES", 3)
+    AI_BREAKER_VISION_SLO_SECONDS = _env_float("AI_BREAKER_VISION_SLO_SECONDS", 8.0)
+    AI_BREAKER_TEXT_SLO_SECONDS = _env_float("AI_BREAKER_TEXT_SLO_SECONDS", 2.0)
+    AI_BREAKER_PROGRESS_SLO_SECONDS = _env_float("AI_BREAKER_PROGRESS_SLO_SECONDS", 2.0)
+    AI_MODEL_REGISTRY_MIN_AGREEMENT = _env_float("AI_MODEL_REGISTRY_MIN_AGREEMENT", 0.6)
+    AI_EMBEDDING_MODEL = os.getenv("AI_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+    AI_EMBEDDING_TEMPERATURE = _env_float("AI_EMBEDDING_TEMPERATURE", 0.05)
+    AI_WARMUP_ON_STARTUP = _env_bool("AI_WARMUP_ON_STARTUP", True)
+    AI_PROFILE_HEAVY_IMPORTS = _env_bool("AI_PROFILE_HEAVY_IMPORTS", False)
+    DB_INIT_INDEXES_IN_BACKGROUND = _env_bool("DB_INIT_INDEXES_IN_BACKGROUND", True)
+    AI_DISTILLED_MODEL_DIR = os.getenv("AI_DISTILLED_MODEL_DIR", str(BASE_DIR / "distilled_models"))
+    PROGRESS_ORDINAL_MODEL_PATH = os.getenv("PROGRESS_ORDINAL_MODEL_PATH", str(BASE_DIR / "distilled_models" / "progress_ordinal.pkl"))
+    AI_SHADOW_PRIORITY_ENGINE = os.getenv("AI_SHADOW_PRIORITY_ENGINE", "").strip().lower()
+    AI_SHADOW_PROGRESS_ENGINE = os.getenv("AI_SHADOW_PROGRESS_ENGINE", "").strip().lower()
+    AI_SHADOW_SAMPLE_RATE = _env_float("AI_SHADOW_SAMPLE_RATE", 0.05)
+    AI_SHADOW_MAX_PENDING = _env_int("AI_SHADOW_MAX_PENDING", 8)
     PROGRESS_TRACKER_ENABLED = _env_bool("PROGRESS_TRACKER_ENABLED", True)
     PROGRESS_TRACKER_INTERVAL_SECONDS = _env_int("PROGRESS_TRACKER_INTERVAL_SECONDS", 30)
+    PROGRESS_TRACKER_MIN_INTERVAL_SECONDS = _env_int("PROGRESS_TRACKER_MIN_INTERVAL_SECONDS", 15)
+    PROGRESS_TRACKER_MAX_INTERVAL_SECONDS = _env_int("PROGRESS_TRACKER_MAX_INTERVAL_SECONDS", 300)
+    PROGRESS_TRACKER_BATCH_SIZE = _env_int("PROGRESS_TRACKER_BATCH_SIZE", 200)
+    PROGRESS_CONTEXT_CACHE_SIZE = _env_int("PROGRESS_CONTEXT_CACHE_SIZE", 4096)
+    PROGRESS_CONTEXT_CACHE_TTL_HOURS = _env_float("PROGRESS_CONTEXT_CACHE_TTL_HOURS", 24.0)
+    PROGRESS_TRACKER_WATERMARK_OVERLAP_SECONDS = _env_int("PROGRESS_TRACKER_WATERMARK_OVERLAP_SECONDS", 120)
+    PROGRESS_TRACKER_FULL_RESCAN_HOURS = _env_float("PROGRESS_TRACKER_FULL_RESCAN_HOURS", 24.0)
+    PROGRESS_TRACKER_SHARDS = _env_int("PROGRESS_TRACKER_SHARDS", 1)
+    WS_COALESCE_WINDOW_MS = _env_int("WS_COALESCE_WINDOW_MS", 250)
+    WS_COALESCE_MAX_BATCH = _env_int("WS_COALESCE_MAX_BATCH", 500)
+    SCHEDULER_MAX_WORKERS = _env_int("SCHEDULER_MAX_WORKERS", 2)
+    SCHEDULER_JITTER_RATIO = _env_float("SCHEDULER_JITTER_RATIO", 0.1)
+    JOB_LEASE_ENABLED = _env_bool("JOB_LEASE_ENABLED", True)
+    JOB_LEASE_TTL_SECONDS = _env_int("JOB_LEASE_TTL_SECONDS", 60)
     INSPECTOR_REMINDER_ENABLED = _env_bool("INSPECTOR_REMINDER_ENABLED", True)
     INSPECTOR_REMINDER_INTERVAL_SECONDS = _env_int("INSPECTOR_REMINDER_INTERVAL_SECONDS", 300)
     CORS_ORIGINS = _split_env_list(os.getenv("CORS_ORIGINS")) or [
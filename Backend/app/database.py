@@ -10,6 +10,10 @@ messages = db["messages"]
 password_resets = db["password_resets"]
 otp_challenges = db["otp_challenges"]
 incident_logs = db["incident_logs"]
+job_checkpoints = db["job_checkpoints"]
+ai_shadow_results = db["ai_shadow_results"]
+progress_predictions = db["progress_predictions"]
+job_leases = db["job_leases"]
 issues_collection = incidents
 atexit.register(client.close)
 def init_db():
@@ -47,6 +51,7 @@ def init_db():
         tickets.create_index("assignedTo")
         tickets.create_index("incidentId")
         tickets.create_index("ticketId", unique=True, sparse=True)
+        tickets.create_index([("shardKey", 1), ("updatedAt", 1)], sparse=True)
     except OperationFailure:
         pass
     try:
@@ -70,3 +75,15 @@ def init_db():
         incident_logs.create_index("createdAt")
     except OperationFailure:
         pass
+    try:
+        ai_shadow_results.create_index([("task", 1), ("candidateEngine", 1), ("createdAt", -1)])
+    except OperationFailure:
+        pass
+    try:
+        progress_predictions.create_index("expiresAt", expireAfterSeconds=0)
+    except OperationFailure:
+        pass
+    try:
+        job_leases.create_index("expiresAt")
+    except OperationFailure:
+        pass
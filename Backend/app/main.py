@@ -11,14 +11,18 @@ from app.routes_ws import router as ws_router
 from app.routes_users import router as users_router
 from app.routes_analytics import router as analytics_router
 from app.routes_public import router as public_router
+from app.routes_admin import router as admin_router
+from app.routes_system import router as system_router
 from app.database import init_db
 from app.config.settings import settings
-from app.services.priority_ai import warmup_priority_model
-from app.services.progress_ai import warmup_progress_model
-from app.services.inspector_reminder import start_inspector_reminder_worker
-from app.services.auto_progress_tracker import start_auto_progress_tracker_worker
+from app.services.cpu_governor import background_inference, configure_process_threads
+from app.services.readiness import profile_imports, readiness, track_component
+from app.services.inspector_reminder import inspector_reminder_job
+from app.services.auto_progress_tracker import auto_progress_tracker_job
+from app.services.scheduler import scheduler
 app = FastAPI(title="SafeLive Smart Incident Backend")
 LOGGER = logging.getLogger(__name__)
+configure_process_threads()
 app.add_middleware(
 	CORSMiddleware,
 	allow_origins=settings.CORS_ORIGINS,
@@ -35,20 +39,54 @@ app.include_router(ws_router)
 app.include_router(users_router)
 app.include_router(analytics_router)
 app.include_router(public_router)
-def _warmup_priority_model_background():
+app.include_router(admin_router)
+app.include_router(system_router)
+HEAVY_AI_MODULES = ("torch", "transformers", "sklearn")
+def _init_db_background():
     try:
-        warmup_priority_model()
+        with track_component("database_indexes"):
+            init_db()
     except Exception as exc:
-        LOGGER.warning("Incident priority model warmup failed during startup: %s", exc)
-def _warmup_progress_model_background():
-    try:
-        warmup_progress_model()
-    except Exception as exc:
-        LOGGER.warning("Ticket progress model warmup failed during startup: %s", exc)
+        LOGGER.warning("Database index initialization failed during startup: %s", exc)
+@background_inference()
+def _warmup_models_background():
+    if settings.AI_PROFILE_HEAVY_IMPORTS:
+        profile_imports(HEAVY_AI_MODULES)
+    if settings.PRIORITY_AI_ENABLED:
+        try:
+            from app.services.priority_ai import warmup_priority_model
+            with track_component("priority_model"):
+                warmup_priority_model()
+        except Exception as exc:
+            LOGGER.warning("Incident priority model warmup failed during startup: %s", exc)
+    if settings.PROGRESS_AI_ENABLED:
+        try:
+            from app.services.progress_ai import warmup_progress_model
+            with track_component("progress_model"):
+                warmup_progress_model()
+        except Exception as exc:
+            LOGGER.warning("Ticket progress model warmup failed during startup: %s", exc)
 @app.on_event("startup")
 def startup():
-    init_db()
-    threading.Thread(target=_warmup_priority_model_background, daemon=True).start()
-    threading.Thread(target=_warmup_progress_model_background, daemon=True).start()
-    start_inspector_reminder_worker()
-    start_auto_progress_tracker_worker()
+    readiness.register("database_indexes", required=False)
+    if settings.DB_INIT_INDEXES_IN_BACKGROUND:
+        threading.Thread(target=_init_db_background, daemon=True).start()
+    else:
+        _init_db_background()
+    for name, enabled in (("priority_model", settings.PRIORITY_AI_ENABLED), ("progress_model", settings.PROGRESS_AI_ENABLED)):
+        readiness.register(name)
+        if not enabled:
+            readiness.mark_disabled(name)
+        elif not settings.AI_WARMUP_ON_STARTUP:
+            readiness.mark_ready(name, detail="lazy")
+    if settings.AI_WARMUP_ON_STARTUP:
+        threading.Thread(target=_warmup_models_background, daemon=True).start()
+@app.on_event("startup")
+async def start_background_jobs():
+    for job in (inspector_reminder_job(), auto_progress_tracker_job()):
+        if job is not None:
+            scheduler.add(job)
+    scheduler.start()
+@app.on_event("shutdown")
+async def stop_background_jobs():
+    await scheduler.stop()
@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends, HTTPException
+from app.auth import get_head_supervisor_user
+from app.services.job_lease import lease_status
+from app.services.model_registry import model_registry
+from app.services.scheduler import scheduler
+from app.services.shadow_eval import shadow_evaluator, summarize_shadow_results
+router = APIRouter(prefix="/api/admin")
+@router.get("/models")
+def list_models(current_user: dict = Depends(get_head_supervisor_user)):
+    return {"success": True, "data": model_registry.status()}
+@router.post("/models/{model_name}/reload")
+def reload_model(model_name: str, current_user: dict = Depends(get_head_supervisor_user)):
+    try:
+        started = model_registry.reload(model_name)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Model not found")
+    if not started:
+        raise HTTPException(status_code=409, detail="Model reload already in progress")
+    return {"success": True, "data": {"name": model_name, "reloading": True}}
+@router.get("/models/shadow")
+def shadow_summary(
+    task: str | None = None,
+    since: str | None = None,
+    current_user: dict = Depends(get_head_supervisor_user),
+):
+    data = {
+        "candidates": {name: shadow_evaluator.candidate_engine(name) or None for name in ("priority", "progress")},
+        "results": summarize_shadow_results(task=task, since=since),
+    }
+    return {"success": True, "data": data}
+@router.get("/jobs/leases")
+def job_leases_status(current_user: dict = Depends(get_head_supervisor_user)):
+    return {"success": True, "data": lease_status()}
+@router.get("/jobs")
+def background_jobs_status(current_user: dict = Depends(get_head_supervisor_user)):
+    return {"success": True, "data": scheduler.status()}
@@ -9,6 +9,7 @@ from fastapi.responses import HTMLResponse
 from app.database import incidents, messages, tickets, users
 from app.models import IncidentCreate, IncidentUpdate, MessageCreate
 from app.services.ws_manager import manager
+from app.services.image_ingest import IncidentImage, ingest_images
 from app.services.image_service import save_image
 from app.services.email_service import (
     send_alert_email,
@@ -17,7 +18,7 @@ from app.services.email_service import (
     send_ticket_update_email,
 )
 from app.services.notification_service import send_stakeholder_notifications
-from app.services.priority_ai import predict_incident_priority
+from app.services.priority_ai import predict_incident_priority, predict_provisional_incident_priority
 from app.services.report_validation_ai import validate_incident_report
 from app.config.settings import settings
 from app.issue_model import IssueIn
@@ -29,13 +30,13 @@ INCIDENT_STATUSES = {"open", "pending", "in_progress", "resolved"}
 CRITICAL_APPROVAL_ROLES = {"supervisor", "department"}
 def _now_iso():
     return datetime.utcnow().isoformat()
-def _save_images(images: list[str] | None):
+def _save_images(images: list[IncidentImage | None] | None):
     image_urls = []
     if not images:
         return image_urls
     for img in images:
-        if not img:
-            continue
+        if img is None:
+            raise HTTPException(status_code=400, detail="Invalid image data")
         try:
             path = save_image(img)
         except Exception:
@@ -258,6 +259,132 @@ def _send_critical_review_email_safe(
         )
     except Exception as exc:
         LOGGER.warning("Critical incident review email failed for %s: %s", to_email, exc)
+def _apply_critical_approval(data: dict, now: str) -> list[dict]:
+    data["pendingReason"] = "critical_email_approval_required"
+    recipients = _resolve_critical_review_recipients()
+    ttl_hours = max(int(settings.CRITICAL_INCIDENT_EMAIL_APPROVAL_EXPIRE_HOURS), 1)
+    expires_at = (datetime.utcnow() + timedelta(hours=ttl_hours)).isoformat()
+    persisted_recipients: list[dict] = []
+    for recipient in recipients:
+        persisted_recipients.append(
+            {
+                "email": recipient.get("email"),
+                "name": recipient.get("name"),
+                "role": recipient.get("role"),
+                "decision": recipient.get("decision") or "pending",
+                "decisionAt": None,
+                "approveTokenHash": recipient.get("approveTokenHash"),
+                "rejectTokenHash": recipient.get("rejectTokenHash"),
+            }
+        )
+    if persisted_recipients:
+        data["criticalApproval"] = {
+            "required": True,
+            "state": "pending",
+            "requestedAt": now,
+            "expiresAt": expires_at,
+            "recipients": persisted_recipients,
+        }
+        return recipients
+    data["criticalApproval"] = {
+        "required": True,
+        "state": "unavailable",
+        "requestedAt": now,
+        "expiresAt": expires_at,
+        "recipients": [],
+    }
+    data["pendingReason"] = "critical_email_recipients_unavailable"
+    LOGGER.warning("No supervisor/department recipients available for critical incident emails.")
+    return []
+def _dispatch_critical_review_emails(schedule, payload: dict, recipients: list[dict], now: str) -> None:
+    if not recipients or not payload.get("id"):
+        return
+    extra_details, image_urls = _build_critical_email_details(payload)
+    for recipient in recipients:
+        approve_token = (recipient.get("_approveToken") or "").strip()
+        reject_token = (recipient.get("_rejectToken") or "").strip()
+        to_email = (recipient.get("email") or "").strip()
+        if not approve_token or not reject_token or not to_email:
+            continue
+        approve_url, reject_url = _build_critical_review_action_links(
+            payload.get("id"),
+            approve_token,
+            reject_token,
+        )
+        schedule(
+            _send_critical_review_email_safe,
+            to_email,
+            recipient.get("name") or recipient.get("role") or "Reviewer",
+            payload.get("id"),
+            payload.get("title") or "",
+            payload.get("category") or "",
+            payload.get("location") or "",
+            payload.get("priority") or "critical",
+            payload.get("createdAt") or now,
+            approve_url,
+            reject_url,
+            extra_details,
+            image_urls,
+        )
+def _run_now(func, *args):
+    func(*args)
+def _refine_incident_priority(
+    incident_obj_id,
+    ticket_obj_id,
+    provisional_priority: str,
+    initial_status: str,
+    priority_fields: dict,
+    incident_image: IncidentImage | None,
+) -> None:
+    try:
+        prediction = predict_incident_priority(**priority_fields, incident_image=incident_image)
+    except Exception as exc:
+        LOGGER.warning("Asynchronous priority refinement failed for incident %s: %s", incident_obj_id, exc)
+        return
+    now = _now_iso()
+    updates = {
+        "priority": prediction.priority,
+        "aiPriority": {
+            "priority": prediction.priority,
+            "confidence": prediction.confidence,
+            "source": prediction.source,
+            "missingSources": list(prediction.missing_sources),
+            "provisional": False,
+            "provisionalPriority": provisional_priority,
+            "evaluatedAt": now,
+        },
+        "updatedAt": now,
+    }
+    critical_email_recipients: list[dict] = []
+    is_critical = (prediction.priority or "").strip().lower() == "critical"
+    if is_critical and settings.CRITICAL_INCIDENT_EMAIL_APPROVAL_ENABLED:
+        updates["status"] = "pending"
+        critical_email_recipients = _apply_critical_approval(updates, now)
+    result = incidents.update_one(
+        {
+            "_id": incident_obj_id,
+            "priority": provisional_priority,
+            "status": initial_status,
+            "aiPriority.provisional": True,
+        },
+        {"$set": updates},
+    )
+    if not result.modified_count:
+        LOGGER.info("Priority refinement skipped for incident %s: priority or status changed since submission", incident_obj_id)
+        return
+    doc = incidents.find_one({"_id": incident_obj_id})
+    payload = _sanitize_incident_payload(serialize_doc(doc)) or {}
+    manager.publish({"type": "INCIDENT_UPDATED", "reason": "ai_priority_refined", "data": payload})
+    if ticket_obj_id:
+        ticket_updates = {"priority": prediction.priority, "updatedAt": now}
+        if "status" in updates:
+            ticket_updates["status"] = updates["status"]
+        tickets.update_one(
+            {"_id": ticket_obj_id, "priority": provisional_priority, "status": initial_status},
+            {"$set": ticket_updates},
+        )
+        _emit_ticket_realtime_event("TICKET_UPDATED", tickets.find_one({"_id": ticket_obj_id}), "ai_priority_refined")
+    _dispatch_critical_review_emails(_run_now, payload, critical_email_recipients, now)
 def _parse_iso_datetime(value: str | None) -> datetime | None:
     candidate = (value or "").strip()
     if not candidate:
@@ -382,17 +509,19 @@ async def create_incident(
     current_user: dict = Depends(get_current_user),
 ):
     data = incident.dict()
-    images = data.pop("images", None)
+    images = ingest_images(data.pop("images", None))
     now = _now_iso()
     incident_status = "open"
     should_alert_stakeholders = True
     critical_email_recipients: list[dict] = []
+    refine_priority = False
+    priority_fields: dict = {}
     if not _is_official(current_user):
         validation = validate_incident_report(
             title=data.get("title"),
             description=data.get("description"),
             category=data.get("category"),
-            image_payloads=images or [],
+            images=images,
         )
         data["aiValidation"] = {
             "isCorrect": validation.is_valid,
@@ -405,62 +534,36 @@ async def create_incident(
             "evaluatedAt": now,
         }
         if validation.is_valid:
-            priority_prediction = predict_incident_priority(
-                title=data.get("title"),
-                description=data.get("description"),
-                category=data.get("category"),
-                severity=data.get("severity"),
-                scope=data.get("scope"),
-                source=data.get("source"),
-                location=data.get("location"),
-                image_payload=images[0] if images else None,
-            )
+            priority_fields = {
+                "title": data.get("title"),
+                "description": data.get("description"),
+                "category": data.get("category"),
+                "severity": data.get("severity"),
+                "scope": data.get("scope"),
+                "source": data.get("source"),
+                "location": data.get("location"),
+            }
+            if settings.PRIORITY_AI_ASYNC_REFINEMENT:
+                priority_prediction = predict_provisional_incident_priority(**priority_fields)
+                refine_priority = True
+            else:
+                priority_prediction = predict_incident_priority(
+                    **priority_fields,
+                    incident_image=images[0] if images else None,
+                )
             data["priority"] = priority_prediction.priority
             data["aiPriority"] = {
                 "priority": priority_prediction.priority,
                 "confidence": priority_prediction.confidence,
                 "source": priority_prediction.source,
+                "missingSources": list(priority_prediction.missing_sources),
+                "provisional": refine_priority,
                 "evaluatedAt": now,
             }
             is_critical = (priority_prediction.priority or "").strip().lower() == "critical"
-            if is_critical and settings.CRITICAL_INCIDENT_EMAIL_APPROVAL_ENABLED:
+            if is_critical and settings.CRITICAL_INCIDENT_EMAIL_APPROVAL_ENABLED and not refine_priority:
                 incident_status = "pending"
-                data["pendingReason"] = "critical_email_approval_required"
-                recipients = _resolve_critical_review_recipients()
-                ttl_hours = max(int(settings.CRITICAL_INCIDENT_EMAIL_APPROVAL_EXPIRE_HOURS), 1)
-                expires_at = (datetime.utcnow() + timedelta(hours=ttl_hours)).isoformat()
-                persisted_recipients: list[dict] = []
-                for recipient in recipients:
-                    persisted_recipients.append(
-                        {
-                            "email": recipient.get("email"),
-                            "name": recipient.get("name"),
-                            "role": recipient.get("role"),
-                            "decision": recipient.get("decision") or "pending",
-                            "decisionAt": None,
-                            "approveTokenHash": recipient.get("approveTokenHash"),
-                            "rejectTokenHash": recipient.get("rejectTokenHash"),
-                        }
-                    )
-                if persisted_recipients:
-                    data["criticalApproval"] = {
-                        "required": True,
-                        "state": "pending",
-                        "requestedAt": now,
-                        "expiresAt": expires_at,
-                        "recipients": persisted_recipients,
-                    }
-                    critical_email_recipients = recipients
-                else:
-                    data["criticalApproval"] = {
-                        "required": True,
-                        "state": "unavailable",
-                        "requestedAt": now,
-                        "expiresAt": expires_at,
-                        "recipients": [],
-                    }
-                    data["pendingReason"] = "critical_email_recipients_unavailable"
-                    LOGGER.warning("No supervisor/department recipients available for critical incident emails.")
+                critical_email_recipients = _apply_critical_approval(data, now)
         else:
             incident_status = "pending"
             data["pendingReason"] = "ai_validation_review_required"
@@ -514,35 +617,25 @@ async def create_incident(
         )
     elif not _is_official(current_user):
         LOGGER.warning("Incident submission email skipped: reporter email unavailable for incident %s", payload.get("id"))
-    if critical_email_recipients and payload.get("id"):
-        extra_details, image_urls = _build_critical_email_details(payload)
-        for recipient in critical_email_recipients:
-            approve_token = (recipient.get("_approveToken") or "").strip()
-            reject_token = (recipient.get("_rejectToken") or "").strip()
-            to_email = (recipient.get("email") or "").strip()
-            if not approve_token or not reject_token or not to_email:
-                continue
-            approve_url, reject_url = _build_critical_review_action_links(
-                payload.get("id"),
-                approve_token,
-                reject_token,
-            )
-            background_tasks.add_task(
-                _send_critical_review_email_safe,
-                to_email,
-                recipient.get("name") or recipient.get("role") or "Reviewer",
-                payload.get("id"),
-                payload.get("title") or "",
-                payload.get("category") or "",
-                payload.get("location") or "",
-                payload.get("priority") or "critical",
-                payload.get("createdAt") or now,
-                approve_url,
-                reject_url,
-                extra_details,
-                image_urls,
-            )
-    if should_alert_stakeholders:
+    _dispatch_critical_review_emails(background_tasks.add_task, payload, critical_email_recipients, now)
+    if refine_priority and payload.get("id"):
+        background_tasks.add_task(
+            _refine_incident_priority,
+            result.inserted_id,
+            ticket_id,
+            data.get("priority"),
+            incident_status,
+            priority_fields,
+            images[0] if images else None,
+        )
+    if should_alert_stakeholders and refine_priority:
+        background_tasks.add_task(
+            _notify_new_issue,
+            payload.get("description", ""),
+            payload.get("latitude"),
+            payload.get("longitude"),
+        )
+    elif should_alert_stakeholders:
         _notify_new_issue(payload.get("description", ""), payload.get("latitude"), payload.get("longitude"))
     await manager.broadcast({
         "type": "NEW_INCIDENT",
@@ -731,7 +824,7 @@ def update_incident(incident_id: str, incident: IncidentUpdate, current_user: di
         updates["status"] = normalized_status
     images = updates.pop("images", None)
     if images is not None:
-        image_urls = _save_images(images)
+        image_urls = _save_images(ingest_images(images))
         if image_urls:
             updates["imageUrls"] = image_urls
             updates["imageUrl"] = image_urls[0]
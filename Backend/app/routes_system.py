@@ -0,0 +1,19 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse, PlainTextResponse
+from app.services.circuit_breaker import breaker_status
+from app.services.metrics import metrics
+from app.services.model_registry import model_registry
+from app.services.readiness import readiness
+router = APIRouter()
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+@router.get("/healthz", include_in_schema=False)
+def healthz():
+    return {"status": "ok"}
+@router.get("/readyz", include_in_schema=False)
+def readyz():
+    snapshot = readiness.snapshot()
+    snapshot["models"] = model_registry.status()
+    snapshot["circuitBreakers"] = breaker_status()
+    return JSONResponse(snapshot, status_code=200 if snapshot["ready"] else 503)
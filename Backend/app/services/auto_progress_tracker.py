@@ -1,14 +1,21 @@
 from __future__ import annotations
 import logging
 import threading
-import time
-from datetime import datetime
+from datetime import datetime, timedelta
+from pymongo import UpdateOne
 from app.config.settings import settings
-from app.database import incidents, tickets
-from app.services.progress_ai import predict_ticket_progress
+from app.database import incidents, job_checkpoints, tickets
+from app.services.cpu_governor import background_inference
+from app.services.job_lease import hold_lease, shard_hash, shard_lease_name, shard_order, shard_range
+from app.services.progress_ai import ProgressPrediction
+from app.services.progress_cache import UNCACHEABLE_SOURCES, cached_ticket_progress_batch, progress_context_hash
+from app.services.scheduler import PeriodicJob
 from app.services.ws_manager import manager
-from app.utils import serialize_doc, to_object_id
+from app.utils import to_object_id
 LOGGER = logging.getLogger(__name__)
+TRACKER_JOB_NAME = "auto_progress_tracker"
+TRACKED_STATUSES = ("open", "pending", "in_progress", "resolved")
+SHARD_KEY_FIELD = "shardKey"
 def _now_iso() -> str:
     return datetime.utcnow().isoformat()
 def _normalize_status(value: str | None) -> str:
@@ -64,98 +71,220 @@ def _build_progress_context(doc: dict) -> str:
     if latest_note:
         context_parts.append(f"latest update: {latest_note}")
     return ". ".join(part for part in context_parts if part)
-def _estimate_ticket_progress(doc: dict) -> tuple[int, float, str]:
+def _rule_based_progress(doc: dict) -> tuple[int, float, str] | None:
     status = _normalize_status(doc.get("status"))
-    has_team = _has_assigned_workers(doc)
     if status == "resolved":
         return 100, 1.0, "status_resolved"
-    if status == "open" and not has_team:
+    if status == "open" and not _has_assigned_workers(doc):
         return 0, 1.0, "awaiting_assignment"
-    prediction = predict_ticket_progress(_build_progress_context(doc))
+    return None
+def _bound_model_progress(doc: dict, prediction: ProgressPrediction) -> tuple[int, float, str]:
+    status = _normalize_status(doc.get("status"))
     percent = int(max(0, min(100, prediction.percent)))
     if status == "open":
         percent = min(percent, 40)
-    if has_team and status == "in_progress":
+    if _has_assigned_workers(doc) and status == "in_progress":
         percent = max(percent, 10)
     return percent, float(prediction.confidence), prediction.source
-def _sync_incident_progress(ticket_doc: dict, percent: int, source: str, confidence: float, updated_at: str) -> None:
+def _estimate_progress_batch(docs: list[dict], contexts: list[str], context_hashes: list[str]) -> list[tuple[int, float, str]]:
+    estimates: list[tuple[int, float, str] | None] = [_rule_based_progress(doc) for doc in docs]
+    pending = [index for index, estimate in enumerate(estimates) if estimate is None]
+    predictions = cached_ticket_progress_batch(
+        [contexts[index] for index in pending],
+        [context_hashes[index] for index in pending],
+    )
+    for index, prediction in zip(pending, predictions):
+        estimates[index] = _bound_model_progress(docs[index], prediction)
+    return estimates
+def _incident_selector(ticket_doc: dict) -> dict | None:
     incident_id = str(ticket_doc.get("incidentId") or "").strip()
     if not incident_id:
-        return
+        return None
     try:
-        selector = {"_id": to_object_id(incident_id)}
+        return {"_id": to_object_id(incident_id)}
     except Exception:
-        selector = {"_id": incident_id}
-    incidents.update_one(
-        selector,
-        {
-            "$set": {
-                "progressPercent": percent,
-                "progressSource": source,
-                "progressConfidence": confidence,
-                "progressUpdatedAt": updated_at,
-            }
-        },
+        return {"_id": incident_id}
+class _ProgressWriteBatch:
+    def __init__(self, batch_size: int):
+        self.batch_size = max(int(batch_size), 1)
+        self.ticket_ops: list[UpdateOne] = []
+        self.incident_ops: list[UpdateOne] = []
+        self.deltas: list[dict] = []
+        self.flushed = 0
+    def add(self, doc: dict, percent: int, source: str, confidence: float, context_hash: str | None) -> None:
+        now = _now_iso()
+        progress_fields = {
+            "progressPercent": percent,
+            "progressSource": source,
+            "progressConfidence": confidence,
+            "progressUpdatedAt": now,
+        }
+        ticket_fields = dict(progress_fields)
+        if context_hash:
+            ticket_fields["progressContextHash"] = context_hash
+        self.ticket_ops.append(UpdateOne({"_id": doc.get("_id")}, {"$set": ticket_fields}))
+        selector = _incident_selector(doc)
+        if selector is not None:
+            self.incident_ops.append(UpdateOne(selector, {"$set": progress_fields}))
+        delta = {"id": str(doc.get("_id")), **progress_fields}
+        if doc.get("incidentId"):
+            delta["incidentId"] = str(doc.get("incidentId"))
+        self.deltas.append(delta)
+        if len(self.ticket_ops) >= self.batch_size:
+            self.flush()
+    def remember_hash(self, doc: dict, context_hash: str) -> None:
+        self.ticket_ops.append(UpdateOne({"_id": doc.get("_id")}, {"$set": {"progressContextHash": context_hash}}))
+        if len(self.ticket_ops) >= self.batch_size:
+            self.flush()
+    def flush(self) -> None:
+        if not self.ticket_ops:
+            return
+        tickets.bulk_write(self.ticket_ops, ordered=False)
+        if self.incident_ops:
+            incidents.bulk_write(self.incident_ops, ordered=False)
+        for delta in self.deltas:
+            manager.publish_ticket_delta(delta, "auto_progress_tracker")
+        self.flushed += len(self.ticket_ops)
+        self.ticket_ops = []
+        self.incident_ops = []
+        self.deltas = []
+def _record_progress(doc: dict, estimate: tuple[int, float, str], context_hash: str | None, batch: _ProgressWriteBatch) -> bool:
+    percent, confidence, source = estimate
+    if source in UNCACHEABLE_SOURCES:
+        context_hash = None
+    confidence = round(max(0.0, min(1.0, confidence)), 4)
+    current_percent = int(doc.get("progressPercent") or 0)
+    status = _normalize_status(doc.get("status"))
+    if status in {"open", "in_progress"} and current_percent > 0:
+        percent = max(percent, current_percent)
+    current_source = str(doc.get("progressSource") or "")
+    current_confidence = float(doc.get("progressConfidence") or 0.0)
+    if (
+        current_percent == percent
+        and current_source == source
+        and round(current_confidence, 4) == confidence
+    ):
+        if context_hash:
+            batch.remember_hash(doc, context_hash)
+        return False
+    batch.add(doc, percent, source, confidence, context_hash)
+    return True
+def _apply_progress_chunk(chunk: list[tuple[dict, str, str]], batch: _ProgressWriteBatch) -> int:
+    if not chunk:
+        return 0
+    docs = [doc for doc, _, _ in chunk]
+    estimates = _estimate_progress_batch(docs, [context for _, context, _ in chunk], [context_hash for _, _, context_hash in chunk])
+    return sum(1 for (doc, _, context_hash), estimate in zip(chunk, estimates) if _record_progress(doc, estimate, context_hash, batch))
+def _load_tracker_state(job_name: str = TRACKER_JOB_NAME) -> dict:
+    return job_checkpoints.find_one({"_id": job_name}) or {}
+def _save_tracker_state(watermark: str | None, full_scan_at: str | None, summary: dict, job_name: str = TRACKER_JOB_NAME) -> None:
+    job_checkpoints.update_one(
+        {"_id": job_name},
+        {"$set": {"watermark": watermark, "fullScanAt": full_scan_at, "summary": summary, "updatedAt": _now_iso()}},
+        upsert=True,
     )
-def run_auto_progress_pass() -> None:
-    query = {"status": {"$in": ["open", "pending", "in_progress", "resolved", "verified"]}}
-    cursor = tickets.find(query)
-    for doc in cursor:
-        percent, confidence, source = _estimate_ticket_progress(doc)
-        confidence = round(max(0.0, min(1.0, confidence)), 4)
-        current_percent = int(doc.get("progressPercent") or 0)
-        status = _normalize_status(doc.get("status"))
-        if status in {"open", "in_progress"} and current_percent > 0:
-            percent = max(percent, current_percent)
-        current_source = str(doc.get("progressSource") or "")
-        current_confidence = float(doc.get("progressConfidence") or 0.0)
-        if (
-            current_percent == percent
-            and current_source == source
-            and round(current_confidence, 4) == confidence
-        ):
+def _watermark_floor(watermark: str | None) -> str | None:
+    if not watermark:
+        return None
+    try:
+        parsed = datetime.fromisoformat(watermark)
+    except ValueError:
+        return None
+    overlap = max(int(settings.PROGRESS_TRACKER_WATERMARK_OVERLAP_SECONDS), 0)
+    return (parsed - timedelta(seconds=overlap)).isoformat()
+def _full_scan_due(full_scan_at: str | None) -> bool:
+    hours = float(settings.PROGRESS_TRACKER_FULL_RESCAN_HOURS)
+    if hours <= 0:
+        return False
+    return not full_scan_at or full_scan_at < (datetime.utcnow() - timedelta(hours=hours)).isoformat()
+def _backfill_shard_keys(batch_size: int) -> int:
+    ops: list[UpdateOne] = []
+    written = 0
+    missing = {"status": {"$in": list(TRACKED_STATUSES)}, SHARD_KEY_FIELD: {"$exists": False}}
+    for doc in tickets.find(missing, {"_id": 1}):
+        ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {SHARD_KEY_FIELD: shard_hash(doc["_id"])}}))
+        if len(ops) >= batch_size:
+            written += tickets.bulk_write(ops, ordered=False).modified_count
+            ops = []
+    if ops:
+        written += tickets.bulk_write(ops, ordered=False).modified_count
+    return written
+def run_auto_progress_pass(
+    *,
+    full_scan: bool = False,
+    shard: int = 0,
+    shard_count: int = 1,
+    cancelled: threading.Event | None = None,
+) -> dict:
+    started_at = _now_iso()
+    job_name = shard_lease_name(TRACKER_JOB_NAME, shard, shard_count)
+    state = _load_tracker_state(job_name)
+    since = None if full_scan or _full_scan_due(state.get("fullScanAt")) else _watermark_floor(state.get("watermark"))
+    query: dict = {
+        "status": {"$in": list(TRACKED_STATUSES)},
+        "$nor": [{"status": "resolved", "progressPercent": 100}],
+    }
+    if since:
+        query["updatedAt"] = {"$gt": since}
+    newest = state.get("watermark") if since else None
+    summary = {"fullScan": since is None, "since": since, "scanned": 0, "updated": 0, "unchangedContext": 0}
+    batch = _ProgressWriteBatch(settings.PROGRESS_TRACKER_BATCH_SIZE)
+    if shard_count > 1:
+        summary["shard"] = f"{shard}/{shard_count}"
+        summary["shardKeysBackfilled"] = _backfill_shard_keys(batch.batch_size)
+        low, high = shard_range(shard, shard_count)
+        query[SHARD_KEY_FIELD] = {"$gte": low, "$lt": high}
+    chunk_size = max(int(settings.PROGRESS_AI_BATCH_SIZE), 1)
+    chunk: list[tuple[dict, str, str]] = []
+    for doc in tickets.find(query):
+        if cancelled is not None and cancelled.is_set():
+            summary["updated"] += _apply_progress_chunk(chunk, batch)
+            batch.flush()
+            LOGGER.warning("Auto progress pass %s stopped early; lease lost, checkpoint not advanced.", job_name)
+            summary["cancelled"] = True
+            return summary
+        summary["scanned"] += 1
+        updated_at = str(doc.get("updatedAt") or "")
+        if updated_at and (newest is None or updated_at > newest):
+            newest = updated_at
+        context = _build_progress_context(doc)
+        context_hash = progress_context_hash(context)
+        if doc.get("progressContextHash") == context_hash:
+            summary["unchangedContext"] += 1
             continue
-        now = _now_iso()
-        tickets.update_one(
-            {"_id": doc.get("_id")},
-            {
-                "$set": {
-                    "progressPercent": percent,
-                    "progressSource": source,
-                    "progressConfidence": confidence,
-                    "progressUpdatedAt": now,
-                }
-            },
-        )
-        _sync_incident_progress(doc, percent, source, confidence, now)
-        updated_doc = dict(doc)
-        updated_doc.update(
-            {
-                "progressPercent": percent,
-                "progressSource": source,
-                "progressConfidence": confidence,
-                "progressUpdatedAt": now,
-            }
-        )
-        manager.publish(
-            {
-                "type": "TICKET_UPDATED",
-                "reason": "auto_progress_tracker",
-                "data": serialize_doc(updated_doc),
-            }
-        )
-def _worker_loop() -> None:
-    interval = max(int(settings.PROGRESS_TRACKER_INTERVAL_SECONDS), 15)
-    while True:
-        try:
-            if settings.PROGRESS_TRACKER_ENABLED:
-                run_auto_progress_pass()
-        except Exception as exc:
-            LOGGER.warning("Auto progress tracker loop failed: %s", exc)
-        time.sleep(interval)
-def start_auto_progress_tracker_worker() -> None:
+        chunk.append((doc, context, context_hash))
+        if len(chunk) >= chunk_size:
+            summary["updated"] += _apply_progress_chunk(chunk, batch)
+            chunk = []
+    summary["updated"] += _apply_progress_chunk(chunk, batch)
+    batch.flush()
+    full_scan_at = started_at if since is None else state.get("fullScanAt")
+    _save_tracker_state(newest or started_at, full_scan_at, summary, job_name)
+    return summary
+def run_leased_auto_progress_passes() -> list[dict]:
+    shard_count = max(int(settings.PROGRESS_TRACKER_SHARDS), 1)
+    summaries: list[dict] = []
+    for shard in shard_order(shard_count):
+        with hold_lease(shard_lease_name(TRACKER_JOB_NAME, shard, shard_count)) as lease:
+            if lease is None:
+                continue
+            summaries.append(run_auto_progress_pass(shard=shard, shard_count=shard_count, cancelled=lease.lost))
+    return summaries
+@background_inference()
+def _run_tracker_job() -> int | None:
+    summaries = run_leased_auto_progress_passes()
+    if not summaries:
+        return None
+    return sum(int(summary.get("updated") or 0) for summary in summaries)
+def auto_progress_tracker_job() -> PeriodicJob | None:
     if not settings.PROGRESS_TRACKER_ENABLED:
         LOGGER.info("Auto progress tracker worker disabled by configuration.")
-        return
-    thread = threading.Thread(target=_worker_loop, daemon=True)
-    thread.start()
+        return None
+    return PeriodicJob(
+        name=TRACKER_JOB_NAME,
+        func=_run_tracker_job,
+        interval_seconds=max(int(settings.PROGRESS_TRACKER_INTERVAL_SECONDS), 15),
+        min_interval_seconds=max(int(settings.PROGRESS_TRACKER_MIN_INTERVAL_SECONDS), 5),
+        max_interval_seconds=max(int(settings.PROGRESS_TRACKER_MAX_INTERVAL_SECONDS), 15),
+        busy_work=max(int(settings.PROGRESS_TRACKER_BATCH_SIZE), 1),
+    )
@@ -0,0 +1,132 @@
+from __future__ import annotations
+import logging
+import threading
+import time
+from collections import deque
+from app.config.settings import settings
+from app.services.metrics import metrics
+LOGGER = logging.getLogger(__name__)
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+STATE_VALUES = {STATE_CLOSED: 0, STATE_HALF_OPEN: 1, STATE_OPEN: 2}
+AI_BREAKER_STATE = metrics.gauge(
+    "safelive_ai_circuit_breaker_state",
+    "AI engine circuit breaker state (0=closed, 1=half_open, 2=open).",
+    ("engine",),
+)
+AI_BREAKER_TRANSITIONS = metrics.counter(
+    "safelive_ai_circuit_breaker_transitions_total",
+    "AI engine circuit breaker state transitions.",
+    ("engine", "state"),
+)
+AI_BREAKER_REJECTED = metrics.counter(
+    "safelive_ai_circuit_breaker_rejected_total",
+    "Calls routed to a fallback because the engine circuit was open.",
+    ("engine",),
+)
+def _percentile(values: list[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(round(fraction * (len(ordered) - 1))), len(ordered) - 1)]
+class CircuitBreaker:
+    def __init__(self, name: str, *, slo_seconds: float):
+        self.name = name
+        self.slo_seconds = float(slo_seconds)
+        self._samples: deque[tuple[float, bool]] = deque(maxlen=max(int(settings.AI_BREAKER_WINDOW), 1))
+        self._state = STATE_CLOSED
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self._last_reason: str | None = None
+        self._lock = threading.Lock()
+        AI_BREAKER_STATE.set(STATE_VALUES[STATE_CLOSED], engine=name)
+    @property
+    def state(self) -> str:
+        return self._state
+    def _transition(self, state: str, reason: str | None = None) -> None:
+        if state == self._state:
+            return
+        self._state = state
+        self._last_reason = reason
+        if state == STATE_OPEN:
+            self._opened_at = time.monotonic()
+        if state != STATE_OPEN:
+            self._probe_successes = 0
+        if state == STATE_CLOSED:
+            self._samples.clear()
+        AI_BREAKER_STATE.set(STATE_VALUES[state], engine=self.name)
+        AI_BREAKER_TRANSITIONS.inc(engine=self.name, state=state)
+        LOGGER.warning("AI circuit %s is now %s%s", self.name, state, f" ({reason})" if reason else "")
+    def allow(self) -> bool:
+        if not settings.AI_BREAKER_ENABLED:
+            return True
+        with self._lock:
+            if self._state == STATE_OPEN and time.monotonic() - self._opened_at >= float(settings.AI_BREAKER_COOLDOWN_SECONDS):
+                self._transition(STATE_HALF_OPEN, "cooldown elapsed")
+            if self._state == STATE_CLOSED:
+                return True
+            if self._state == STATE_HALF_OPEN and self._probes_in_flight == 0:
+                self._probes_in_flight += 1
+                return True
+        AI_BREAKER_REJECTED.inc(engine=self.name)
+        return False
+    def record(self, latency_seconds: float, ok: bool = True) -> None:
+        if not settings.AI_BREAKER_ENABLED:
+            return
+        healthy = ok and latency_seconds <= self.slo_seconds
+        with self._lock:
+            if self._state == STATE_HALF_OPEN:
+                self._probes_in_flight = max(self._probes_in_flight - 1, 0)
+                if not healthy:
+                    self._transition(STATE_OPEN, f"probe {'failed' if not ok else f'took {latency_seconds:.2f}s'}")
+                    return
+                self._probe_successes += 1
+                if self._probe_successes >= max(int(settings.AI_BREAKER_HALF_OPEN_PROBES), 1):
+                    self._transition(STATE_CLOSED, "probes succeeded")
+                return
+            if self._state != STATE_CLOSED:
+                return
+            self._samples.append((latency_seconds, ok))
+            if len(self._samples) < max(int(settings.AI_BREAKER_MIN_SAMPLES), 1):
+                return
+            latencies = [latency for latency, _ in self._samples]
+            error_rate = sum(1 for _, succeeded in self._samples if not succeeded) / len(self._samples)
+            p95 = _percentile(latencies, 0.95)
+            if p95 > self.slo_seconds:
+                self._transition(STATE_OPEN, f"p95 {p95:.2f}s > SLO {self.slo_seconds:.2f}s")
+            elif error_rate > float(settings.AI_BREAKER_MAX_ERROR_RATE):
+                self._transition(STATE_OPEN, f"error rate {error_rate:.0%}")
+    def release(self) -> None:
+        with self._lock:
+            if self._state == STATE_HALF_OPEN:
+                self._probes_in_flight = max(self._probes_in_flight - 1, 0)
+    def status(self) -> dict:
+        with self._lock:
+            latencies = [latency for latency, _ in self._samples]
+            errors = sum(1 for _, succeeded in self._samples if not succeeded)
+            return {
+                "engine": self.name,
+                "state": self._state,
+                "sloSeconds": self.slo_seconds,
+                "samples": len(self._samples),
+                "p95Seconds": round(_percentile(latencies, 0.95), 4),
+                "errorRate": round(errors / len(self._samples), 4) if self._samples else 0.0,
+                "lastReason": self._last_reason,
+            }
+_breakers: dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+def get_breaker(name: str, *, slo_seconds: float) -> CircuitBreaker:
+    breaker = _breakers.get(name)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(name)
+            if breaker is None:
+                breaker = CircuitBreaker(name, slo_seconds=slo_seconds)
+                _breakers[name] = breaker
+    return breaker
+def breaker_status() -> list[dict]:
+    with _breakers_lock:
+        breakers = [_breakers[name] for name in sorted(_breakers)]
+    return [breaker.status() for breaker in breakers]
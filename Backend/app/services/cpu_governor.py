@@ -0,0 +1,117 @@
+from __future__ import annotations
+import contextvars
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from app.config.settings import settings
+from app.services.metrics import metrics
+LOGGER = logging.getLogger(__name__)
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BACKGROUND = "background"
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "NUMEXPR_NUM_THREADS", "VECLIB_MAXIMUM_THREADS")
+AI_INFERENCE_ACTIVE = metrics.gauge(
+    "safelive_ai_inference_active",
+    "Model inferences currently holding a CPU governor slot.",
+    ("priority",),
+)
+AI_INFERENCE_QUEUE_WAIT = metrics.histogram(
+    "safelive_ai_inference_queue_wait_seconds",
+    "Time spent waiting for a CPU governor inference slot.",
+    ("priority",),
+)
+_inference_priority: contextvars.ContextVar[str] = contextvars.ContextVar("inference_priority", default=PRIORITY_INTERACTIVE)
+def core_budget() -> int:
+    configured = int(settings.AI_CPU_CORE_BUDGET or 0)
+    return configured if configured > 0 else max(os.cpu_count() or 1, 1)
+def worker_processes() -> int:
+    configured = int(settings.AI_CPU_WORKER_PROCESSES or 0)
+    if configured > 0:
+        return configured
+    try:
+        return max(int(os.getenv("WEB_CONCURRENCY", "1")), 1)
+    except ValueError:
+        return 1
+def max_concurrent_inferences() -> int:
+    return max(int(settings.AI_MAX_CONCURRENT_INFERENCES or 1), 1)
+def process_threads() -> int:
+    return max(core_budget() // worker_processes(), 1)
+def intra_op_threads() -> int:
+    return max(process_threads() // max_concurrent_inferences(), 1)
+def configure_process_threads() -> int:
+    threads = str(intra_op_threads())
+    for name in THREAD_ENV_VARS:
+        os.environ.setdefault(name, threads)
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+    LOGGER.info(
+        "CPU governor: budget=%s cores, workers=%s, slots=%s, intra-op threads=%s",
+        core_budget(),
+        worker_processes(),
+        max_concurrent_inferences(),
+        threads,
+    )
+    return int(threads)
+_torch_configured = False
+_torch_lock = threading.Lock()
+def _configure_torch() -> None:
+    global _torch_configured
+    if _torch_configured:
+        return
+    with _torch_lock:
+        if _torch_configured:
+            return
+        _torch_configured = True
+        try:
+            import torch
+            torch.set_num_threads(intra_op_threads())
+            try:
+                torch.set_num_interop_threads(1)
+            except RuntimeError:
+                pass
+        except Exception as exc:
+            LOGGER.debug("Torch thread configuration skipped: %s", exc)
+class InferenceGate:
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._active = {PRIORITY_INTERACTIVE: 0, PRIORITY_BACKGROUND: 0}
+        self._waiting_interactive = 0
+    def _can_enter(self, priority: str) -> bool:
+        if sum(self._active.values()) >= max_concurrent_inferences():
+            return False
+        if priority == PRIORITY_INTERACTIVE:
+            return True
+        background_limit = max(int(settings.AI_BACKGROUND_MAX_CONCURRENT_INFERENCES or 1), 1)
+        return self._waiting_interactive == 0 and self._active[PRIORITY_BACKGROUND] < background_limit
+    @contextmanager
+    def slot(self, priority: str | None = None):
+        priority = priority or _inference_priority.get()
+        _configure_torch()
+        started = time.perf_counter()
+        with self._condition:
+            if priority == PRIORITY_INTERACTIVE:
+                self._waiting_interactive += 1
+            try:
+                while not self._can_enter(priority):
+                    self._condition.wait()
+            finally:
+                if priority == PRIORITY_INTERACTIVE:
+                    self._waiting_interactive -= 1
+            self._active[priority] += 1
+            AI_INFERENCE_ACTIVE.set(self._active[priority], priority=priority)
+        AI_INFERENCE_QUEUE_WAIT.observe(time.perf_counter() - started, priority=priority)
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._active[priority] -= 1
+                AI_INFERENCE_ACTIVE.set(self._active[priority], priority=priority)
+                self._condition.notify_all()
+inference_gate = InferenceGate()
+@contextmanager
+def background_inference():
+    token = _inference_priority.set(PRIORITY_BACKGROUND)
+    try:
+        yield
+    finally:
+        _inference_priority.reset(token)
@@ -0,0 +1,134 @@
+from __future__ import annotations
+import argparse
+import json
+import logging
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Hashable, Iterator
+from app.database import incidents, tickets
+from app.services.distilled_classifier import DistilledTextClassifier, student_model_path
+from app.services.embedding_classifier import ENGINE_ZERO_SHOT
+from app.services.priority_ai import PRIORITY_LEVELS, TextPriorityModel, build_priority_text, iter_dataset_rows
+from app.services.progress_ai import PROGRESS_STEPS, _ProgressModel
+LOGGER = logging.getLogger(__name__)
+TASKS = ("priority", "progress")
+NOTE_PREFIX_PATTERN = re.compile(r"^(field inspector|worker) update:\s*", re.IGNORECASE)
+NOTE_PERCENT_SUFFIX_PATTERN = re.compile(r"\s*\(\d{1,3}%\)\s*$")
+PRIORITY_TEXT_FIELDS = ("title", "description", "category", "severity", "scope", "source", "location")
+def _dedupe(texts: Iterator[str], limit: int | None) -> list[str]:
+    seen: set[str] = set()
+    unique: list[str] = []
+    for text in texts:
+        key = " ".join(text.lower().split())
+        if len(key) < 5 or key in seen:
+            continue
+        seen.add(key)
+        unique.append(text)
+        if limit and len(unique) >= limit:
+            break
+    return unique
+def _priority_text(row: dict) -> str:
+    text = build_priority_text(**{field: row.get(field) for field in PRIORITY_TEXT_FIELDS})
+    return text or str(row.get("text") or "").strip()
+def _iter_priority_texts(dataset: Path | None) -> Iterator[str]:
+    cursor = incidents.find({}, {field: 1 for field in PRIORITY_TEXT_FIELDS})
+    for doc in cursor.sort("_id", -1):
+        yield _priority_text(doc)
+    if dataset:
+        for row in iter_dataset_rows(dataset):
+            yield _priority_text(row)
+def _clean_note(note: str) -> str:
+    return NOTE_PERCENT_SUFFIX_PATTERN.sub("", NOTE_PREFIX_PATTERN.sub("", note.strip())).strip()
+def _iter_progress_texts(dataset: Path | None) -> Iterator[str]:
+    for doc in tickets.find({}, {"progressSummary": 1, "notes": 1}).sort("_id", -1):
+        summary = str(doc.get("progressSummary") or "").strip()
+        if summary:
+            yield summary
+        for row in doc.get("notes") or []:
+            note = str(row.get("note") if isinstance(row, dict) else row or "").strip()
+            if NOTE_PREFIX_PATTERN.match(note):
+                yield _clean_note(note)
+    if dataset:
+        for row in iter_dataset_rows(dataset):
+            yield str(row.get("text") or row.get("note") or row.get("updateText") or "").strip()
+def _teacher(task: str) -> tuple[Callable[[str], dict[Hashable, float] | None], tuple[Hashable, ...]]:
+    if task == "priority":
+        model = TextPriorityModel(engine=ENGINE_ZERO_SHOT)
+        return model.predict_scores, PRIORITY_LEVELS
+    model = _ProgressModel(engine=ENGINE_ZERO_SHOT)
+    return model.predict_distribution, PROGRESS_STEPS
+def _top(scores: dict[Hashable, float]) -> Hashable:
+    return max(scores, key=scores.get)
+def run_distillation(
+    task: str,
+    *,
+    dataset: Path | None = None,
+    limit: int | None = None,
+    holdout: float = 0.1,
+    output: Path | None = None,
+) -> dict:
+    texts = _dedupe(_iter_priority_texts(dataset) if task == "priority" else _iter_progress_texts(dataset), limit)
+    teacher, labels = _teacher(task)
+    labeled_texts: list[str] = []
+    soft_labels: list[dict[Hashable, float]] = []
+    teacher_failures = 0
+    started = time.perf_counter()
+    for index, text in enumerate(texts, start=1):
+        try:
+            scores = teacher(text)
+        except Exception as exc:
+            teacher_failures += 1
+            LOGGER.warning("Teacher failed on %s text %s, skipping it: %s", task, index, exc)
+            continue
+        if scores:
+            labeled_texts.append(text)
+            soft_labels.append(scores)
+        if index % 200 == 0:
+            LOGGER.info("Teacher labeled %s/%s %s texts", index, len(texts), task)
+    teacher_seconds = time.perf_counter() - started
+    if not labeled_texts:
+        raise RuntimeError(f"Teacher produced no {task} labels; is the zero-shot model available?")
+    order = list(range(len(labeled_texts)))
+    random.Random(42).shuffle(order)
+    holdout_count = int(len(order) * holdout) if len(order) >= 20 else 0
+    held_out, training = order[:holdout_count], order[holdout_count:]
+    student = DistilledTextClassifier(labels).fit(
+        [labeled_texts[i] for i in training],
+        [soft_labels[i] for i in training],
+    )
+    agreement = None
+    if held_out:
+        predictions = student.predict_scores_batch([labeled_texts[i] for i in held_out])
+        matches = sum(1 for i, scores in zip(held_out, predictions) if _top(scores) == _top(soft_labels[i]))
+        agreement = round(matches / len(held_out), 4)
+    summary = {
+        "task": task,
+        "texts": len(texts),
+        "labeled": len(labeled_texts),
+        "teacherFailures": teacher_failures,
+        "trainSamples": len(training),
+        "holdoutSamples": len(held_out),
+        "holdoutTeacherAgreement": agreement,
+        "teacherSeconds": round(teacher_seconds, 2),
+    }
+    student.metadata = dict(summary)
+    path = output or student_model_path(task)
+    student.save(path)
+    summary["output"] = str(path)
+    return summary
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Distill the zero-shot teacher models into fast hashed n-gram students.")
+    parser.add_argument("task", choices=TASKS)
+    parser.add_argument("--dataset", type=Path, default=None, help="Optional extra .jsonl or .csv texts to label")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--holdout", type=float, default=0.1)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    summary = run_distillation(args.task, dataset=args.dataset, limit=args.limit, holdout=args.holdout, output=args.output)
+    print(json.dumps(summary, indent=2))
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+from __future__ import annotations
+import logging
+import os
+import pickle
+import threading
+from pathlib import Path
+from typing import Hashable
+from app.config.settings import settings
+LOGGER = logging.getLogger(__name__)
+ENGINE_FAST = "fast"
+HASH_FEATURES = 2**18
+MIN_SOFT_LABEL_WEIGHT = 0.01
+_students: dict[str, tuple[float, "DistilledTextClassifier"]] = {}
+_students_lock = threading.Lock()
+def student_model_path(task: str) -> Path:
+    return Path(settings.AI_DISTILLED_MODEL_DIR) / f"{task}_student.pkl"
+class DistilledTextClassifier:
+    def __init__(self, labels: tuple[Hashable, ...], *, n_features: int = HASH_FEATURES):
+        from sklearn.feature_extraction.text import HashingVectorizer
+        from sklearn.linear_model import SGDClassifier
+        self.labels = tuple(labels)
+        self.metadata: dict[str, object] = {}
+        self._vectorizer = HashingVectorizer(
+            n_features=n_features,
+            ngram_range=(1, 2),
+            alternate_sign=False,
+            norm="l2",
+            lowercase=True,
+        )
+        self._classifier = SGDClassifier(loss="log_loss", alpha=1e-5, max_iter=30, tol=1e-4, random_state=42)
+    def fit(self, texts: list[str], soft_labels: list[dict[Hashable, float]]) -> "DistilledTextClassifier":
+        rows: list[str] = []
+        targets: list[Hashable] = []
+        weights: list[float] = []
+        for text, distribution in zip(texts, soft_labels):
+            for label, probability in distribution.items():
+                if label in self.labels and probability >= MIN_SOFT_LABEL_WEIGHT:
+                    rows.append(text)
+                    targets.append(label)
+                    weights.append(float(probability))
+        if len(set(targets)) < 2:
+            raise ValueError("Distillation needs teacher labels covering at least two classes")
+        self._classifier.fit(self._vectorizer.transform(rows), targets, sample_weight=weights)
+        return self
+    def predict_scores_batch(self, texts: list[str]) -> list[dict[Hashable, float]]:
+        if not texts:
+            return []
+        probabilities = self._classifier.predict_proba(self._vectorizer.transform([text or "" for text in texts]))
+        known = list(self._classifier.classes_)
+        results: list[dict[Hashable, float]] = []
+        for row in probabilities:
+            scores = {label: 0.0 for label in self.labels}
+            for label, value in zip(known, row):
+                scores[label.item() if hasattr(label, "item") else label] = float(value)
+            results.append(scores)
+        return results
+    def predict_scores(self, text: str) -> dict[Hashable, float]:
+        return self.predict_scores_batch([text])[0]
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_suffix(path.suffix + ".tmp")
+        with temp_path.open("wb") as handle:
+            pickle.dump(self, handle, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+def load_distilled_classifier(path: Path) -> DistilledTextClassifier | None:
+    key = str(path)
+    try:
+        mtime = path.stat().st_mtime
+    except OSError:
+        return None
+    cached = _students.get(key)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with _students_lock:
+        cached = _students.get(key)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        with path.open("rb") as handle:
+            student = pickle.load(handle)
+        if not isinstance(student, DistilledTextClassifier):
+            raise TypeError(f"{path} does not contain a distilled classifier")
+        _students[key] = (mtime, student)
+        LOGGER.info("Loaded distilled student model: %s", path)
+        return student
@@ -0,0 +1,86 @@
+from __future__ import annotations
+import logging
+import math
+import threading
+from typing import Hashable
+from app.config.settings import settings
+LOGGER = logging.getLogger(__name__)
+DEFAULT_EMBEDDING_MODEL_ID = "sentence-transformers/all-MiniLM-L6-v2"
+ENGINE_ZERO_SHOT = "zero_shot"
+ENGINE_EMBEDDING = "embedding"
+_encoders: dict[str, "SentenceEncoder"] = {}
+_encoders_lock = threading.Lock()
+def _resolve_torch_device() -> str:
+    try:
+        import torch
+        if torch.cuda.is_available():
+            return "cuda:0"
+    except Exception as exc:
+        LOGGER.debug("Torch CUDA detection failed for embedding model, falling back to CPU: %s", exc)
+    return "cpu"
+class SentenceEncoder:
+    def __init__(self, model_id: str):
+        import torch
+        from transformers import AutoModel, AutoTokenizer
+        self.model_id = model_id
+        self._torch = torch
+        self._device = _resolve_torch_device()
+        self._tokenizer = AutoTokenizer.from_pretrained(model_id)
+        self._model = AutoModel.from_pretrained(model_id).to(self._device)
+        self._model.eval()
+        self._max_length = min(int(getattr(self._tokenizer, "model_max_length", 256) or 256), 256)
+    def encode(self, texts: list[str]):
+        torch = self._torch
+        batch = self._tokenizer(
+            [text or "" for text in texts],
+            padding=True,
+            truncation=True,
+            max_length=self._max_length,
+            return_tensors="pt",
+        ).to(self._device)
+        with torch.inference_mode():
+            hidden = self._model(**batch).last_hidden_state
+        mask = batch["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+        pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+        return torch.nn.functional.normalize(pooled, p=2, dim=1)
+def get_sentence_encoder(model_id: str | None = None) -> SentenceEncoder:
+    resolved = (model_id or settings.AI_EMBEDDING_MODEL or DEFAULT_EMBEDDING_MODEL_ID).strip() or DEFAULT_EMBEDDING_MODEL_ID
+    encoder = _encoders.get(resolved)
+    if encoder is not None:
+        return encoder
+    with _encoders_lock:
+        encoder = _encoders.get(resolved)
+        if encoder is None:
+            encoder = SentenceEncoder(resolved)
+            _encoders[resolved] = encoder
+            LOGGER.info("Loaded sentence embedding model: %s", resolved)
+        return encoder
+class EmbeddingLabelClassifier:
+    def __init__(
+        self,
+        prototypes: dict[Hashable, tuple[str, ...]],
+        *,
+        model_id: str | None = None,
+        temperature: float | None = None,
+    ):
+        import torch
+        self._encoder = get_sentence_encoder(model_id)
+        self._keys = list(prototypes)
+        self._temperature = max(float(settings.AI_EMBEDDING_TEMPERATURE if temperature is None else temperature), 1e-3)
+        centroids = []
+        for key in self._keys:
+            vectors = self._encoder.encode(list(prototypes[key]))
+            centroids.append(torch.nn.functional.normalize(vectors.mean(dim=0), p=2, dim=0))
+        self._label_matrix = torch.stack(centroids)
+    def predict_scores_batch(self, texts: list[str]) -> list[dict[Hashable, float]]:
+        if not texts:
+            return []
+        embeddings = self._encoder.encode(texts)
+        logits = (embeddings @ self._label_matrix.T) / self._temperature
+        probabilities = logits.softmax(dim=1).tolist()
+        return [
+            {key: float(value) for key, value in zip(self._keys, row) if not math.isnan(value)}
+            for row in probabilities
+        ]
+    def predict_scores(self, text: str) -> dict[Hashable, float]:
+        return self.predict_scores_batch([text])[0]
@@ -0,0 +1,74 @@
+from __future__ import annotations
+import base64
+import binascii
+import re
+from io import BytesIO
+from app.services.metrics import metrics
+DATA_URL_PREFIX = re.compile(r"^data:[^,]{0,60};base64,", re.IGNORECASE)
+WHITESPACE = re.compile(r"\s+")
+IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", "jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+    (b"BM", "bmp"),
+    (b"II*\x00", "tiff"),
+    (b"MM\x00*", "tiff"),
+)
+IMAGE_DECODES = metrics.counter(
+    "safelive_image_decodes_total",
+    "Incident image payloads decoded from base64, by outcome.",
+    ("outcome",),
+)
+def _sniff_format(view: memoryview) -> str | None:
+    head = bytes(view[:16])
+    for signature, name in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return name
+    if head.startswith(b"RIFF") and b"WEBP" in head:
+        return "webp"
+    return None
+class IncidentImage:
+    __slots__ = ("data", "_format", "_sniffed")
+    def __init__(self, data: bytes):
+        self.data = data
+        self._format: str | None = None
+        self._sniffed = False
+    @property
+    def view(self) -> memoryview:
+        return memoryview(self.data)
+    @property
+    def size_bytes(self) -> int:
+        return len(self.data)
+    @property
+    def format(self) -> str | None:
+        if not self._sniffed:
+            self._format = _sniff_format(self.view)
+            self._sniffed = True
+        return self._format
+    def stream(self) -> BytesIO:
+        return BytesIO(self.data)
+def decode_image_payload(payload: str | None) -> IncidentImage | None:
+    value = (payload or "").strip()
+    if not value:
+        return None
+    match = DATA_URL_PREFIX.match(value)
+    body = value[match.end():] if match else value
+    try:
+        data = base64.b64decode(body, validate=True)
+    except (binascii.Error, ValueError):
+        compact = WHITESPACE.sub("", body)
+        try:
+            if compact == body:
+                raise ValueError("invalid base64 payload")
+            data = base64.b64decode(compact, validate=True)
+        except (binascii.Error, ValueError):
+            IMAGE_DECODES.inc(outcome="invalid")
+            return None
+    if not data:
+        IMAGE_DECODES.inc(outcome="empty")
+        return None
+    IMAGE_DECODES.inc(outcome="decoded")
+    return IncidentImage(data)
+def ingest_images(payloads: list[str] | None) -> list[IncidentImage | None]:
+    return [decode_image_payload(payload) for payload in payloads or [] if payload and payload.strip()]
@@ -1,14 +1,17 @@
-import base64
 import os
 from datetime import datetime
 from uuid import uuid4
 from app.config.settings import settings
-def save_image(image_base64):
+from app.services.image_ingest import IncidentImage, decode_image_payload
+def save_image(image):
     if not os.path.exists(settings.IMAGE_DIR):
         os.makedirs(settings.IMAGE_DIR)
-    image_bytes = base64.b64decode(image_base64)
+    if not isinstance(image, IncidentImage):
+        image = decode_image_payload(image)
+    if image is None:
+        raise ValueError("Invalid image data")
     filename = f"{datetime.utcnow().strftime('%Y%m%d_%H%M%S_%f')}_{uuid4().hex[:8]}.jpg"
     path = os.path.join(settings.IMAGE_DIR, filename)
     with open(path, "wb") as f:
-        f.write(image_bytes)
+        f.write(image.view)
     return path
@@ -1,15 +1,16 @@
 from __future__ import annotations
 import logging
-import threading
-import time
 from datetime import datetime, time as time_value, timedelta, timezone
 from app.config.settings import settings
 from app.database import tickets, users
 from app.roles import normalize_official_role
 from app.services.email_service import send_field_inspector_reminder_email
+from app.services.job_lease import hold_lease
+from app.services.scheduler import PeriodicJob
 from app.utils import to_object_id
 LOGGER = logging.getLogger(__name__)
 IST = timezone(timedelta(hours=5, minutes=30))
+REMINDER_JOB_NAME = "inspector_reminder"
 def _parse_dt(value):
     if isinstance(value, datetime):
         return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
@@ -54,14 +55,15 @@ def _collect_recipient_inspectors(ticket_doc: dict) -> list[dict]:
             {"name": 1, "email": 1},
         )
     )
-def run_inspector_reminder_pass():
+def run_inspector_reminder_pass() -> int:
     now_utc = datetime.now(timezone.utc)
     now_ist = now_utc.astimezone(IST)
     if now_ist.time() < time_value(hour=18, minute=0):
-        return
+        return 0
     today_ist = now_ist.date()
     today_key = today_ist.isoformat()
     cursor = tickets.find({"status": "in_progress"})
+    reminded = 0
     for ticket_doc in cursor:
         last_update = _parse_dt(ticket_doc.get("lastInspectorUpdateAt"))
         updated_today = bool(last_update and last_update.astimezone(IST).date() == today_ist)
@@ -72,6 +74,12 @@ def run_inspector_reminder_pass():
         recipients = _collect_recipient_inspectors(ticket_doc)
         if not recipients:
             continue
+        claimed = tickets.update_one(
+            {"_id": ticket_doc.get("_id"), "inspectorReminderSentForDate": {"$ne": today_key}},
+            {"$set": {"inspectorReminderSentForDate": today_key}},
+        )
+        if not claimed.modified_count:
+            continue
         ticket_id = str(ticket_doc.get("_id"))
         ticket_title = ticket_doc.get("title") or "Untitled ticket"
         sent_any = False
@@ -92,22 +100,24 @@ def run_inspector_reminder_pass():
             except Exception as exc:
                 LOGGER.warning("Inspector reminder email failed for %s ticket=%s: %s", to_email, ticket_id, exc)
         if sent_any:
+            reminded += 1
+        else:
             tickets.update_one(
-                {"_id": ticket_doc.get("_id")},
-                {"$set": {"inspectorReminderSentForDate": today_key}},
+                {"_id": ticket_doc.get("_id"), "inspectorReminderSentForDate": today_key},
+                {"$set": {"inspectorReminderSentForDate": ticket_doc.get("inspectorReminderSentForDate")}},
             )
-def _worker_loop():
-    interval = max(int(settings.INSPECTOR_REMINDER_INTERVAL_SECONDS), 60)
-    while True:
-        try:
-            if settings.INSPECTOR_REMINDER_ENABLED:
-                run_inspector_reminder_pass()
-        except Exception as exc:
-            LOGGER.warning("Field inspector reminder loop failed: %s", exc)
-        time.sleep(interval)
-def start_inspector_reminder_worker():
+    return reminded
+def _run_reminder_job() -> int:
+    with hold_lease(REMINDER_JOB_NAME) as lease:
+        if lease is None:
+            return 0
+        return run_inspector_reminder_pass()
+def inspector_reminder_job() -> PeriodicJob | None:
     if not settings.INSPECTOR_REMINDER_ENABLED:
         LOGGER.info("Field inspector reminder worker disabled by configuration.")
-        return
-    thread = threading.Thread(target=_worker_loop, daemon=True)
-    thread.start()
+        return None
+    return PeriodicJob(
+        name=REMINDER_JOB_NAME,
+        func=_run_reminder_job,
+        interval_seconds=max(int(settings.INSPECTOR_REMINDER_INTERVAL_SECONDS), 60),
+    )
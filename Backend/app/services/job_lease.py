@@ -0,0 +1,148 @@
+from __future__ import annotations
+import logging
+import os
+import random
+import socket
+import threading
+import uuid
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, PyMongoError
+from app.config.settings import settings
+from app.database import job_leases
+from app.services.metrics import metrics
+LOGGER = logging.getLogger(__name__)
+HOLDER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+HASH_SPACE = 1 << 32
+JOB_LEASE_ACQUISITIONS = metrics.counter(
+    "safelive_job_lease_acquisitions_total",
+    "Background job lease acquisition attempts by outcome.",
+    ("job", "outcome"),
+)
+JOB_LEASE_LOST = metrics.counter(
+    "safelive_job_lease_lost_total",
+    "Leases lost while the holder was still running the job.",
+    ("job",),
+)
+def _lease_ttl(ttl_seconds: float | None) -> float:
+    return max(float(ttl_seconds or settings.JOB_LEASE_TTL_SECONDS), 5.0)
+class JobLease:
+    def __init__(self, name: str, *, ttl_seconds: float | None = None):
+        self.name = name
+        self.ttl_seconds = _lease_ttl(ttl_seconds)
+        self.lost = threading.Event()
+        self._held = False
+        self._stop_heartbeat = threading.Event()
+        self._heartbeat: threading.Thread | None = None
+    @property
+    def held(self) -> bool:
+        return self._held and not self.lost.is_set()
+    def _claim(self, *, renewing: bool) -> bool:
+        now = datetime.utcnow()
+        holder_filter: list[dict] = [{"holder": HOLDER_ID}]
+        if not renewing:
+            holder_filter.append({"expiresAt": {"$lte": now}})
+        fields = {"holder": HOLDER_ID, "expiresAt": now + timedelta(seconds=self.ttl_seconds), "renewedAt": now}
+        if not renewing:
+            fields["acquiredAt"] = now
+        try:
+            doc = job_leases.find_one_and_update(
+                {"_id": self.name, "$or": holder_filter},
+                {"$set": fields},
+                upsert=not renewing,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            return False
+        return bool(doc and doc.get("holder") == HOLDER_ID)
+    def acquire(self) -> bool:
+        try:
+            self._held = self._claim(renewing=False)
+        except PyMongoError as exc:
+            LOGGER.warning("Lease %s acquisition failed: %s", self.name, exc)
+            self._held = False
+        JOB_LEASE_ACQUISITIONS.inc(job=self.name, outcome="acquired" if self._held else "busy")
+        if self._held:
+            self.lost.clear()
+        return self._held
+    def renew(self) -> bool:
+        try:
+            renewed = self._claim(renewing=True)
+        except PyMongoError as exc:
+            LOGGER.warning("Lease %s renewal failed: %s", self.name, exc)
+            renewed = False
+        if not renewed and self._held and not self.lost.is_set():
+            JOB_LEASE_LOST.inc(job=self.name)
+            LOGGER.warning("Lease %s lost by %s", self.name, HOLDER_ID)
+            self.lost.set()
+        return renewed
+    def release(self) -> None:
+        self._stop_heartbeat.set()
+        if self._heartbeat is not None:
+            self._heartbeat.join(timeout=self.ttl_seconds)
+            self._heartbeat = None
+        if not self._held:
+            return
+        self._held = False
+        try:
+            job_leases.update_one({"_id": self.name, "holder": HOLDER_ID}, {"$set": {"expiresAt": datetime.utcnow()}})
+        except PyMongoError as exc:
+            LOGGER.debug("Lease %s release failed, it will expire on its own: %s", self.name, exc)
+    def _heartbeat_loop(self) -> None:
+        interval = self.ttl_seconds / 3.0
+        while not self._stop_heartbeat.wait(interval):
+            if not self.renew():
+                return
+    def start_heartbeat(self) -> None:
+        self._stop_heartbeat.clear()
+        self._heartbeat = threading.Thread(target=self._heartbeat_loop, name=f"lease-{self.name}", daemon=True)
+        self._heartbeat.start()
+@contextmanager
+def hold_lease(name: str, *, ttl_seconds: float | None = None):
+    if not settings.JOB_LEASE_ENABLED:
+        lease = JobLease(name, ttl_seconds=ttl_seconds)
+        lease._held = True
+        yield lease
+        return
+    lease = JobLease(name, ttl_seconds=ttl_seconds)
+    if not lease.acquire():
+        yield None
+        return
+    lease.start_heartbeat()
+    try:
+        yield lease
+    finally:
+        lease.release()
+def shard_hash(doc_id) -> int:
+    return zlib.crc32(str(doc_id).encode("utf-8"))
+def shard_of(doc_id, shard_count: int) -> int:
+    if shard_count <= 1:
+        return 0
+    return shard_hash(doc_id) * shard_count // HASH_SPACE
+def shard_range(shard: int, shard_count: int) -> tuple[int, int]:
+    count = max(shard_count, 1)
+    return -(-shard * HASH_SPACE // count), -(-(shard + 1) * HASH_SPACE // count)
+def shard_lease_name(name: str, shard: int, shard_count: int) -> str:
+    return name if shard_count <= 1 else f"{name}:shard-{shard}-of-{shard_count}"
+def shard_order(shard_count: int) -> list[int]:
+    shards = list(range(max(shard_count, 1)))
+    random.shuffle(shards)
+    return shards
+def lease_status() -> list[dict]:
+    now = datetime.utcnow()
+    rows: list[dict] = []
+    for doc in job_leases.find({}).sort("_id", 1):
+        expires_at = doc.get("expiresAt")
+        rows.append(
+            {
+                "job": doc.get("_id"),
+                "holder": doc.get("holder"),
+                "active": bool(isinstance(expires_at, datetime) and expires_at > now),
+                "expiresAt": expires_at.isoformat() if isinstance(expires_at, datetime) else None,
+                "acquiredAt": doc.get("acquiredAt").isoformat() if isinstance(doc.get("acquiredAt"), datetime) else None,
+                "heldByThisProcess": doc.get("holder") == HOLDER_ID,
+            }
+        )
+    return rows
@@ -0,0 +1,79 @@
+from __future__ import annotations
+import argparse
+import json
+import re
+import timeit
+from typing import Callable, Hashable, Iterable, Mapping
+from app.services.priority_ai import HEURISTIC_PRIORITY_HINTS
+from app.services.report_validation_ai import CATEGORY_HINTS, LOCATION_HINTS, SUSPICIOUS_TEXT_HINTS
+PROGRESS_HINTS = {
+    "incomplete": ("not done", "not completed", "incomplete", "pending", "remaining"),
+    "all_done": ("all done", "job done", "completed all", "everything completed"),
+    "completed": ("fully completed", "completed", "work done", "finished"),
+    "closed": ("verified completed", "all tasks closed", "handover complete"),
+    "almost": ("almost done", "near completion", "final stage"),
+    "halfway": ("halfway", "half done", "50 percent"),
+    "started": ("started", "initial", "site visit", "inspection done"),
+    "materials": ("materials arranged", "procurement complete"),
+    "ongoing": ("work in progress", "ongoing", "currently working"),
+    "blocked": ("delay", "blocked", "waiting", "pending approval"),
+}
+SAMPLE_SENTENCE = (
+    "large pothole near the main road opposite the sector 14 market has been growing for weeks, "
+    "two wheelers keep skidding after rain, work is pending and the street light beside it flickers. "
+)
+STRATEGIES = ("loops", "regex", "phrase_set")
+def _tables() -> dict[str, Mapping[Hashable, Iterable[str]]]:
+    return {
+        "description": {"location": LOCATION_HINTS, "suspicious": SUSPICIOUS_TEXT_HINTS, **CATEGORY_HINTS},
+        "priority": HEURISTIC_PRIORITY_HINTS,
+        "progress": PROGRESS_HINTS,
+    }
+def _strategies(table: Mapping[Hashable, Iterable[str]], text: str) -> dict[str, Callable[[], set]]:
+    phrases = sorted({phrase for values in table.values() for phrase in values}, key=len, reverse=True)
+    alternation = re.compile("(?=(" + "|".join(re.escape(phrase) for phrase in phrases) + "))")
+    def loops() -> set:
+        return {group for group, values in table.items() if any(phrase in text for phrase in values)}
+    def regex() -> set:
+        found = set(alternation.findall(text))
+        return {group for group, values in table.items() if any(phrase in found for phrase in values)}
+    def phrase_set() -> set:
+        found = {phrase for phrase in phrases if phrase in text}
+        return {group for group, values in table.items() if any(phrase in found for phrase in values)}
+    return {"loops": loops, "regex": regex, "phrase_set": phrase_set}
+def run_keyword_benchmark(*, number: int = 500, repeat: int = 5, sizes: tuple[int, ...] = (1, 40)) -> list[dict]:
+    rows: list[dict] = []
+    for name, table in _tables().items():
+        for size in sizes:
+            text = (SAMPLE_SENTENCE * size).lower()
+            runs = _strategies(table, text)
+            expected = runs["loops"]()
+            for strategy, run in runs.items():
+                if run() != expected:
+                    raise AssertionError(f"{strategy} disagrees with substring loops on {name}")
+            timings = {strategy: min(timeit.repeat(run, number=number, repeat=repeat)) / number * 1e6 for strategy, run in runs.items()}
+            rows.append(
+                {
+                    "table": name,
+                    "chars": len(text),
+                    "microseconds": {strategy: round(value, 2) for strategy, value in timings.items()},
+                    "relativeToLoops": {strategy: round(value / timings["loops"], 2) for strategy, value in timings.items()},
+                }
+            )
+    return rows
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare the keyword-hint substring loops against single-pass alternatives.")
+    parser.add_argument("--number", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 40], help="Sample sentence repetitions per text")
+    parser.add_argument("--json", action="store_true", help="Print the raw rows as JSON")
+    args = parser.parse_args()
+    rows = run_keyword_benchmark(number=args.number, repeat=args.repeat, sizes=tuple(args.sizes))
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    print(f"{'table':<12} {'chars':>6} " + " ".join(f"{strategy + ' us':>14}" for strategy in STRATEGIES))
+    for row in rows:
+        print(f"{row['table']:<12} {row['chars']:>6} " + " ".join(f"{row['microseconds'][strategy]:>14.1f}" for strategy in STRATEGIES))
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+from __future__ import annotations
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TEXT_LENGTH_BUCKETS = (32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+BYTE_SIZE_BUCKETS = (1024, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+def _escape(value: object) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+def _format_labels(labelnames: tuple[str, ...], values: tuple[str, ...], extra: dict[str, str] | None = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    for name, value in (extra or {}).items():
+        pairs.append(f'{name}="{_escape(value)}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+class _Metric(ABC):
+    kind = "untyped"
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+    def _key(self, labels: dict[str, object]) -> tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+    @abstractmethod
+    def _samples(self) -> list[str]:
+        ...
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}", *self._samples()]
+class Counter(_Metric):
+    kind = "counter"
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+class Gauge(_Metric):
+    kind = "gauge"
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+class Histogram(_Metric):
+    kind = "histogram"
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series: dict[tuple[str, ...], list[float]] = {}
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = [0.0] * (len(self.buckets) + 2)
+                self._series[key] = series
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        lines: list[str] = []
+        for key, series in items:
+            cumulative = 0.0
+            for index, bound in enumerate(self.buckets):
+                cumulative += series[index]
+                labels = _format_labels(self.labelnames, key, {"le": _format_value(bound)})
+                lines.append(f"{self.name}_bucket{labels} {_format_value(cumulative)}")
+            base = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{base} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{base} {_format_value(series[-1])}")
+        return lines
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+    def _get_or_create(self, metric_class, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = metric_class(name, *args, **kwargs)
+                self._metrics[name] = metric
+            return metric
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+    def gauge(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets)
+    def render(self) -> str:
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        lines: list[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+metrics = MetricsRegistry()
+AI_STAGE_LATENCY = metrics.histogram(
+    "safelive_ai_stage_latency_seconds",
+    "Latency of individual AI inference stages.",
+    ("model", "stage"),
+)
+AI_INPUT_TEXT_CHARS = metrics.histogram(
+    "safelive_ai_input_text_chars",
+    "Length in characters of text sent to AI models.",
+    ("model",),
+    TEXT_LENGTH_BUCKETS,
+)
+AI_INPUT_IMAGE_BYTES = metrics.histogram(
+    "safelive_ai_input_image_bytes",
+    "Size in bytes of images sent to AI models.",
+    ("model",),
+    BYTE_SIZE_BUCKETS,
+)
+AI_BATCH_SIZE = metrics.histogram(
+    "safelive_ai_batch_size",
+    "Number of inputs scored per AI batch call.",
+    ("model",),
+    BATCH_SIZE_BUCKETS,
+)
+AI_PREDICTION_SOURCE = metrics.counter(
+    "safelive_ai_prediction_source_total",
+    "AI predictions by the source that produced them, including fallbacks.",
+    ("model", "source"),
+)
+AI_STAGE_TIMEOUTS = metrics.counter(
+    "safelive_ai_stage_timeouts_total",
+    "AI inference stages that missed their deadline and were left out of the result.",
+    ("model", "stage"),
+)
+AI_STAGE_SKIPS = metrics.counter(
+    "safelive_ai_stage_skips_total",
+    "AI inference stages skipped because an earlier timed-out run of the stage was still executing.",
+    ("model", "stage"),
+)
+@contextmanager
+def time_stage(model: str, stage: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        AI_STAGE_LATENCY.observe(time.perf_counter() - started, model=model, stage=stage)
@@ -0,0 +1,252 @@
+from __future__ import annotations
+import argparse
+import gc
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Callable
+from app.services.model_host import _current_rss_bytes
+from app.services.priority_ai import (
+    PRIORITY_LEVELS,
+    DatasetPriorityModel,
+    HeuristicPriorityModel,
+    PriorityClassifier,
+    TextPriorityModel,
+    VisionPriorityModel,
+    _vision_scores_from_payload,
+    iter_dataset_rows,
+)
+from app.services.progress_ai import PROGRESS_STEPS, _heuristic_progress, _ProgressModel, _round_step
+LOGGER = logging.getLogger(__name__)
+PRIORITY_ENGINES = ("text", "dataset", "vision", "heuristic", "combined")
+PROGRESS_ENGINES = ("model", "heuristic")
+def _clean(value: object) -> str:
+    return str(value or "").strip().lower()
+def _rss_delta_mb(before: int) -> float | None:
+    after = _current_rss_bytes()
+    return round((after - before) / 1048576, 2) if before and after else None
+def _percentile(sorted_values: list[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+def _argmax(scores: dict[str, float] | None) -> str | None:
+    if not scores:
+        return None
+    return max(PRIORITY_LEVELS, key=lambda priority: scores.get(priority, 0.0))
+_text_builder = DatasetPriorityModel()
+def _row_text(row: dict) -> str:
+    return _text_builder._build_text(row) or str(row.get("text") or "").strip()
+def _row_image_path(row: dict) -> str | None:
+    value = str(row.get("image_path") or row.get("imagePath") or row.get("image") or "").strip()
+    return value if value and Path(value).exists() else None
+def load_priority_rows(path: Path, limit: int | None = None) -> list[dict]:
+    rows: list[dict] = []
+    for row in iter_dataset_rows(path):
+        label = _clean(row.get("priority") or row.get("label"))
+        if label not in PRIORITY_LEVELS or not _row_text(row):
+            continue
+        rows.append({**row, "_label": label})
+        if limit and len(rows) >= limit:
+            break
+    return rows
+def load_progress_rows(path: Path, limit: int | None = None) -> list[dict]:
+    rows: list[dict] = []
+    for row in iter_dataset_rows(path):
+        raw = row.get("percent", row.get("progress", row.get("label")))
+        try:
+            percent = _round_step(float(str(raw).strip().rstrip("%")))
+        except (TypeError, ValueError):
+            continue
+        text = str(row.get("text") or row.get("note") or row.get("updateText") or "").strip()
+        if not text:
+            continue
+        rows.append({"text": text, "_label": percent})
+        if limit and len(rows) >= limit:
+            break
+    return rows
+def _priority_engine(name: str) -> Callable[[dict], str | None]:
+    if name == "text":
+        model = TextPriorityModel()
+        return lambda row: _argmax(model.predict_scores(_row_text(row)))
+    if name == "dataset":
+        model = DatasetPriorityModel()
+        return lambda row: _argmax(model.predict_scores(_row_text(row)))
+    if name == "heuristic":
+        model = HeuristicPriorityModel()
+        return lambda row: _argmax(model.predict_scores(_row_text(row), row.get("severity")))
+    if name == "vision":
+        model = VisionPriorityModel()
+        def _vision(row: dict) -> str | None:
+            payload = model.analyze(
+                title=row.get("title"),
+                description=row.get("description") or row.get("text"),
+                category=row.get("category"),
+                image_path=_row_image_path(row),
+                location=row.get("location"),
+                severity=row.get("severity"),
+                scope=row.get("scope"),
+            )
+            return _argmax(_vision_scores_from_payload(payload))
+        return _vision
+    if name == "combined":
+        classifier = PriorityClassifier()
+        return lambda row: classifier.predict(
+            title=row.get("title"),
+            description=row.get("description") or row.get("text"),
+            category=row.get("category"),
+            severity=row.get("severity"),
+            scope=row.get("scope"),
+            location=row.get("location"),
+            image_path=_row_image_path(row),
+        ).priority
+    raise ValueError(f"Unknown priority engine: {name}")
+def _progress_engine(name: str) -> Callable[[dict], int | None]:
+    if name == "model":
+        model = _ProgressModel()
+        return lambda row: model.predict(row["text"]).percent
+    if name == "heuristic":
+        return lambda row: _heuristic_progress(row["text"])[0]
+    raise ValueError(f"Unknown progress engine: {name}")
+def _classification_report(labels: list, predictions: list, classes: tuple) -> dict:
+    confusion = {str(actual): {str(predicted): 0 for predicted in classes} for actual in classes}
+    for actual, predicted in zip(labels, predictions):
+        if predicted in classes:
+            confusion[str(actual)][str(predicted)] += 1
+    f1_scores = []
+    for cls in classes:
+        tp = confusion[str(cls)][str(cls)]
+        fp = sum(confusion[str(other)][str(cls)] for other in classes if other != cls)
+        fn = sum(count for predicted, count in confusion[str(cls)].items() if predicted != str(cls))
+        fn += sum(1 for actual, predicted in zip(labels, predictions) if actual == cls and predicted not in classes)
+        if tp + fp + fn == 0:
+            continue
+        precision = tp / (tp + fp) if tp + fp else 0.0
+        recall = tp / (tp + fn) if tp + fn else 0.0
+        f1_scores.append(2 * precision * recall / (precision + recall) if precision + recall else 0.0)
+    correct = sum(1 for actual, predicted in zip(labels, predictions) if actual == predicted)
+    return {
+        "accuracy": round(correct / len(labels), 4) if labels else 0.0,
+        "macroF1": round(sum(f1_scores) / len(f1_scores), 4) if f1_scores else 0.0,
+        "confusionMatrix": confusion,
+    }
+def benchmark_engine(name: str, engine: Callable[[dict], object], rows: list[dict], classes: tuple, warmup: int) -> dict:
+    for row in rows[:warmup]:
+        try:
+            engine(row)
+        except Exception as exc:
+            LOGGER.debug("Benchmark engine %s failed during warmup: %s", name, exc)
+    latencies: list[float] = []
+    predictions: list = []
+    failures = 0
+    started = time.perf_counter()
+    for row in rows:
+        tick = time.perf_counter()
+        try:
+            predictions.append(engine(row))
+        except Exception as exc:
+            failures += 1
+            predictions.append(None)
+            LOGGER.debug("Benchmark engine %s failed on row: %s", name, exc)
+        latencies.append(time.perf_counter() - tick)
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    labels = [row["_label"] for row in rows]
+    report = _classification_report(labels, predictions, classes)
+    if classes == PROGRESS_STEPS:
+        errors = [abs(actual - predicted) for actual, predicted in zip(labels, predictions) if predicted is not None]
+        report["meanAbsoluteError"] = round(sum(errors) / len(errors), 3) if errors else None
+    report.update(
+        {
+            "engine": name,
+            "samples": len(rows),
+            "failures": failures,
+            "abstained": sum(1 for value in predictions if value is None),
+            "latencyMs": {
+                "p50": round(_percentile(latencies, 0.5) * 1000, 3),
+                "p99": round(_percentile(latencies, 0.99) * 1000, 3),
+                "mean": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+            },
+            "throughputPerSecond": round(len(rows) / elapsed, 3) if elapsed > 0 else None,
+        }
+    )
+    return report
+def run_benchmark(
+    dataset: Path,
+    *,
+    task: str = "priority",
+    engines: list[str] | None = None,
+    limit: int | None = None,
+    warmup: int = 3,
+) -> dict:
+    if task == "progress":
+        rows = load_progress_rows(dataset, limit)
+        selected = engines or list(PROGRESS_ENGINES)
+        factory, classes = _progress_engine, PROGRESS_STEPS
+    else:
+        rows = load_priority_rows(dataset, limit)
+        selected = engines or list(PRIORITY_ENGINES)
+        factory, classes = _priority_engine, PRIORITY_LEVELS
+    results = []
+    for name in selected:
+        gc.collect()
+        rss_before = _current_rss_bytes()
+        load_started = time.perf_counter()
+        try:
+            engine = factory(name)
+        except Exception as exc:
+            LOGGER.warning("Benchmark engine %s could not be loaded: %s", name, exc)
+            results.append({"engine": name, "error": str(exc)})
+            continue
+        if rows:
+            try:
+                engine(rows[0])
+            except Exception as exc:
+                LOGGER.debug("Benchmark engine %s failed on its first row: %s", name, exc)
+        load_seconds = time.perf_counter() - load_started
+        load_rss_mb = _rss_delta_mb(rss_before)
+        result = benchmark_engine(name, engine, rows, classes, warmup)
+        result["loadSeconds"] = round(load_seconds, 3)
+        result["loadRssMb"] = load_rss_mb
+        result["rssDeltaMb"] = _rss_delta_mb(rss_before)
+        results.append(result)
+        del engine
+        LOGGER.info("Benchmarked %s engine %s: macroF1=%s p50=%sms", task, name, result["macroF1"], result["latencyMs"]["p50"])
+    return {"task": task, "dataset": str(dataset), "samples": len(rows), "results": results}
+def evaluate_gates(report: dict, *, min_macro_f1: float | None, max_p99_ms: float | None) -> list[str]:
+    violations: list[str] = []
+    for result in report.get("results", []):
+        if "error" in result:
+            violations.append(f"{result['engine']}: failed to load: {result['error']}")
+            continue
+        if min_macro_f1 is not None and result["macroF1"] < min_macro_f1:
+            violations.append(f"{result['engine']}: macroF1 {result['macroF1']} < {min_macro_f1}")
+        if max_p99_ms is not None and result["latencyMs"]["p99"] > max_p99_ms:
+            violations.append(f"{result['engine']}: p99 {result['latencyMs']['p99']}ms > {max_p99_ms}ms")
+    return violations
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Evaluate accuracy and latency of priority/progress engines on a labeled dataset.")
+    parser.add_argument("dataset", type=Path, help="Labeled .jsonl or .csv file")
+    parser.add_argument("--task", choices=("priority", "progress"), default="priority")
+    parser.add_argument("--engines", nargs="+", default=None)
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument("--min-macro-f1", type=float, default=None)
+    parser.add_argument("--max-p99-ms", type=float, default=None)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    report = run_benchmark(args.dataset, task=args.task, engines=args.engines, limit=args.limit, warmup=args.warmup)
+    violations = evaluate_gates(report, min_macro_f1=args.min_macro_f1, max_p99_ms=args.max_p99_ms)
+    report["gateViolations"] = violations
+    output = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(output, encoding="utf-8")
+    else:
+        print(output)
+    if violations:
+        sys.exit(1)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,378 @@
+from __future__ import annotations
+import argparse
+import gc
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from multiprocessing.connection import Client, Connection, Listener
+from app.config.settings import settings
+LOGGER = logging.getLogger(__name__)
+BACKEND_MODEL_HOST = "model_host"
+OP_PING = "ping"
+OP_STATUS = "status"
+OP_ZERO_SHOT = "zero_shot"
+def _authkey() -> bytes:
+    return str(settings.AI_MODEL_HOST_AUTHKEY or settings.SECRET_KEY).encode("utf-8")
+def _current_rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm", "r", encoding="utf-8") as handle:
+            return int(handle.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+def _pipeline_bytes(pipeline, rss_delta: int) -> int:
+    model = getattr(pipeline, "model", None)
+    try:
+        return sum(parameter.numel() * parameter.element_size() for parameter in model.parameters())
+    except Exception:
+        return max(rss_delta, 0)
+def _resolve_device() -> int:
+    try:
+        import torch
+        if torch.cuda.is_available():
+            return 0
+    except Exception as exc:
+        LOGGER.debug("Torch CUDA detection failed for model host, using CPU: %s", exc)
+    return -1
+@dataclass
+class _PendingRequest:
+    sequences: list[str]
+    candidate_labels: tuple[str, ...]
+    hypothesis_template: str
+    multi_label: bool
+    done: threading.Event = field(default_factory=threading.Event)
+    result: list[dict] | None = None
+    error: str | None = None
+@dataclass
+class _HostedModel:
+    model_id: str
+    pipeline: object
+    backend: str
+    size_bytes: int
+    loaded_at: float
+    last_used: float
+    requests: queue.Queue = field(default_factory=queue.Queue)
+    served: int = 0
+    batches: int = 0
+    retired: bool = False
+class ModelHost:
+    def __init__(
+        self,
+        *,
+        memory_budget_mb: int,
+        idle_seconds: int,
+        max_batch: int,
+        batch_wait_ms: int,
+    ):
+        self._memory_budget = max(int(memory_budget_mb), 0) * 1024 * 1024
+        self._idle_seconds = max(int(idle_seconds), 0)
+        self._max_batch = max(int(max_batch), 1)
+        self._batch_wait = max(int(batch_wait_ms), 0) / 1000.0
+        self._models: dict[str, _HostedModel] = {}
+        self._lock = threading.Lock()
+        self._load_locks: dict[str, threading.Lock] = {}
+    def _load(self, model_id: str) -> _HostedModel:
+        hosted = self._models.get(model_id)
+        if hosted is not None:
+            return hosted
+        with self._lock:
+            load_lock = self._load_locks.setdefault(model_id, threading.Lock())
+        with load_lock:
+            hosted = self._models.get(model_id)
+            if hosted is not None:
+                return hosted
+            from app.services.nli_backend import load_zero_shot_pipeline
+            rss_before = _current_rss_bytes()
+            pipeline, backend = load_zero_shot_pipeline(
+                model_id,
+                device=_resolve_device(),
+                candidate_labels=["positive", "negative"],
+                hypothesis_template="This example is {}.",
+                allow_remote=False,
+            )
+            now = time.monotonic()
+            hosted = _HostedModel(
+                model_id=model_id,
+                pipeline=pipeline,
+                backend=backend,
+                size_bytes=_pipeline_bytes(pipeline, _current_rss_bytes() - rss_before),
+                loaded_at=now,
+                last_used=now,
+            )
+            with self._lock:
+                self._models[model_id] = hosted
+            threading.Thread(target=self._batch_loop, args=(hosted,), daemon=True, name=f"host-batch-{model_id}").start()
+            LOGGER.info("Model host loaded %s (backend=%s, %.0f MB)", model_id, backend, hosted.size_bytes / 1048576)
+            self._enforce_budget(keep=model_id)
+            return hosted
+    def _unload(self, model_id: str, reason: str) -> None:
+        with self._lock:
+            hosted = self._models.pop(model_id, None)
+        if hosted is None:
+            return
+        hosted.retired = True
+        hosted.requests.put(None)
+        hosted.pipeline = None
+        gc.collect()
+        try:
+            import torch
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except Exception:
+            pass
+        LOGGER.info("Model host unloaded %s (%s)", model_id, reason)
+    def _enforce_budget(self, keep: str | None = None) -> None:
+        if self._memory_budget <= 0:
+            return
+        while True:
+            with self._lock:
+                total = sum(hosted.size_bytes for hosted in self._models.values())
+                candidates = sorted(
+                    (hosted for name, hosted in self._models.items() if name != keep),
+                    key=lambda hosted: hosted.last_used,
+                )
+            if total <= self._memory_budget or not candidates:
+                if total > self._memory_budget:
+                    LOGGER.warning("Model host over memory budget with a single model loaded (%.0f MB)", total / 1048576)
+                return
+            self._unload(candidates[0].model_id, "memory budget")
+    def evict_idle(self) -> None:
+        if self._idle_seconds <= 0:
+            return
+        cutoff = time.monotonic() - self._idle_seconds
+        with self._lock:
+            idle = [name for name, hosted in self._models.items() if hosted.last_used < cutoff and hosted.requests.empty()]
+        for name in idle:
+            self._unload(name, "idle")
+    def _batch_loop(self, hosted: _HostedModel) -> None:
+        while not hosted.retired:
+            first = hosted.requests.get()
+            if first is None:
+                break
+            batch = [first]
+            size = len(first.sequences)
+            deadline = time.monotonic() + self._batch_wait
+            while size < self._max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = hosted.requests.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    hosted.retired = True
+                    break
+                batch.append(item)
+                size += len(item.sequences)
+            self._run_batch(hosted, batch)
+        while True:
+            try:
+                item = hosted.requests.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                item.error = "model unloaded"
+                item.done.set()
+    def _run_batch(self, hosted: _HostedModel, batch: list[_PendingRequest]) -> None:
+        groups: dict[tuple, list[_PendingRequest]] = {}
+        for item in batch:
+            groups.setdefault((item.candidate_labels, item.hypothesis_template, item.multi_label), []).append(item)
+        for (labels, template, multi_label), items in groups.items():
+            sequences = [sequence for item in items for sequence in item.sequences]
+            try:
+                outputs = hosted.pipeline(
+                    sequences=sequences,
+                    candidate_labels=list(labels),
+                    hypothesis_template=template,
+                    multi_label=multi_label,
+                )
+                if isinstance(outputs, dict):
+                    outputs = [outputs]
+                offset = 0
+                for item in items:
+                    item.result = [dict(row) for row in outputs[offset : offset + len(item.sequences)]]
+                    offset += len(item.sequences)
+            except Exception as exc:
+                for item in items:
+                    item.error = str(exc)
+            for item in items:
+                item.done.set()
+        hosted.last_used = time.monotonic()
+        hosted.served += sum(len(item.sequences) for item in batch)
+        hosted.batches += 1
+    def zero_shot(self, request: dict) -> list[dict]:
+        for _ in range(2):
+            hosted = self._load(str(request["model"]))
+            pending = _PendingRequest(
+                sequences=[str(sequence) for sequence in request["sequences"]],
+                candidate_labels=tuple(request["candidate_labels"]),
+                hypothesis_template=str(request["hypothesis_template"]),
+                multi_label=bool(request.get("multi_label", False)),
+            )
+            hosted.last_used = time.monotonic()
+            hosted.requests.put(pending)
+            while not pending.done.wait(1.0):
+                if hosted.retired:
+                    pending.error = "model unloaded"
+                    break
+            if pending.error != "model unloaded":
+                break
+        if pending.error is not None:
+            raise RuntimeError(pending.error)
+        return pending.result or []
+    def status(self) -> dict:
+        with self._lock:
+            models = [
+                {
+                    "model": hosted.model_id,
+                    "backend": hosted.backend,
+                    "sizeMb": round(hosted.size_bytes / 1048576, 1),
+                    "idleSeconds": round(time.monotonic() - hosted.last_used, 1),
+                    "served": hosted.served,
+                    "batches": hosted.batches,
+                    "queued": hosted.requests.qsize(),
+                }
+                for hosted in self._models.values()
+            ]
+        return {
+            "pid": os.getpid(),
+            "memoryBudgetMb": self._memory_budget // 1048576,
+            "rssMb": round(_current_rss_bytes() / 1048576, 1),
+            "models": models,
+        }
+    def handle(self, connection: Connection) -> None:
+        try:
+            while True:
+                try:
+                    request = connection.recv()
+                except EOFError:
+                    return
+                op = request.get("op") if isinstance(request, dict) else None
+                try:
+                    if op == OP_PING:
+                        response = {"ok": True}
+                    elif op == OP_STATUS:
+                        response = {"ok": True, "result": self.status()}
+                    elif op == OP_ZERO_SHOT:
+                        response = {"ok": True, "result": self.zero_shot(request)}
+                    else:
+                        response = {"ok": False, "error": f"unknown op: {op}"}
+                except Exception as exc:
+                    LOGGER.warning("Model host request failed: %s", exc)
+                    response = {"ok": False, "error": str(exc)}
+                connection.send(response)
+        finally:
+            connection.close()
+    def _janitor(self) -> None:
+        interval = max(min(self._idle_seconds / 4, 60), 5) if self._idle_seconds else 60
+        while True:
+            time.sleep(interval)
+            self.evict_idle()
+    def serve(self, socket_path: str) -> None:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        listener = Listener(address=socket_path, family="AF_UNIX", authkey=_authkey())
+        os.chmod(socket_path, 0o600)
+        threading.Thread(target=self._janitor, daemon=True, name="host-janitor").start()
+        LOGGER.info("Model host listening on %s (budget=%s MB)", socket_path, self._memory_budget // 1048576)
+        try:
+            while True:
+                try:
+                    connection = listener.accept()
+                except Exception as exc:
+                    LOGGER.warning("Model host rejected a connection: %s", exc)
+                    continue
+                threading.Thread(target=self.handle, args=(connection,), daemon=True).start()
+        finally:
+            listener.close()
+class ModelHostClient:
+    def __init__(self, socket_path: str | None = None, timeout: float | None = None):
+        self._socket_path = socket_path or settings.AI_MODEL_HOST_SOCKET
+        self._timeout = float(settings.AI_MODEL_HOST_TIMEOUT_SECONDS if timeout is None else timeout)
+        self._local = threading.local()
+    def _connection(self) -> Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = Client(self._socket_path, family="AF_UNIX", authkey=_authkey())
+            self._local.connection = connection
+        return connection
+    def _drop_connection(self) -> None:
+        connection = getattr(self._local, "connection", None)
+        self._local.connection = None
+        if connection is not None:
+            try:
+                connection.close()
+            except OSError:
+                pass
+    def request(self, payload: dict):
+        for attempt in range(2):
+            try:
+                connection = self._connection()
+                connection.send(payload)
+                if not connection.poll(self._timeout):
+                    self._drop_connection()
+                    raise TimeoutError(f"model host did not answer within {self._timeout:.0f}s")
+                response = connection.recv()
+                break
+            except TimeoutError:
+                raise
+            except (EOFError, ConnectionError, OSError) as exc:
+                self._drop_connection()
+                if attempt:
+                    raise ConnectionError(f"model host unavailable: {exc}") from exc
+        if not response.get("ok"):
+            raise RuntimeError(response.get("error") or "model host request failed")
+        return response.get("result")
+    def ping(self) -> bool:
+        try:
+            self.request({"op": OP_PING})
+            return True
+        except Exception as exc:
+            LOGGER.debug("Model host ping failed: %s", exc)
+            return False
+class RemoteZeroShotPipeline:
+    def __init__(self, model_id: str, client: ModelHostClient | None = None):
+        self.model_id = model_id
+        self._client = client or ModelHostClient()
+    def __call__(
+        self,
+        sequences: str | list[str],
+        candidate_labels: list[str],
+        hypothesis_template: str = "This example is {}.",
+        multi_label: bool = False,
+        batch_size: int | None = None,
+    ):
+        single = isinstance(sequences, str)
+        results = self._client.request(
+            {
+                "op": OP_ZERO_SHOT,
+                "model": self.model_id,
+                "sequences": [sequences] if single else list(sequences),
+                "candidate_labels": list(candidate_labels),
+                "hypothesis_template": hypothesis_template,
+                "multi_label": multi_label,
+            }
+        )
+        return results[0] if single else results
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve zero-shot models to all API workers over a Unix socket.")
+    parser.add_argument("--socket", default=settings.AI_MODEL_HOST_SOCKET)
+    parser.add_argument("--memory-budget-mb", type=int, default=settings.AI_MODEL_HOST_MEMORY_BUDGET_MB)
+    parser.add_argument("--idle-seconds", type=int, default=settings.AI_MODEL_HOST_IDLE_SECONDS)
+    parser.add_argument("--max-batch", type=int, default=settings.AI_MODEL_HOST_MAX_BATCH)
+    parser.add_argument("--batch-wait-ms", type=int, default=settings.AI_MODEL_HOST_BATCH_WAIT_MS)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    host = ModelHost(
+        memory_budget_mb=args.memory_budget_mb,
+        idle_seconds=args.idle_seconds,
+        max_batch=args.max_batch,
+        batch_wait_ms=args.batch_wait_ms,
+    )
+    host.serve(args.socket)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+from __future__ import annotations
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable
+from app.config.settings import settings
+from app.services.cpu_governor import background_inference
+LOGGER = logging.getLogger(__name__)
+@dataclass(frozen=True)
+class ModelVersion:
+    name: str
+    version: int
+    instance: object
+    loaded_at: str
+    load_seconds: float
+    parity: dict | None = None
+@dataclass
+class _ModelSlot:
+    factory: Callable[[], object]
+    warmup: Callable[[object], object] | None
+    parity: Callable[[object, object], dict] | None
+    current: ModelVersion | None = None
+    next_version: int = 1
+    loading: bool = False
+    last_error: str | None = None
+    last_attempt_at: str | None = None
+    retired: list[dict] = field(default_factory=list)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+def _now_iso() -> str:
+    return datetime.utcnow().isoformat()
+class ModelRegistry:
+    def __init__(self):
+        self._slots: dict[str, _ModelSlot] = {}
+        self._lock = threading.Lock()
+    def register(
+        self,
+        name: str,
+        factory: Callable[[], object],
+        *,
+        warmup: Callable[[object], object] | None = None,
+        parity: Callable[[object, object], dict] | None = None,
+    ) -> None:
+        with self._lock:
+            self._slots[name] = _ModelSlot(factory=factory, warmup=warmup, parity=parity)
+    def _slot(self, name: str) -> _ModelSlot:
+        slot = self._slots.get(name)
+        if slot is None:
+            raise KeyError(f"Unknown model: {name}")
+        return slot
+    def get(self, name: str):
+        slot = self._slot(name)
+        current = slot.current
+        if current is not None:
+            return current.instance
+        with slot.lock:
+            if slot.current is None:
+                started = time.monotonic()
+                instance = slot.factory()
+                slot.current = ModelVersion(
+                    name=name,
+                    version=slot.next_version,
+                    instance=instance,
+                    loaded_at=_now_iso(),
+                    load_seconds=round(time.monotonic() - started, 3),
+                )
+                slot.next_version += 1
+            return slot.current.instance
+    def current_version(self, name: str) -> ModelVersion | None:
+        return self._slot(name).current
+    def _swap(self, name: str, version: ModelVersion) -> None:
+        slot = self._slot(name)
+        with slot.lock:
+            previous = slot.current
+            slot.current = version
+            if previous is not None:
+                slot.retired.append({"version": previous.version, "retiredAt": _now_iso()})
+                slot.retired = slot.retired[-5:]
+        LOGGER.info("Model %s swapped to version %s", name, version.version)
+    @background_inference()
+    def _build_candidate(self, name: str) -> bool:
+        slot = self._slot(name)
+        started = time.monotonic()
+        try:
+            candidate = slot.factory()
+            if slot.warmup:
+                slot.warmup(candidate)
+            parity_report = None
+            incumbent = slot.current
+            if slot.parity and incumbent is not None:
+                parity_report = slot.parity(candidate, incumbent.instance)
+                if not parity_report.get("passed", False):
+                    slot.last_error = f"parity check failed: {parity_report}"
+                    LOGGER.warning("Model %s candidate rejected by parity check: %s", name, parity_report)
+                    return False
+            with slot.lock:
+                version_number = slot.next_version
+                slot.next_version += 1
+            self._swap(
+                name,
+                ModelVersion(
+                    name=name,
+                    version=version_number,
+                    instance=candidate,
+                    loaded_at=_now_iso(),
+                    load_seconds=round(time.monotonic() - started, 3),
+                    parity=parity_report,
+                ),
+            )
+            slot.last_error = None
+            return True
+        except Exception as exc:
+            slot.last_error = str(exc)
+            LOGGER.warning("Model %s candidate load failed: %s", name, exc)
+            return False
+        finally:
+            slot.loading = False
+    def reload(self, name: str, *, wait: bool = False) -> bool:
+        slot = self._slot(name)
+        with slot.lock:
+            if slot.loading:
+                return False
+            slot.loading = True
+            slot.last_attempt_at = _now_iso()
+        if wait:
+            return self._build_candidate(name)
+        threading.Thread(target=self._build_candidate, args=(name,), daemon=True).start()
+        return True
+    def status(self) -> list[dict]:
+        rows: list[dict] = []
+        for name, slot in sorted(self._slots.items()):
+            current = slot.current
+            rows.append(
+                {
+                    "name": name,
+                    "version": current.version if current else None,
+                    "loadedAt": current.loaded_at if current else None,
+                    "loadSeconds": current.load_seconds if current else None,
+                    "parity": current.parity if current else None,
+                    "loading": slot.loading,
+                    "lastAttemptAt": slot.last_attempt_at,
+                    "lastError": slot.last_error,
+                    "retired": list(slot.retired),
+                }
+            )
+        return rows
+def agreement_report(pairs: list[tuple[object, object]], degraded: bool = False) -> dict:
+    total = len(pairs)
+    agreements = sum(1 for candidate, incumbent in pairs if candidate == incumbent)
+    agreement = agreements / total if total else 1.0
+    minimum = float(settings.AI_MODEL_REGISTRY_MIN_AGREEMENT)
+    return {
+        "samples": total,
+        "agreement": round(agreement, 4),
+        "minAgreement": minimum,
+        "incumbentDegraded": degraded,
+        "passed": degraded or agreement >= minimum,
+    }
+model_registry = ModelRegistry()
@@ -0,0 +1,249 @@
+from __future__ import annotations
+import argparse
+import json
+import logging
+import os
+import platform
+import re
+import shutil
+import tempfile
+from pathlib import Path
+from app.config.settings import settings
+LOGGER = logging.getLogger(__name__)
+BACKEND_TRANSFORMERS = "transformers"
+BACKEND_ONNX = "onnx"
+PARITY_REPORT_FILE = "parity.json"
+DEFAULT_PARITY_SAMPLES = (
+    "Large pothole on the main road near the market, vehicles are swerving dangerously.",
+    "Garbage has not been collected from the lane for two days.",
+    "Live electric wire hanging low near the school gate after the storm.",
+    "Streetlight flickering on sector 4 road at night.",
+    "Repair crew started work, materials arranged and excavation is halfway done.",
+    "All tasks closed and handover complete after final inspection.",
+)
+def _clean(value: str | None) -> str:
+    return (value or "").strip().lower()
+def _resolve_intra_op_threads() -> int:
+    configured = int(settings.AI_ONNX_INTRA_OP_THREADS or 0)
+    if configured > 0:
+        return configured
+    from app.services.cpu_governor import intra_op_threads
+    return intra_op_threads()
+def _onnx_export_dir(model_id: str) -> Path:
+    slug = re.sub(r"[^a-zA-Z0-9_.-]+", "__", model_id.strip())
+    return Path(settings.AI_ONNX_CACHE_DIR) / slug
+def _quantization_config():
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    machine = platform.machine().lower()
+    if machine in {"arm64", "aarch64"}:
+        return AutoQuantizationConfig.arm64(is_static=False, per_channel=False)
+    return AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+def _onnx_artifact(model_id: str) -> tuple[Path, str]:
+    export_dir = _onnx_export_dir(model_id)
+    if settings.AI_ONNX_QUANTIZE:
+        return export_dir / "int8", "model_quantized.onnx"
+    return export_dir, "model.onnx"
+def _staging_dir(target: Path) -> Path:
+    target.parent.mkdir(parents=True, exist_ok=True)
+    return Path(tempfile.mkdtemp(prefix=f".{target.name}.", dir=target.parent))
+def _publish_dir(staging: Path, target: Path) -> None:
+    try:
+        os.replace(staging, target)
+    except OSError:
+        if not target.exists():
+            raise
+        LOGGER.info("%s was published by another process, discarding local copy", target)
+def _export_onnx(model_id: str, export_dir: Path) -> None:
+    from optimum.onnxruntime import ORTModelForSequenceClassification
+    from transformers import AutoTokenizer
+    LOGGER.info("Exporting %s to ONNX at %s", model_id, export_dir)
+    staging = _staging_dir(export_dir)
+    try:
+        exported = ORTModelForSequenceClassification.from_pretrained(model_id, export=True)
+        exported.save_pretrained(staging)
+        AutoTokenizer.from_pretrained(model_id).save_pretrained(staging)
+        _publish_dir(staging, export_dir)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+def _quantize_onnx(model_id: str, export_dir: Path, quantized_dir: Path) -> None:
+    from optimum.onnxruntime import ORTQuantizer
+    from transformers import AutoTokenizer
+    LOGGER.info("Applying dynamic int8 quantization to %s", model_id)
+    staging = _staging_dir(quantized_dir)
+    try:
+        quantizer = ORTQuantizer.from_pretrained(export_dir, file_name="model.onnx")
+        quantizer.quantize(save_dir=staging, quantization_config=_quantization_config())
+        AutoTokenizer.from_pretrained(export_dir).save_pretrained(staging)
+        _publish_dir(staging, quantized_dir)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+def _build_onnx_pipeline(model_id: str):
+    import onnxruntime
+    from optimum.onnxruntime import ORTModelForSequenceClassification
+    from transformers import AutoTokenizer, pipeline
+    export_dir = _onnx_export_dir(model_id)
+    if not (export_dir / "model.onnx").exists():
+        _export_onnx(model_id, export_dir)
+    model_dir, file_name = _onnx_artifact(model_id)
+    if settings.AI_ONNX_QUANTIZE and not (model_dir / file_name).exists():
+        _quantize_onnx(model_id, export_dir, model_dir)
+    session_options = onnxruntime.SessionOptions()
+    session_options.intra_op_num_threads = _resolve_intra_op_threads()
+    session_options.inter_op_num_threads = 1
+    session_options.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+    session_options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    model = ORTModelForSequenceClassification.from_pretrained(
+        model_dir,
+        file_name=file_name,
+        provider="CPUExecutionProvider",
+        session_options=session_options,
+    )
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    return pipeline("zero-shot-classification", model=model, tokenizer=tokenizer)
+def _score_map(result: dict) -> dict[str, float]:
+    labels = result.get("labels") or []
+    scores = result.get("scores") or []
+    return {str(label): float(score) for label, score in zip(labels, scores)}
+def check_zero_shot_parity(
+    reference,
+    candidate,
+    *,
+    candidate_labels: list[str],
+    hypothesis_template: str,
+    samples: tuple[str, ...] | list[str] = DEFAULT_PARITY_SAMPLES,
+    tolerance: float | None = None,
+) -> dict[str, object]:
+    limit = float(settings.AI_ONNX_PARITY_TOLERANCE if tolerance is None else tolerance)
+    max_abs_diff = 0.0
+    agreements = 0
+    for sample in samples:
+        kwargs = {
+            "sequences": sample,
+            "candidate_labels": list(candidate_labels),
+            "hypothesis_template": hypothesis_template,
+            "multi_label": False,
+        }
+        expected = _score_map(reference(**kwargs))
+        actual = _score_map(candidate(**kwargs))
+        for label in candidate_labels:
+            max_abs_diff = max(max_abs_diff, abs(expected.get(label, 0.0) - actual.get(label, 0.0)))
+        if expected and actual and max(expected, key=expected.get) == max(actual, key=actual.get):
+            agreements += 1
+    total = max(len(samples), 1)
+    top1_agreement = agreements / total
+    return {
+        "samples": len(samples),
+        "maxAbsDiff": round(max_abs_diff, 4),
+        "top1Agreement": round(top1_agreement, 4),
+        "tolerance": limit,
+        "passed": max_abs_diff <= limit,
+    }
+def _parity_key(candidate_labels: list[str], hypothesis_template: str, tolerance: float) -> dict[str, object]:
+    return {"labels": sorted(candidate_labels), "hypothesisTemplate": hypothesis_template, "tolerance": float(tolerance)}
+def read_parity_report(
+    model_id: str,
+    *,
+    candidate_labels: list[str],
+    hypothesis_template: str,
+    tolerance: float | None = None,
+) -> dict[str, object] | None:
+    model_dir, _ = _onnx_artifact(model_id)
+    path = model_dir / PARITY_REPORT_FILE
+    try:
+        stored = json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as exc:
+        LOGGER.warning("Ignoring unreadable ONNX parity report at %s: %s", path, exc)
+        return None
+    limit = float(settings.AI_ONNX_PARITY_TOLERANCE if tolerance is None else tolerance)
+    if stored.get("key") != _parity_key(candidate_labels, hypothesis_template, limit):
+        return None
+    return stored.get("report")
+def write_parity_report(
+    model_id: str,
+    report: dict[str, object],
+    *,
+    candidate_labels: list[str],
+    hypothesis_template: str,
+) -> Path:
+    model_dir, _ = _onnx_artifact(model_id)
+    path = model_dir / PARITY_REPORT_FILE
+    payload = {"key": _parity_key(candidate_labels, hypothesis_template, float(report["tolerance"])), "report": report}
+    temp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    temp_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    os.replace(temp_path, path)
+    return path
+def load_zero_shot_pipeline(
+    model_id: str,
+    *,
+    device: int,
+    candidate_labels: list[str],
+    hypothesis_template: str,
+    allow_remote: bool = True,
+):
+    if allow_remote and settings.AI_MODEL_HOST_ENABLED:
+        from app.services.model_host import BACKEND_MODEL_HOST, ModelHostClient, RemoteZeroShotPipeline
+        client = ModelHostClient()
+        if client.ping():
+            return RemoteZeroShotPipeline(model_id, client), BACKEND_MODEL_HOST
+        if not settings.AI_MODEL_HOST_FALLBACK_LOCAL:
+            raise RuntimeError(f"model host unreachable at {settings.AI_MODEL_HOST_SOCKET}")
+        LOGGER.warning("Model host unreachable at %s, loading %s in-process", settings.AI_MODEL_HOST_SOCKET, model_id)
+    from transformers import pipeline
+    backend = _clean(settings.AI_INFERENCE_BACKEND) or BACKEND_TRANSFORMERS
+    if backend == BACKEND_ONNX and device < 0:
+        try:
+            onnx_pipeline = _build_onnx_pipeline(model_id)
+        except Exception as exc:
+            LOGGER.warning("ONNX backend unavailable for %s, falling back to transformers: %s", model_id, exc)
+        else:
+            if not settings.AI_ONNX_PARITY_CHECK:
+                LOGGER.info("Loaded ONNX zero-shot backend for %s (parity check disabled)", model_id)
+                return onnx_pipeline, BACKEND_ONNX
+            report = read_parity_report(model_id, candidate_labels=candidate_labels, hypothesis_template=hypothesis_template)
+            reference = None
+            if report is None:
+                reference = pipeline("zero-shot-classification", model=model_id, device=device)
+                report = check_zero_shot_parity(
+                    reference,
+                    onnx_pipeline,
+                    candidate_labels=candidate_labels,
+                    hypothesis_template=hypothesis_template,
+                )
+                try:
+                    write_parity_report(model_id, report, candidate_labels=candidate_labels, hypothesis_template=hypothesis_template)
+                except OSError as exc:
+                    LOGGER.warning("Could not persist ONNX parity report for %s: %s", model_id, exc)
+            if report["passed"]:
+                LOGGER.info("Loaded ONNX zero-shot backend for %s. parity=%s", model_id, report)
+                return onnx_pipeline, BACKEND_ONNX
+            LOGGER.warning("ONNX backend for %s failed parity check, using transformers. parity=%s", model_id, report)
+            if reference is None:
+                reference = pipeline("zero-shot-classification", model=model_id, device=device)
+            return reference, BACKEND_TRANSFORMERS
+    elif backend == BACKEND_ONNX:
+        LOGGER.info("ONNX backend is CPU-only; using transformers on accelerator for %s", model_id)
+    return pipeline("zero-shot-classification", model=model_id, device=device), BACKEND_TRANSFORMERS
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export a zero-shot NLI model to ONNX and report parity against PyTorch.")
+    parser.add_argument("--model", default=settings.PRIORITY_AI_TEXT_MODEL)
+    parser.add_argument("--hypothesis", default="This incident is {}.")
+    parser.add_argument("--labels", nargs="+", default=["low priority", "medium priority", "high priority"])
+    parser.add_argument("--tolerance", type=float, default=None)
+    args = parser.parse_args()
+    from transformers import pipeline
+    reference = pipeline("zero-shot-classification", model=args.model, device=-1)
+    candidate = _build_onnx_pipeline(args.model)
+    report = check_zero_shot_parity(
+        reference,
+        candidate,
+        candidate_labels=args.labels,
+        hypothesis_template=args.hypothesis,
+        tolerance=args.tolerance,
+    )
+    path = write_parity_report(args.model, report, candidate_labels=args.labels, hypothesis_template=args.hypothesis)
+    print(json.dumps(report, indent=2))
+    print(f"Parity report written to {path}")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+from __future__ import annotations
+import logging
+import os
+import pickle
+from pathlib import Path
+from app.config.settings import settings
+LOGGER = logging.getLogger(__name__)
+CONFIDENCE_TOLERANCE = 5
+class OrdinalProgressModel:
+    def __init__(self, steps: tuple[int, ...]):
+        self.steps = tuple(steps)
+        self.metadata: dict[str, object] = {}
+        self._vectorizer = None
+        self._weights = None
+        self._bias = None
+        self._calibration: tuple[list[float], list[float]] | None = None
+    def fit(self, texts: list[str], percents: list[int]) -> "OrdinalProgressModel":
+        import numpy as np
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.linear_model import LogisticRegression
+        thresholds = self.steps[1:]
+        self._vectorizer = TfidfVectorizer(ngram_range=(1, 2), min_df=1, max_features=30000, sublinear_tf=True)
+        features = self._vectorizer.fit_transform(texts)
+        labels = np.asarray(percents)
+        weights = np.zeros((len(thresholds), features.shape[1]))
+        bias = np.zeros(len(thresholds))
+        for index, threshold in enumerate(thresholds):
+            target = (labels >= threshold).astype(int)
+            positive_rate = float(target.mean())
+            if positive_rate in (0.0, 1.0):
+                bias[index] = 12.0 if positive_rate == 1.0 else -12.0
+                continue
+            classifier = LogisticRegression(max_iter=1000, C=4.0)
+            classifier.fit(features, target)
+            weights[index] = classifier.coef_[0]
+            bias[index] = classifier.intercept_[0]
+        self._weights = weights
+        self._bias = bias
+        self._calibration = None
+        return self
+    def calibrate(self, texts: list[str], percents: list[int]) -> "OrdinalProgressModel":
+        from sklearn.isotonic import IsotonicRegression
+        predictions = self._raw_predictions(texts)
+        raw = [confidence for _, confidence in predictions]
+        hits = [1.0 if abs(step - actual) <= CONFIDENCE_TOLERANCE else 0.0 for (step, _), actual in zip(predictions, percents)]
+        isotonic = IsotonicRegression(y_min=0.0, y_max=1.0, out_of_bounds="clip").fit(raw, hits)
+        self._calibration = ([float(value) for value in isotonic.X_thresholds_], [float(value) for value in isotonic.y_thresholds_])
+        return self
+    def predict_distribution_batch(self, texts: list[str]) -> list[dict[int, float]]:
+        import numpy as np
+        features = self._vectorizer.transform([text or "" for text in texts])
+        logits = np.asarray(features @ self._weights.T) + self._bias
+        exceed = 1.0 / (1.0 + np.exp(-logits))
+        exceed = np.minimum.accumulate(exceed, axis=1)
+        upper = np.hstack([np.ones((exceed.shape[0], 1)), exceed])
+        lower = np.hstack([exceed, np.zeros((exceed.shape[0], 1))])
+        probabilities = np.clip(upper - lower, 0.0, 1.0)
+        return [{step: float(value) for step, value in zip(self.steps, row)} for row in probabilities]
+    def _raw_predictions(self, texts: list[str]) -> list[tuple[int, float]]:
+        results: list[tuple[int, float]] = []
+        for distribution in self.predict_distribution_batch(texts):
+            cumulative = 0.0
+            median = self.steps[-1]
+            for step in self.steps:
+                cumulative += distribution[step]
+                if cumulative >= 0.5:
+                    median = step
+                    break
+            confidence = sum(value for step, value in distribution.items() if abs(step - median) <= CONFIDENCE_TOLERANCE)
+            results.append((median, min(max(confidence, 0.0), 1.0)))
+        return results
+    def predict_batch(self, texts: list[str]) -> list[tuple[int, float]]:
+        predictions = self._raw_predictions(texts)
+        if self._calibration is not None:
+            import numpy as np
+            knots, values = self._calibration
+            calibrated = np.interp([confidence for _, confidence in predictions], knots, values)
+            predictions = [(step, float(value)) for (step, _), value in zip(predictions, calibrated)]
+        return [(step, round(confidence, 4)) for step, confidence in predictions]
+    def predict(self, text: str) -> tuple[int, float]:
+        return self.predict_batch([text])[0]
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_suffix(path.suffix + ".tmp")
+        with temp_path.open("wb") as handle:
+            pickle.dump(self, handle, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+def load_ordinal_progress_model(path: Path | None = None) -> OrdinalProgressModel | None:
+    model_path = Path(path or settings.PROGRESS_ORDINAL_MODEL_PATH)
+    if not model_path.exists():
+        return None
+    with model_path.open("rb") as handle:
+        model = pickle.load(handle)
+    if not isinstance(model, OrdinalProgressModel):
+        raise TypeError(f"{model_path} does not contain an ordinal progress model")
+    return model
@@ -0,0 +1,124 @@
+from __future__ import annotations
+import argparse
+import json
+import logging
+import random
+import re
+import sys
+from pathlib import Path
+from app.config.settings import settings
+from app.database import tickets
+from app.services.distillation import _clean_note
+from app.services.ordinal_classifier import CONFIDENCE_TOLERANCE, OrdinalProgressModel
+from app.services.priority_ai import iter_dataset_rows
+from app.services.progress_ai import PROGRESS_STEPS, _extract_explicit_percent, _round_step
+LOGGER = logging.getLogger(__name__)
+PERCENT_MENTION_PATTERN = re.compile(r"\b\d{1,3}\s*(%|percent\b)", re.IGNORECASE)
+def _training_text(note: str) -> tuple[str, int] | None:
+    body = _clean_note(note or "")
+    percent = _extract_explicit_percent(body)
+    if percent is None:
+        return None
+    text = " ".join(PERCENT_MENTION_PATTERN.sub(" ", body).split())
+    if len(text) < 8:
+        return None
+    return text, percent
+def mine_progress_notes(limit: int | None = None) -> list[tuple[str, int]]:
+    rows: list[tuple[str, int]] = []
+    seen: set[str] = set()
+    cursor = tickets.find({}, {"notes": 1, "progressSummary": 1}).sort("_id", -1)
+    for doc in cursor:
+        candidates = [str(doc.get("progressSummary") or "")]
+        candidates.extend(str(row.get("note") if isinstance(row, dict) else row or "") for row in doc.get("notes") or [])
+        for note in candidates:
+            mined = _training_text(note)
+            if mined is None or mined[0].lower() in seen:
+                continue
+            seen.add(mined[0].lower())
+            rows.append(mined)
+            if limit and len(rows) >= limit:
+                return rows
+    return rows
+def _dataset_rows(path: Path) -> list[tuple[str, int]]:
+    rows: list[tuple[str, int]] = []
+    for row in iter_dataset_rows(path):
+        text = str(row.get("text") or row.get("note") or row.get("updateText") or "").strip()
+        raw = row.get("percent", row.get("progress"))
+        if raw is None:
+            mined = _training_text(text)
+            if mined:
+                rows.append(mined)
+            continue
+        try:
+            rows.append((text, _round_step(float(str(raw).strip().rstrip("%")))))
+        except ValueError:
+            continue
+    return rows
+def train_ordinal_progress_model(
+    *,
+    dataset: Path | None = None,
+    limit: int | None = None,
+    holdout: float = 0.3,
+    min_samples: int = 50,
+    output: Path | None = None,
+) -> dict:
+    rows = mine_progress_notes(limit)
+    if dataset:
+        rows.extend(_dataset_rows(dataset))
+    if len(rows) < min_samples:
+        raise RuntimeError(f"Only {len(rows)} labeled progress notes found; need at least {min_samples}")
+    random.Random(42).shuffle(rows)
+    holdout_count = int(len(rows) * holdout)
+    held_out, training = rows[:holdout_count], rows[holdout_count:]
+    calibration, evaluation = held_out[: len(held_out) // 2], held_out[len(held_out) // 2 :]
+    model = OrdinalProgressModel(PROGRESS_STEPS).fit([text for text, _ in training], [percent for _, percent in training])
+    summary: dict[str, object] = {
+        "samples": len(rows),
+        "trainSamples": len(training),
+        "calibrationSamples": len(calibration),
+        "evaluationSamples": len(evaluation),
+    }
+    if calibration and evaluation:
+        uncalibrated = model.predict_batch([text for text, _ in evaluation])
+        model.calibrate([text for text, _ in calibration], [percent for _, percent in calibration])
+        predictions = model.predict_batch([text for text, _ in evaluation])
+        errors = [abs(predicted - actual) for (predicted, _), (_, actual) in zip(predictions, evaluation)]
+        within_rate = sum(1.0 for error in errors if error <= CONFIDENCE_TOLERANCE) / len(errors)
+        raw_confidence = sum(confidence for _, confidence in uncalibrated) / len(uncalibrated)
+        mean_confidence = sum(confidence for _, confidence in predictions) / len(predictions)
+        summary.update(
+            {
+                "meanAbsoluteError": round(sum(errors) / len(errors), 3),
+                "withinToleranceRate": round(within_rate, 4),
+                "rawMeanConfidence": round(raw_confidence, 4),
+                "meanConfidence": round(mean_confidence, 4),
+                "rawCalibrationGap": round(raw_confidence - within_rate, 4),
+                "calibrationGap": round(mean_confidence - within_rate, 4),
+            }
+        )
+    else:
+        LOGGER.warning("Holdout too small to calibrate; ordinal confidences are uncalibrated.")
+    model.metadata = dict(summary)
+    path = Path(output or settings.PROGRESS_ORDINAL_MODEL_PATH)
+    model.save(path)
+    summary["output"] = str(path)
+    return summary
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Train the ordinal progress model from ticket notes with explicit percentages.")
+    parser.add_argument("--dataset", type=Path, default=None, help="Optional extra .jsonl or .csv with text and percent")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--holdout", type=float, default=0.3)
+    parser.add_argument("--min-samples", type=int, default=50)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    summary = train_ordinal_progress_model(
+        dataset=args.dataset,
+        limit=args.limit,
+        holdout=args.holdout,
+        min_samples=args.min_samples,
+        output=args.output,
+    )
+    print(json.dumps(summary, indent=2))
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,92 @@
 from __future__ import annotations
-import base64
+import contextvars
+import copy
 import csv
 import json
 import logging
+import math
 import os
-import re
 import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from dataclasses import dataclass
-from io import BytesIO
+from typing import Callable
 from pathlib import Path
 from app.config.settings import settings
 from app.database import incidents
+from app.services.circuit_breaker import CircuitBreaker, get_breaker
+from app.services.cpu_governor import inference_gate
+from app.services.distilled_classifier import ENGINE_FAST, load_distilled_classifier, student_model_path
+from app.services.embedding_classifier import ENGINE_EMBEDDING, EmbeddingLabelClassifier
+from app.services.image_ingest import IncidentImage
+from app.services.metrics import (
+    AI_INPUT_IMAGE_BYTES,
+    AI_INPUT_TEXT_CHARS,
+    AI_PREDICTION_SOURCE,
+    AI_STAGE_SKIPS,
+    AI_STAGE_TIMEOUTS,
+    time_stage,
+)
+from app.services.model_registry import agreement_report, model_registry
+from app.services.nli_backend import load_zero_shot_pipeline
+from app.services.shadow_eval import ShadowOutcome, shadow_evaluator
 LOGGER = logging.getLogger(__name__)
 PRIORITY_LEVELS = ("low", "medium", "high")
+METRICS_MODEL = "priority"
+SHADOW_METRICS_MODEL = "priority_shadow"
 DEFAULT_VISION_MODEL_ID = "Qwen/Qwen2.5-VL-3B-Instruct"
 DEFAULT_TEXT_MODEL_ID = "facebook/bart-large-mnli"
+TEXT_HYPOTHESIS_TEMPLATE = "This incident is {}."
 PRIORITY_LABELS = {
     "low": "low priority civic issue with no immediate safety risk",
     "medium": "medium priority municipal issue with service disruption and timely response needed",
     "high": "high priority civic hazard with active public safety or severe blockage risk",
 }
+PRIORITY_PROTOTYPES = {
+    "low": (
+        PRIORITY_LABELS["low"],
+        "minor cosmetic damage or litter that can be handled during routine maintenance",
+        "small faded road marking or slightly overgrown park hedge",
+    ),
+    "medium": (
+        PRIORITY_LABELS["medium"],
+        "garbage not collected for days, streetlight not working, water supply interrupted",
+        "blocked drain causing inconvenience to residents that needs repair soon",
+    ),
+    "high": (
+        PRIORITY_LABELS["high"],
+        "live electric wire exposed, sewage overflowing onto the road, deep pothole causing accidents",
+        "flooded underpass, collapsed wall or fire hazard endangering people right now",
+    ),
+}
+HEURISTIC_PRIORITY_HINTS = {
+    "low": ("minor", "small", "cosmetic", "faded", "routine", "slight"),
+    "medium": ("not working", "not collected", "blocked", "leak", "overflowing bin", "disrupted", "broken"),
+    "high": (
+        "live wire",
+        "electric shock",
+        "spark",
+        "sewage overflow",
+        "collapsed",
+        "fire",
+        "accident",
+        "injured",
+        "flood",
+        "danger",
+        "emergency",
+    ),
+}
+VISION_MODE_GENERATE = "generate"
+VISION_MODE_SCORE = "score"
+VISION_SCORING_SYSTEM_PROMPT = """
+You are an AI assistant for Indian smart-city civic incident triage.
+Infer priority from both image and text.
+Priority policy:
+low = minor issue, no immediate public safety risk
+medium = municipal service disruption needing timely response
+high = active hazard, sewage overflow, severe obstruction, electrical danger, or urgent safety risk
+Answer with exactly one word: low, medium or high.
+""".strip()
 RISK_ALIASES = {
     "low": {"low", "minor", "routine"},
     "medium": {"medium", "moderate", "normal", "average"},
@@ -84,6 +151,19 @@ high = active hazard, sewage overflow, severe obstruction, electrical danger, or
 Return only JSON with this schema:
 {{"risk":"low|medium|high","hazard":"string","reason":"string","confidence":0.0}}
 """.strip()
+def _build_priority_scoring_messages(*, narrative: str, category: str | None, with_image: bool) -> list[dict]:
+    selected_category = _clean(category) or "unspecified"
+    user_content: list[dict] = [{"type": "image"}] if with_image else []
+    user_content.append(
+        {
+            "type": "text",
+            "text": f"Reported category: {selected_category}\nIncident details: {narrative}\nRisk level:",
+        }
+    )
+    return [
+        {"role": "system", "content": [{"type": "text", "text": VISION_SCORING_SYSTEM_PROMPT}]},
+        {"role": "user", "content": user_content},
+    ]
 def _resolve_hf_pipeline_device() -> tuple[int, str]:
     """Resolve the device for HuggingFace pipeline."""
     try:
@@ -117,21 +197,32 @@ def _extract_json_payload(text: str) -> dict[str, object] | None:
     except Exception:
         return None
     return payload if isinstance(payload, dict) else None
-def _decode_base64_image(image_payload: str | None):
-    payload = (image_payload or "").strip()
-    if not payload:
-        return None
-    payload = re.sub(r"^data:image/[^;]+;base64,", "", payload, flags=re.IGNORECASE)
-    try:
-        raw = base64.b64decode(payload, validate=True)
-    except Exception:
-        return None
+def _resolve_vision_model_class():
+    import transformers
+    for name in ("AutoModelForImageTextToText", "AutoModelForVision2Seq", "AutoModel"):
+        model_class = getattr(transformers, name, None)
+        if model_class is not None:
+            return model_class
+    raise ImportError("No compatible transformers auto model class for vision priority model")
+def _fit_pixel_budget(image, max_pixels: int):
+    width, height = image.size
+    if max_pixels <= 0 or width * height <= max_pixels:
+        return image
+    scale = math.sqrt(max_pixels / float(width * height))
+    target = (max(int(width * scale), 28), max(int(height * scale), 28))
     try:
         from PIL import Image
-        return Image.open(BytesIO(raw)).convert("RGB")
-    except Exception as exc:
-        LOGGER.warning("Unable to decode incident image payload: %s", exc)
-        return None
+        return image.resize(target, Image.Resampling.BICUBIC)
+    except AttributeError:
+        return image.resize(target)
+def _open_image_within_budget(source, max_pixels: int):
+    from PIL import Image
+    image = Image.open(source)
+    width, height = image.size
+    if max_pixels > 0 and width * height > max_pixels:
+        scale = math.sqrt(max_pixels / float(width * height))
+        image.draft("RGB", (max(int(width * scale), 1), max(int(height * scale), 1)))
+    return _fit_pixel_budget(image.convert("RGB"), max_pixels)
 def _resolve_hf_device() -> int:
     try:
         import torch
@@ -140,17 +231,109 @@ def _resolve_hf_device() -> int:
     except Exception:
         pass
     return -1
+def _vision_scores_from_payload(vision_payload: dict[str, object] | None) -> dict[str, float] | None:
+    if not vision_payload:
+        return None
+    risk = _normalize_risk(str(vision_payload.get("risk") or vision_payload.get("priority") or ""))
+    confidence = _normalize_confidence(vision_payload.get("confidence"))
+    if risk:
+        c = confidence if confidence is not None else 0.85
+        c = max(0.34, min(0.99, c))
+        spill = (1.0 - c) / max(len(PRIORITY_LEVELS) - 1, 1)
+        vision_scores = {priority: spill for priority in PRIORITY_LEVELS}
+        vision_scores[risk] = c
+        return vision_scores
+    if isinstance(vision_payload.get("scores"), dict):
+        parsed_scores: dict[str, float] = {}
+        for key, value in vision_payload.get("scores", {}).items():
+            mapped = _normalize_risk(str(key))
+            if mapped:
+                try:
+                    parsed_scores[mapped] = parsed_scores.get(mapped, 0.0) + float(value)
+                except Exception:
+                    continue
+        return _normalize_distribution(parsed_scores)
+    return None
+def _image_input_bytes(image_path: str | None, incident_image: IncidentImage | None) -> int:
+    if image_path:
+        try:
+            return os.path.getsize(image_path)
+        except OSError:
+            return 0
+    return incident_image.size_bytes if incident_image is not None else 0
+def iter_dataset_rows(file_path: Path):
+    suffix = file_path.suffix.lower()
+    if suffix == ".jsonl":
+        with file_path.open("r", encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    row = json.loads(line)
+                except Exception:
+                    continue
+                if isinstance(row, dict):
+                    yield row
+    elif suffix == ".csv":
+        with file_path.open("r", encoding="utf-8", newline="") as handle:
+            yield from csv.DictReader(handle)
 @dataclass(frozen=True)
 class PriorityPrediction:
     priority: str
     confidence: float
     source: str
+    missing_sources: tuple[str, ...] = ()
+_SCORER_EXECUTOR: ThreadPoolExecutor | None = None
+_SCORER_EXECUTOR_LOCK = threading.Lock()
+def _scorer_executor() -> ThreadPoolExecutor:
+    global _SCORER_EXECUTOR
+    if _SCORER_EXECUTOR is None:
+        with _SCORER_EXECUTOR_LOCK:
+            if _SCORER_EXECUTOR is None:
+                _SCORER_EXECUTOR = ThreadPoolExecutor(
+                    max_workers=max(int(settings.PRIORITY_AI_SCORER_WORKERS), 3),
+                    thread_name_prefix="priority-scorer",
+                )
+    return _SCORER_EXECUTOR
+GOVERNED_STAGES = ("vision", "text")
+_abandoned_scorers: dict[str, Future] = {}
+STAGE_BREAKERS = {
+    "vision": get_breaker("priority_vision", slo_seconds=settings.AI_BREAKER_VISION_SLO_SECONDS),
+    "text": get_breaker("priority_text", slo_seconds=settings.AI_BREAKER_TEXT_SLO_SECONDS),
+}
+def _run_timed_stage(
+    stage: str,
+    scorer: Callable[[], dict[str, float] | None],
+    breaker: CircuitBreaker | None = None,
+) -> dict[str, float] | None:
+    if stage not in GOVERNED_STAGES:
+        return _timed_scorer(stage, scorer, breaker)
+    with inference_gate.slot():
+        return _timed_scorer(stage, scorer, breaker)
+def _timed_scorer(
+    stage: str,
+    scorer: Callable[[], dict[str, float] | None],
+    breaker: CircuitBreaker | None,
+) -> dict[str, float] | None:
+    started = time.perf_counter()
+    ok = False
+    try:
+        with time_stage(METRICS_MODEL, stage):
+            result = scorer()
+        ok = True
+        return result
+    finally:
+        if breaker is not None:
+            breaker.record(time.perf_counter() - started, ok)
 class VisionPriorityModel:
     def __init__(self):
         self._processor = None
         self._model = None
+        self._pipeline = None
         self._load_attempted = False
         self._lock = threading.Lock()
+        self._prefix_lock = threading.Lock()
+        self._prefix_state = None
+        self._prefix_cache_disabled = False
+        self._label_token_ids: dict[str, list[int]] | None = None
     def _ensure_loaded(self) -> None:
         if self._load_attempted:
             return
@@ -165,20 +348,27 @@ class VisionPriorityModel:
             try:
                 import torch
                 try:
-                    from transformers import AutoModel
+                    from transformers import AutoProcessor
                     from PIL import Image
-                    self._model = AutoModel.from_pretrained(model_id, trust_remote_code=True)
+                    self._model = _resolve_vision_model_class().from_pretrained(model_id, trust_remote_code=True)
+                    self._processor = AutoProcessor.from_pretrained(model_id, trust_remote_code=True)
                     LOGGER.info("Loaded priority model: %s", model_id)
                 except ImportError as e1:
                     LOGGER.debug("AutoModel import failed: %s, trying pipeline...", e1)
                     try:
-                        from transformers import pipeline
-                        _, device_name = _resolve_hf_pipeline_device()
-                        self._pipeline = pipeline(
-                            "zero-shot-classification",
-                            model=DEFAULT_TEXT_MODEL_ID,
+                        device_id, device_name = _resolve_hf_pipeline_device()
+                        self._pipeline, backend = load_zero_shot_pipeline(
+                            DEFAULT_TEXT_MODEL_ID,
+                            device=device_id,
+                            candidate_labels=list(PRIORITY_LABELS.values()),
+                            hypothesis_template=TEXT_HYPOTHESIS_TEMPLATE,
+                        )
+                        LOGGER.info(
+                            "Loaded text classification model: %s (device=%s, backend=%s)",
+                            DEFAULT_TEXT_MODEL_ID,
+                            device_name,
+                            backend,
                         )
-                        LOGGER.info("Loaded text classification model: %s (device=%s)", DEFAULT_TEXT_MODEL_ID, device_name)
                         return
                     except Exception as e2:
                         LOGGER.debug("Pipeline fallback failed: %s", e2)
@@ -220,7 +410,7 @@ class VisionPriorityModel:
         description: str | None,
         category: str | None,
         image_path: str | None = None,
-        image_payload: str | None = None,
+        incident_image: IncidentImage | None = None,
         location: str | None = None,
         severity: str | None = None,
         scope: str | None = None,
@@ -241,14 +431,16 @@ class VisionPriorityModel:
             ]
             if part
         ).strip()
-        prompt = _build_priority_prompt(narrative=text, category=category)
+        max_pixels = max(int(settings.PRIORITY_AI_VISION_MAX_PIXELS), 0)
         image = None
         try:
             if image_path:
-                from PIL import Image
-                image = Image.open(image_path).convert("RGB")
-            elif image_payload:
-                image = _decode_base64_image(image_payload)
+                image = _open_image_within_budget(image_path, max_pixels)
+            elif incident_image is not None:
+                image = _open_image_within_budget(incident_image.stream(), max_pixels)
+            if settings.PRIORITY_AI_VISION_MODE == VISION_MODE_SCORE:
+                return self._score(narrative=text, category=category, image=image)
+            prompt = _build_priority_prompt(narrative=text, category=category)
             inputs = self._processor(text=prompt, images=image, return_tensors="pt")
             inputs = self._move_inputs(inputs)
             output = self._model.generate(**inputs, max_new_tokens=180)
@@ -256,10 +448,89 @@ class VisionPriorityModel:
             return _extract_json_payload(response)
         except Exception as exc:
             LOGGER.warning("Vision priority inference failed: %s", exc)
+            raise
+    def _resolve_label_token_ids(self) -> dict[str, list[int]]:
+        if self._label_token_ids is not None:
+            return self._label_token_ids
+        tokenizer = getattr(self._processor, "tokenizer", self._processor)
+        resolved: dict[str, list[int]] = {}
+        for priority in PRIORITY_LEVELS:
+            ids: set[int] = set()
+            for variant in (priority, priority.capitalize(), f" {priority}"):
+                encoded = tokenizer.encode(variant, add_special_tokens=False)
+                if encoded:
+                    ids.add(int(encoded[0]))
+            resolved[priority] = sorted(ids)
+        if len({tuple(ids) for ids in resolved.values()}) != len(PRIORITY_LEVELS):
+            raise ValueError("Risk label tokens are not distinguishable for this tokenizer")
+        self._label_token_ids = resolved
+        return resolved
+    def _render_chat(self, messages: list[dict], *, add_generation_prompt: bool) -> str:
+        return self._processor.apply_chat_template(messages, tokenize=False, add_generation_prompt=add_generation_prompt)
+    def _cached_prefix(self):
+        if self._prefix_cache_disabled or not settings.PRIORITY_AI_VISION_PREFIX_CACHE:
             return None
+        if self._prefix_state is not None:
+            return self._prefix_state
+        with self._prefix_lock:
+            if self._prefix_state is not None or self._prefix_cache_disabled:
+                return self._prefix_state
+            import torch
+            system_only = _build_priority_scoring_messages(narrative="", category=None, with_image=False)[:1]
+            prefix_text = self._render_chat(system_only, add_generation_prompt=False)
+            prefix_inputs = self._move_inputs(self._processor(text=prefix_text, return_tensors="pt"))
+            with torch.inference_mode():
+                output = self._model(**prefix_inputs, use_cache=True)
+            self._prefix_state = (prefix_inputs["input_ids"], output.past_key_values)
+            return self._prefix_state
+    def _next_token_logits(self, inputs: dict):
+        import torch
+        try:
+            prefix = self._cached_prefix()
+        except Exception as exc:
+            prefix = None
+            self._prefix_cache_disabled = True
+            LOGGER.info("Vision prompt prefix cache disabled: %s", exc)
+        with torch.inference_mode():
+            if prefix is not None and "pixel_values" not in inputs:
+                prefix_ids, prefix_cache = prefix
+                input_ids = inputs["input_ids"]
+                length = prefix_ids.shape[1]
+                if input_ids.shape[1] > length and torch.equal(input_ids[:, :length], prefix_ids.to(input_ids.device)):
+                    try:
+                        suffix_inputs = dict(inputs)
+                        suffix_inputs["input_ids"] = input_ids[:, length:]
+                        suffix_inputs["past_key_values"] = copy.deepcopy(prefix_cache)
+                        suffix_inputs["cache_position"] = torch.arange(length, input_ids.shape[1], device=input_ids.device)
+                        return self._model(**suffix_inputs, use_cache=True).logits[0, -1]
+                    except Exception as exc:
+                        self._prefix_cache_disabled = True
+                        LOGGER.info("Vision prompt prefix cache unsupported by model, running full prompt: %s", exc)
+            return self._model(**inputs).logits[0, -1]
+    def _score(self, *, narrative: str, category: str | None, image) -> dict[str, object] | None:
+        import torch
+        messages = _build_priority_scoring_messages(narrative=narrative, category=category, with_image=image is not None)
+        prompt = self._render_chat(messages, add_generation_prompt=True)
+        inputs = self._processor(text=prompt, images=image, return_tensors="pt")
+        inputs = self._move_inputs(inputs)
+        logits = self._next_token_logits(inputs).float()
+        label_logits = torch.stack(
+            [torch.logsumexp(logits[ids], dim=0) for ids in self._resolve_label_token_ids().values()]
+        )
+        temperature = max(float(settings.PRIORITY_AI_VISION_TEMPERATURE), 1e-3)
+        probabilities = (label_logits / temperature).softmax(dim=0).tolist()
+        scores = {priority: float(value) for priority, value in zip(PRIORITY_LEVELS, probabilities)}
+        return {"scores": scores, "confidence": max(scores.values())}
+def _top_margin(scores: dict[str, float]) -> float:
+    ranked = sorted(scores.values(), reverse=True)
+    return ranked[0] - (ranked[1] if len(ranked) > 1 else 0.0)
 class TextPriorityModel:
-    def __init__(self):
+    def __init__(self, engine: str | None = None, *, metrics_model: str = METRICS_MODEL):
+        self._engine = (engine or settings.PRIORITY_AI_TEXT_ENGINE or "").strip().lower()
+        self._metrics_model = metrics_model
         self._pipeline = None
+        self._embedder = None
+        self._student = None
         self._load_attempted = False
         self._lock = threading.Lock()
         self._label_to_priority = {label.lower(): priority for priority, label in PRIORITY_LABELS.items()}
@@ -273,28 +544,66 @@ class TextPriorityModel:
             if not settings.PRIORITY_AI_ENABLED:
                 return
             _set_hf_env()
+            if self._engine == ENGINE_FAST:
+                try:
+                    self._student = load_distilled_classifier(student_model_path(METRICS_MODEL))
+                    if self._student is None:
+                        LOGGER.warning("Priority distilled student not found, using zero-shot model only.")
+                    else:
+                        LOGGER.info("Loaded priority text fast engine: %s", student_model_path(METRICS_MODEL))
+                except Exception as exc:
+                    self._student = None
+                    LOGGER.warning("Priority distilled student unavailable, using zero-shot model: %s", exc)
+            if self._engine == ENGINE_EMBEDDING:
+                try:
+                    self._embedder = EmbeddingLabelClassifier(PRIORITY_PROTOTYPES)
+                    LOGGER.info("Loaded priority text embedding engine: %s", settings.AI_EMBEDDING_MODEL)
+                    return
+                except Exception as exc:
+                    self._embedder = None
+                    LOGGER.warning("Priority embedding engine unavailable, using zero-shot model: %s", exc)
             model_id = (settings.PRIORITY_AI_TEXT_MODEL or DEFAULT_TEXT_MODEL_ID).strip() or DEFAULT_TEXT_MODEL_ID
             try:
-                from transformers import pipeline
-                self._pipeline = pipeline("zero-shot-classification", model=model_id, device=_resolve_hf_device())
-                LOGGER.info("Loaded priority text model: %s", model_id)
+                self._pipeline, backend = load_zero_shot_pipeline(
+                    model_id,
+                    device=_resolve_hf_device(),
+                    candidate_labels=list(PRIORITY_LABELS.values()),
+                    hypothesis_template=TEXT_HYPOTHESIS_TEMPLATE,
+                )
+                LOGGER.info("Loaded priority text model: %s (backend=%s)", model_id, backend)
             except Exception as exc:
                 self._pipeline = None
                 LOGGER.warning("Priority text model unavailable: %s", exc)
     def predict_scores(self, text: str) -> dict[str, float] | None:
         self._ensure_loaded()
+        if self._student:
+            try:
+                with time_stage(self._metrics_model, "text_fast"):
+                    scores = _normalize_distribution(self._student.predict_scores(text or "municipal incident"))
+                if scores and (_top_margin(scores) >= float(settings.PRIORITY_AI_FAST_MIN_MARGIN) or not self._pipeline):
+                    AI_PREDICTION_SOURCE.inc(model=f"{self._metrics_model}_text", source="fast")
+                    return scores
+                AI_PREDICTION_SOURCE.inc(model=f"{self._metrics_model}_text", source="fast_escalated")
+            except Exception as exc:
+                LOGGER.warning("Text priority fast engine failed, escalating to zero-shot model: %s", exc)
+        if self._embedder:
+            try:
+                return _normalize_distribution(self._embedder.predict_scores(text or "municipal incident"))
+            except Exception as exc:
+                LOGGER.warning("Text priority embedding inference failed: %s", exc)
+                raise
         if not self._pipeline:
             return None
         try:
             result = self._pipeline(
                 sequences=text or "municipal incident",
                 candidate_labels=list(PRIORITY_LABELS.values()),
-                hypothesis_template="This incident is {}.",
+                hypothesis_template=TEXT_HYPOTHESIS_TEMPLATE,
                 multi_label=False,
             )
         except Exception as exc:
             LOGGER.warning("Text priority inference failed: %s", exc)
-            return None
+            raise
         labels = result.get("labels") or []
         scores = result.get("scores") or []
         raw: dict[str, float] = {}
@@ -309,6 +618,9 @@ class DatasetPriorityModel:
         self._classifier = None
         self._load_attempted = False
         self._lock = threading.Lock()
+    @property
+    def is_loaded(self) -> bool:
+        return self._vectorizer is not None and self._classifier is not None
     def _build_text(self, row: dict[str, object]) -> str:
         return " ".join(
             part
@@ -351,35 +663,15 @@ class DatasetPriorityModel:
         texts: list[str] = []
         labels: list[str] = []
         try:
-            if file_path.suffix.lower() == ".jsonl":
-                with file_path.open("r", encoding="utf-8") as handle:
-                    for line in handle:
-                        try:
-                            row = json.loads(line)
-                        except Exception:
-                            continue
-                        if not isinstance(row, dict):
-                            continue
-                        label = _clean(str(row.get("priority") or row.get("label") or ""))
-                        if label not in PRIORITY_LEVELS:
-                            continue
-                        text = self._build_text(row) or str(row.get("text") or "").strip()
-                        if not text:
-                            continue
-                        texts.append(text)
-                        labels.append(label)
-            elif file_path.suffix.lower() == ".csv":
-                with file_path.open("r", encoding="utf-8", newline="") as handle:
-                    reader = csv.DictReader(handle)
-                    for row in reader:
-                        label = _clean(str(row.get("priority") or row.get("label") or ""))
-                        if label not in PRIORITY_LEVELS:
-                            continue
-                        text = self._build_text(row) or str(row.get("text") or "").strip()
-                        if not text:
-                            continue
-                        texts.append(text)
-                        labels.append(label)
+            for row in iter_dataset_rows(file_path):
+                label = _clean(str(row.get("priority") or row.get("label") or ""))
+                if label not in PRIORITY_LEVELS:
+                    continue
+                text = self._build_text(row) or str(row.get("text") or "").strip()
+                if not text:
+                    continue
+                texts.append(text)
+                labels.append(label)
         except Exception as exc:
             LOGGER.warning("Failed to load external priority dataset: %s", exc)
         return texts, labels
@@ -435,35 +727,46 @@ class DatasetPriorityModel:
         except Exception as exc:
             LOGGER.warning("Dataset priority inference failed: %s", exc)
             return None
+class HeuristicPriorityModel:
+    def predict_scores(self, text: str, severity: str | None = None) -> dict[str, float]:
+        blob = _clean(text)
+        raw = {priority: 1.0 for priority in PRIORITY_LEVELS}
+        declared = _normalize_risk(severity)
+        if declared:
+            raw[declared] += 2.0
+        for priority, hints in HEURISTIC_PRIORITY_HINTS.items():
+            hits = sum(1 for hint in hints if hint in blob)
+            raw[priority] += float(min(hits, 3))
+        return _normalize_distribution(raw) or {priority: 1.0 / len(PRIORITY_LEVELS) for priority in PRIORITY_LEVELS}
+def build_priority_text(
+    *,
+    title: str | None,
+    description: str | None,
+    category: str | None,
+    severity: str | None = None,
+    scope: str | None = None,
+    source: str | None = None,
+    location: str | None = None,
+) -> str:
+    return " ".join(
+        part
+        for part in [
+            (title or "").strip(),
+            (description or "").strip(),
+            f"Category {category}" if category else "",
+            f"Severity {severity}" if severity else "",
+            f"Scope {scope}" if scope else "",
+            f"Source {source}" if source else "",
+            f"Location {location}" if location else "",
+        ]
+        if part
+    ).strip()
 class PriorityClassifier:
     def __init__(self):
         self._vision_model = VisionPriorityModel()
         self._text_model = TextPriorityModel()
         self._dataset_model = DatasetPriorityModel()
-    def _build_text(
-        self,
-        *,
-        title: str | None,
-        description: str | None,
-        category: str | None,
-        severity: str | None,
-        scope: str | None,
-        source: str | None,
-        location: str | None,
-    ) -> str:
-        return " ".join(
-            part
-            for part in [
-                (title or "").strip(),
-                (description or "").strip(),
-                f"Category {category}" if category else "",
-                f"Severity {severity}" if severity else "",
-                f"Scope {scope}" if scope else "",
-                f"Source {source}" if source else "",
-                f"Location {location}" if location else "",
-            ]
-            if part
-        ).strip()
+        self._heuristic_model = HeuristicPriorityModel()
     def _combine_scores(
         self,
         *,
@@ -491,6 +794,49 @@ class PriorityClassifier:
             return {priority: 1.0 / len(PRIORITY_LEVELS) for priority in PRIORITY_LEVELS}, "default"
         combined = {priority: weighted[priority] / weight_sum for priority in PRIORITY_LEVELS}
         return combined, "+".join(used_sources)
+    def _run_scorers(
+        self,
+        jobs: dict[str, tuple[float, Callable[[], dict[str, float] | None]]],
+    ) -> tuple[dict[str, dict[str, float] | None], tuple[str, ...], tuple[str, ...]]:
+        executor = _scorer_executor()
+        started = time.monotonic()
+        futures = {}
+        bypassed: list[str] = []
+        busy: list[str] = []
+        for name, (_, scorer) in jobs.items():
+            straggler = _abandoned_scorers.get(name)
+            if straggler is not None:
+                if not straggler.done():
+                    busy.append(name)
+                    AI_STAGE_SKIPS.inc(model=METRICS_MODEL, stage=name)
+                    continue
+                _abandoned_scorers.pop(name, None)
+            breaker = STAGE_BREAKERS.get(name)
+            if breaker is not None and not breaker.allow():
+                bypassed.append(name)
+                continue
+            futures[name] = executor.submit(contextvars.copy_context().run, _run_timed_stage, name, scorer, breaker)
+        results: dict[str, dict[str, float] | None] = {}
+        missing: list[str] = bypassed + busy
+        for name, future in futures.items():
+            timeout = float(jobs[name][0])
+            remaining = max(timeout - (time.monotonic() - started), 0.0) if timeout > 0 else None
+            try:
+                results[name] = future.result(timeout=remaining)
+            except FutureTimeoutError:
+                if future.cancel():
+                    breaker = STAGE_BREAKERS.get(name)
+                    if breaker is not None:
+                        breaker.release()
+                else:
+                    _abandoned_scorers[name] = future
+                missing.append(name)
+                AI_STAGE_TIMEOUTS.inc(model=METRICS_MODEL, stage=name)
+                LOGGER.warning("Priority %s scorer missed its %.1fs deadline; combining without it.", name, timeout)
+            except Exception as exc:
+                missing.append(name)
+                LOGGER.warning("Priority %s scorer failed; combining without it: %s", name, exc)
+        return results, tuple(missing), tuple(bypassed + busy)
     def predict(
         self,
         *,
@@ -502,9 +848,36 @@ class PriorityClassifier:
         source: str | None = None,
         location: str | None = None,
         image_path: str | None = None,
-        image_payload: str | None = None,
+        incident_image: IncidentImage | None = None,
     ) -> PriorityPrediction:
-        text = self._build_text(
+        with time_stage(METRICS_MODEL, "total"):
+            prediction = self._predict(
+                title=title,
+                description=description,
+                category=category,
+                severity=severity,
+                scope=scope,
+                source=source,
+                location=location,
+                image_path=image_path,
+                incident_image=incident_image,
+            )
+        AI_PREDICTION_SOURCE.inc(model=METRICS_MODEL, source=prediction.source)
+        return prediction
+    def _predict(
+        self,
+        *,
+        title: str | None,
+        description: str | None,
+        category: str | None,
+        severity: str | None = None,
+        scope: str | None = None,
+        source: str | None = None,
+        location: str | None = None,
+        image_path: str | None = None,
+        incident_image: IncidentImage | None = None,
+    ) -> PriorityPrediction:
+        text = build_priority_text(
             title=title,
             description=description,
             category=category,
@@ -513,39 +886,33 @@ class PriorityClassifier:
             source=source,
             location=location,
         )
-        vision_payload = self._vision_model.analyze(
-            title=title,
-            description=description,
-            category=category,
-            image_path=image_path,
-            image_payload=image_payload,
-            location=location,
-            severity=severity,
-            scope=scope,
-            source=source,
+        AI_INPUT_TEXT_CHARS.observe(len(text), model=METRICS_MODEL)
+        image_bytes = _image_input_bytes(image_path, incident_image)
+        if image_bytes:
+            AI_INPUT_IMAGE_BYTES.observe(image_bytes, model=METRICS_MODEL)
+        def _score_vision() -> dict[str, float] | None:
+            payload = self._vision_model.analyze(
+                title=title,
+                description=description,
+                category=category,
+                image_path=image_path,
+                incident_image=incident_image,
+                location=location,
+                severity=severity,
+                scope=scope,
+                source=source,
+            )
+            return _vision_scores_from_payload(payload)
+        scores, missing_sources, bypassed = self._run_scorers(
+            {
+                "vision": (settings.PRIORITY_AI_VISION_TIMEOUT_SECONDS, _score_vision),
+                "text": (settings.PRIORITY_AI_TEXT_TIMEOUT_SECONDS, lambda: self._text_model.predict_scores(text)),
+                "dataset": (settings.PRIORITY_AI_DATASET_TIMEOUT_SECONDS, lambda: self._dataset_model.predict_scores(text)),
+            }
         )
-        vision_scores = None
-        if vision_payload:
-            risk = _normalize_risk(str(vision_payload.get("risk") or vision_payload.get("priority") or ""))
-            confidence = _normalize_confidence(vision_payload.get("confidence"))
-            if risk:
-                c = confidence if confidence is not None else 0.85
-                c = max(0.34, min(0.99, c))
-                spill = (1.0 - c) / max(len(PRIORITY_LEVELS) - 1, 1)
-                vision_scores = {priority: spill for priority in PRIORITY_LEVELS}
-                vision_scores[risk] = c
-            elif isinstance(vision_payload.get("scores"), dict):
-                parsed_scores: dict[str, float] = {}
-                for key, value in vision_payload.get("scores", {}).items():
-                    mapped = _normalize_risk(str(key))
-                    if mapped:
-                        try:
-                            parsed_scores[mapped] = parsed_scores.get(mapped, 0.0) + float(value)
-                        except Exception:
-                            continue
-                vision_scores = _normalize_distribution(parsed_scores)
-        text_scores = self._text_model.predict_scores(text)
-        dataset_scores = self._dataset_model.predict_scores(text)
+        vision_scores = scores.get("vision")
+        text_scores = scores.get("text")
+        dataset_scores = scores.get("dataset")
         combined, source_name = self._combine_scores(
             vision_scores=vision_scores,
             text_scores=text_scores,
@@ -553,10 +920,102 @@ class PriorityClassifier:
         )
         chosen = max(PRIORITY_LEVELS, key=lambda priority: combined.get(priority, 0.0))
         confidence = round(max(0.0, min(1.0, combined.get(chosen, 0.0))), 4)
+        if source_name == "default" and bypassed:
+            heuristic = self._heuristic_model.predict_scores(text, severity)
+            chosen = max(PRIORITY_LEVELS, key=lambda priority: heuristic.get(priority, 0.0))
+            return PriorityPrediction(
+                priority=chosen,
+                confidence=round(max(0.0, min(1.0, heuristic.get(chosen, 0.0))), 4),
+                source="heuristic_circuit_open",
+                missing_sources=missing_sources,
+            )
         if source_name == "default":
-            return PriorityPrediction(priority="medium", confidence=0.34, source="default")
+            return PriorityPrediction(priority="medium", confidence=0.34, source="default", missing_sources=missing_sources)
+        return PriorityPrediction(
+            priority=chosen,
+            confidence=confidence,
+            source=source_name,
+            missing_sources=missing_sources,
+        )
+    def predict_provisional(
+        self,
+        *,
+        title: str | None,
+        description: str | None,
+        category: str | None,
+        severity: str | None = None,
+        scope: str | None = None,
+        source: str | None = None,
+        location: str | None = None,
+    ) -> PriorityPrediction:
+        text = build_priority_text(
+            title=title,
+            description=description,
+            category=category,
+            severity=severity,
+            scope=scope,
+            source=source,
+            location=location,
+        )
+        scores = self._dataset_model.predict_scores(text) if self._dataset_model.is_loaded else None
+        source_name = "dataset"
+        if not scores:
+            scores = self._heuristic_model.predict_scores(text, severity)
+            source_name = "heuristic"
+        chosen = max(PRIORITY_LEVELS, key=lambda priority: scores.get(priority, 0.0))
+        confidence = round(max(0.0, min(1.0, scores.get(chosen, 0.0))), 4)
+        AI_PREDICTION_SOURCE.inc(model="priority_provisional", source=source_name)
         return PriorityPrediction(priority=chosen, confidence=confidence, source=source_name)
-_classifier = PriorityClassifier()
+PRIORITY_MODEL_NAME = "priority"
+PARITY_PROBES = (
+    {"title": "Live wire on road", "description": "Electric wire sparking near bus stop after rain", "category": "electricity"},
+    {"title": "Garbage pile", "description": "Garbage not collected from the lane for three days", "category": "garbage"},
+    {"title": "Faded paint", "description": "Zebra crossing paint slightly faded near the park", "category": "other"},
+    {"title": "Sewage overflow", "description": "Sewage overflowing onto the main road near the school", "category": "drainage"},
+    {"title": "Streetlight out", "description": "Streetlight not working on sector 9 lane at night", "category": "streetlight"},
+)
+def _warmup_classifier(classifier: PriorityClassifier) -> PriorityPrediction:
+    for model in (classifier._dataset_model, classifier._text_model, classifier._vision_model):
+        model._ensure_loaded()
+    return classifier.predict(
+        title="Startup warmup incident",
+        description="System startup warmup for incident priority model.",
+        category="system",
+        severity="low",
+        source="startup",
+        location="N/A",
+    )
+def _classifier_parity(candidate: PriorityClassifier, incumbent: PriorityClassifier) -> dict:
+    pairs = []
+    degraded = True
+    for probe in PARITY_PROBES:
+        expected = incumbent.predict(**probe)
+        actual = candidate.predict(**probe)
+        degraded = degraded and expected.source == "default"
+        pairs.append((actual.priority, expected.priority))
+    return agreement_report(pairs, degraded=degraded)
+model_registry.register(
+    PRIORITY_MODEL_NAME,
+    PriorityClassifier,
+    warmup=_warmup_classifier,
+    parity=_classifier_parity,
+)
+def _active_classifier() -> PriorityClassifier:
+    return model_registry.get(PRIORITY_MODEL_NAME)
+def _shadow_priority(candidate: TextPriorityModel, inputs: dict) -> ShadowOutcome:
+    text = build_priority_text(**inputs)
+    with time_stage(SHADOW_METRICS_MODEL, "text"), inference_gate.slot():
+        scores = candidate.predict_scores(text)
+    if not scores:
+        raise RuntimeError("candidate text engine returned no scores")
+    chosen = max(PRIORITY_LEVELS, key=lambda priority: scores.get(priority, 0.0))
+    return ShadowOutcome(label=chosen, confidence=round(scores[chosen], 4), source="text")
+shadow_evaluator.register(
+    PRIORITY_MODEL_NAME,
+    engine_setting="AI_SHADOW_PRIORITY_ENGINE",
+    factory=lambda engine: TextPriorityModel(engine=engine, metrics_model=SHADOW_METRICS_MODEL),
+    runner=_shadow_priority,
+)
 def predict_incident_priority(
     *,
     title: str | None,
@@ -567,9 +1026,39 @@ def predict_incident_priority(
     source: str | None = None,
     location: str | None = None,
     image_path: str | None = None,
-    image_payload: str | None = None,
+    incident_image: IncidentImage | None = None,
+) -> PriorityPrediction:
+    inputs = {
+        "title": title,
+        "description": description,
+        "category": category,
+        "severity": severity,
+        "scope": scope,
+        "source": source,
+        "location": location,
+    }
+    started = time.perf_counter()
+    prediction = _active_classifier().predict(**inputs, image_path=image_path, incident_image=incident_image)
+    shadow_evaluator.maybe_submit(
+        PRIORITY_MODEL_NAME,
+        inputs=inputs,
+        input_text=" ".join(str(value) for value in (title, description, category) if value),
+        incumbent=ShadowOutcome(label=prediction.priority, confidence=prediction.confidence, source=prediction.source),
+        incumbent_engine=settings.PRIORITY_AI_TEXT_ENGINE,
+        incumbent_ms=(time.perf_counter() - started) * 1000,
+    )
+    return prediction
+def predict_provisional_incident_priority(
+    *,
+    title: str | None,
+    description: str | None,
+    category: str | None,
+    severity: str | None = None,
+    scope: str | None = None,
+    source: str | None = None,
+    location: str | None = None,
 ) -> PriorityPrediction:
-    return _classifier.predict(
+    return _active_classifier().predict_provisional(
         title=title,
         description=description,
         category=category,
@@ -577,18 +1066,9 @@ def predict_incident_priority(
         scope=scope,
         source=source,
         location=location,
-        image_path=image_path,
-        image_payload=image_payload,
     )
 def warmup_priority_model() -> PriorityPrediction:
-    prediction = _classifier.predict(
-        title="Startup warmup incident",
-        description="System startup warmup for incident priority model.",
-        category="system",
-        severity="low",
-        source="startup",
-        location="N/A",
-    )
+    prediction = _warmup_classifier(_active_classifier())
     LOGGER.info(
         "Incident priority model warmup completed. source=%s priority=%s confidence=%s",
         prediction.source,
@@ -0,0 +1,200 @@
+from __future__ import annotations
+import argparse
+import json
+import logging
+import os
+import time
+from collections import Counter
+from datetime import datetime
+from pymongo import UpdateOne
+from app.config.settings import settings
+from app.database import incidents, job_checkpoints, tickets
+from app.services.cpu_governor import background_inference
+from app.services.metrics import AI_BATCH_SIZE
+from app.services.priority_ai import predict_incident_priority
+LOGGER = logging.getLogger(__name__)
+JOB_NAME = "priority_rescore"
+RESCORE_STATUSES = ("open", "pending", "in_progress")
+RESCORE_PROJECTION = {
+    "title": 1,
+    "description": 1,
+    "category": 1,
+    "severity": 1,
+    "scope": 1,
+    "source": 1,
+    "location": 1,
+    "priority": 1,
+    "aiPriority": 1,
+    "imageUrl": 1,
+}
+def _now_iso() -> str:
+    return datetime.utcnow().isoformat()
+def _resolve_image_path(doc: dict) -> str | None:
+    image_url = str(doc.get("imageUrl") or "").strip()
+    if not image_url:
+        return None
+    path = os.path.join(settings.IMAGE_DIR, os.path.basename(image_url))
+    return path if os.path.exists(path) else None
+def _is_ai_owned(doc: dict) -> bool:
+    ai_priority = doc.get("aiPriority")
+    if not isinstance(ai_priority, dict):
+        return False
+    return str(ai_priority.get("priority") or "") == str(doc.get("priority") or "")
+def _load_checkpoint(job_name: str) -> dict | None:
+    checkpoint = job_checkpoints.find_one({"_id": job_name})
+    if not checkpoint or checkpoint.get("completed"):
+        return None
+    return checkpoint
+def _save_checkpoint(job_name: str, last_id, summary: dict, completed: bool) -> None:
+    job_checkpoints.update_one(
+        {"_id": job_name},
+        {"$set": {"lastId": last_id, "summary": summary, "completed": completed, "updatedAt": _now_iso()}},
+        upsert=True,
+    )
+def _empty_summary() -> dict:
+    return {
+        "scanned": 0,
+        "proposed": 0,
+        "changed": 0,
+        "ticketsChanged": 0,
+        "unchanged": 0,
+        "skippedManual": 0,
+        "failed": 0,
+        "proposedTransitions": {},
+    }
+@background_inference()
+def run_priority_rescore(
+    *,
+    batch_size: int | None = None,
+    max_per_second: float | None = None,
+    resume: bool = True,
+    dry_run: bool = False,
+    limit: int | None = None,
+    job_name: str = JOB_NAME,
+) -> dict:
+    batch_size = max(int(batch_size or settings.PRIORITY_RESCORE_BATCH_SIZE), 1)
+    rate = float(max_per_second if max_per_second is not None else settings.PRIORITY_RESCORE_MAX_PER_SECOND)
+    min_interval = 1.0 / rate if rate > 0 else 0.0
+    checkpoint = _load_checkpoint(job_name) if resume else None
+    last_id = checkpoint.get("lastId") if checkpoint else None
+    summary = {**_empty_summary(), **(checkpoint.get("summary") or {})} if checkpoint else _empty_summary()
+    transitions = Counter(summary.pop("transitions", None) or summary.get("proposedTransitions") or {})
+    if last_id is not None:
+        LOGGER.info("Resuming priority rescore after _id=%s", last_id)
+    started = time.monotonic()
+    processed = 0
+    while True:
+        query: dict = {"status": {"$in": list(RESCORE_STATUSES)}, "aiPriority": {"$exists": True}}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        page_size = batch_size if limit is None else min(batch_size, max(limit - processed, 0))
+        if page_size <= 0:
+            break
+        batch = list(incidents.find(query, RESCORE_PROJECTION).sort("_id", 1).limit(page_size))
+        if not batch:
+            break
+        AI_BATCH_SIZE.observe(len(batch), model="priority_rescore")
+        incident_ops: list[UpdateOne] = []
+        ticket_ops: list[UpdateOne] = []
+        for doc in batch:
+            tick = time.monotonic()
+            summary["scanned"] += 1
+            processed += 1
+            if not _is_ai_owned(doc):
+                summary["skippedManual"] += 1
+                continue
+            try:
+                prediction = predict_incident_priority(
+                    title=doc.get("title"),
+                    description=doc.get("description"),
+                    category=doc.get("category"),
+                    severity=doc.get("severity"),
+                    scope=doc.get("scope"),
+                    source=doc.get("source"),
+                    location=doc.get("location"),
+                    image_path=_resolve_image_path(doc),
+                )
+            except Exception as exc:
+                summary["failed"] += 1
+                LOGGER.warning("Priority rescore failed for incident %s: %s", doc.get("_id"), exc)
+                continue
+            finally:
+                elapsed = time.monotonic() - tick
+                if min_interval > elapsed:
+                    time.sleep(min_interval - elapsed)
+            previous = str(doc.get("priority") or "")
+            if prediction.priority == previous:
+                summary["unchanged"] += 1
+                continue
+            summary["proposed"] += 1
+            transitions[f"{previous or 'none'}->{prediction.priority}"] += 1
+            now = _now_iso()
+            incident_ops.append(
+                UpdateOne(
+                    {"_id": doc["_id"], "priority": previous},
+                    {
+                        "$set": {
+                            "priority": prediction.priority,
+                            "aiPriority": {
+                                "priority": prediction.priority,
+                                "confidence": prediction.confidence,
+                                "source": prediction.source,
+                                "missingSources": list(prediction.missing_sources),
+                                "provisional": False,
+                                "rescoredFrom": previous,
+                                "evaluatedAt": now,
+                            },
+                            "updatedAt": now,
+                        }
+                    },
+                )
+            )
+            ticket_ops.append(
+                UpdateOne(
+                    {"incidentId": str(doc["_id"]), "priority": previous},
+                    {"$set": {"priority": prediction.priority, "updatedAt": now}},
+                )
+            )
+        if not dry_run:
+            if incident_ops:
+                summary["changed"] += incidents.bulk_write(incident_ops, ordered=False).modified_count
+            if ticket_ops:
+                summary["ticketsChanged"] += tickets.bulk_write(ticket_ops, ordered=False).modified_count
+        last_id = batch[-1]["_id"]
+        summary["proposedTransitions"] = dict(transitions)
+        if not dry_run:
+            _save_checkpoint(job_name, last_id, summary, completed=False)
+        LOGGER.info(
+            "Priority rescore progress: scanned=%s proposed=%s changed=%s lastId=%s",
+            summary["scanned"],
+            summary["proposed"],
+            summary["changed"],
+            last_id,
+        )
+    completed = limit is None or processed < limit
+    summary["proposedTransitions"] = dict(transitions)
+    summary["elapsedSeconds"] = round(time.monotonic() - started, 2)
+    summary["completed"] = completed
+    summary["dryRun"] = dry_run
+    if not dry_run:
+        _save_checkpoint(job_name, last_id, summary, completed=completed)
+    return summary
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Re-score open incident priorities with the current priority engines.")
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--max-per-second", type=float, default=None)
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--restart", action="store_true", help="Ignore any saved checkpoint and start from the first incident.")
+    parser.add_argument("--dry-run", action="store_true", help="Score and summarize without writing results or checkpoints.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    summary = run_priority_rescore(
+        batch_size=args.batch_size,
+        max_per_second=args.max_per_second,
+        resume=not args.restart,
+        dry_run=args.dry_run,
+        limit=args.limit,
+    )
+    print(json.dumps(summary, indent=2, default=str))
+if __name__ == "__main__":
+    main()
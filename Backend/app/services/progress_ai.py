@@ -3,16 +3,42 @@ import logging
 import os
 import re
 import threading
+import time
 from dataclasses import dataclass
 from app.config.settings import settings
+from app.services.circuit_breaker import get_breaker
+from app.services.cpu_governor import inference_gate
+from app.services.distilled_classifier import ENGINE_FAST, load_distilled_classifier, student_model_path
+from app.services.embedding_classifier import ENGINE_EMBEDDING, EmbeddingLabelClassifier
+from app.services.metrics import AI_BATCH_SIZE, AI_INPUT_TEXT_CHARS, AI_PREDICTION_SOURCE, time_stage
+from app.services.model_registry import agreement_report, model_registry
+from app.services.nli_backend import load_zero_shot_pipeline
+from app.services.shadow_eval import ShadowOutcome, shadow_evaluator
 LOGGER = logging.getLogger(__name__)
 PROGRESS_STEPS = tuple(range(5, 101, 5))
+ENGINE_ORDINAL = "ordinal"
+METRICS_MODEL = "progress"
+SHADOW_METRICS_MODEL = "progress_shadow"
 MIN_ZERO_SHOT_CONFIDENCE = 0.2
+FAST_ENGINE_WINDOW = 5
+EMPTY_UPDATE_TEXT = "field work just started"
+MODEL_BREAKER = get_breaker("progress_model", slo_seconds=settings.AI_BREAKER_PROGRESS_SLO_SECONDS)
+PROGRESS_HYPOTHESIS_TEMPLATE = "This update indicates {}."
 PROGRESS_LABELS = {
     step: f"{step}% completion of total field work for this ticket"
     for step in PROGRESS_STEPS
 }
 LABEL_TO_PROGRESS = {value.lower(): key for key, value in PROGRESS_LABELS.items()}
+PROGRESS_PROTOTYPES = {
+    5: ("ticket received, field work not started yet", "crew not yet dispatched to the site"),
+    15: ("site visit and initial inspection done, work started", "team reached the location and assessed the damage"),
+    30: ("materials arranged and procurement complete", "equipment and supplies delivered to the site"),
+    40: ("work in progress, crew currently working on site", "repair ongoing, excavation underway"),
+    50: ("halfway done, about half of the repair completed", "half of the work finished"),
+    85: ("almost done, final stage of repair", "near completion, only finishing touches remaining"),
+    95: ("work done and completed, awaiting verification", "repair finished, cleaning up the site"),
+    100: ("verified completed, all tasks closed and handover complete", "final inspection passed and ticket closed"),
+}
 def _round_step(value: float) -> int:
     value = max(5.0, min(100.0, value))
     rounded = int(round(value / 5.0) * 5)
@@ -75,8 +101,14 @@ class ProgressPrediction:
     confidence: float
     source: str
 class _ProgressModel:
-    def __init__(self):
+    def __init__(self, engine: str | None = None, *, metrics_model: str = METRICS_MODEL, breaker=MODEL_BREAKER):
+        self._engine = (engine or settings.PROGRESS_AI_ENGINE or "").strip().lower()
+        self._metrics_model = metrics_model
+        self._breaker = breaker
         self._pipeline = None
+        self._embedder = None
+        self._student = None
+        self._ordinal = None
         self._load_attempted = False
         self._load_lock = threading.Lock()
     def _ensure_loaded(self):
@@ -98,27 +130,58 @@ class _ProgressModel:
                     os.environ["HF_HUB_OFFLINE"] = "1"
                 else:
                     os.environ.pop("HF_HUB_OFFLINE", None)
-                from transformers import pipeline
+                if self._engine == ENGINE_FAST:
+                    try:
+                        self._student = load_distilled_classifier(student_model_path(METRICS_MODEL))
+                        if self._student is None:
+                            LOGGER.warning("Ticket progress distilled student not found, using zero-shot model only.")
+                        else:
+                            LOGGER.info("Ticket progress fast engine loaded: %s", student_model_path(METRICS_MODEL))
+                    except Exception as exc:
+                        self._student = None
+                        LOGGER.warning("Ticket progress distilled student unavailable, using zero-shot model: %s", exc)
+                if self._engine == ENGINE_ORDINAL:
+                    try:
+                        from app.services.ordinal_classifier import load_ordinal_progress_model
+                        self._ordinal = load_ordinal_progress_model()
+                        if self._ordinal is not None:
+                            LOGGER.info("Ticket progress ordinal engine loaded: %s", settings.PROGRESS_ORDINAL_MODEL_PATH)
+                            return
+                        LOGGER.warning("Ticket progress ordinal model not found, using zero-shot model.")
+                    except Exception as exc:
+                        self._ordinal = None
+                        LOGGER.warning("Ticket progress ordinal engine unavailable, using zero-shot model: %s", exc)
+                if self._engine == ENGINE_EMBEDDING:
+                    try:
+                        self._embedder = EmbeddingLabelClassifier(PROGRESS_PROTOTYPES)
+                        LOGGER.info("Ticket progress embedding engine loaded: %s", settings.AI_EMBEDDING_MODEL)
+                        return
+                    except Exception as exc:
+                        self._embedder = None
+                        LOGGER.warning("Ticket progress embedding engine unavailable, using zero-shot model: %s", exc)
                 device_id, device_name = _resolve_hf_pipeline_device()
                 try:
-                    self._pipeline = pipeline(
-                        "zero-shot-classification",
-                        model=settings.PROGRESS_AI_MODEL,
+                    self._pipeline, backend = load_zero_shot_pipeline(
+                        settings.PROGRESS_AI_MODEL,
                         device=device_id,
+                        candidate_labels=list(PROGRESS_LABELS.values()),
+                        hypothesis_template=PROGRESS_HYPOTHESIS_TEMPLATE,
                     )
                     LOGGER.info(
-                        "Ticket progress AI model loaded: %s (device=%s)",
+                        "Ticket progress AI model loaded: %s (device=%s, backend=%s)",
                         settings.PROGRESS_AI_MODEL,
                         device_name,
+                        backend,
                     )
                 except Exception as device_error:
                     LOGGER.debug("Device placement failed for progress model: %s. Retrying without device...", device_error)
-                    self._pipeline = pipeline(
-                        "zero-shot-classification",
-                        model=settings.PROGRESS_AI_MODEL,
+                    self._pipeline, backend = load_zero_shot_pipeline(
+                        settings.PROGRESS_AI_MODEL,
                         device=-1,
+                        candidate_labels=list(PROGRESS_LABELS.values()),
+                        hypothesis_template=PROGRESS_HYPOTHESIS_TEMPLATE,
                     )
-                    LOGGER.info("Ticket progress AI model loaded on CPU: %s", settings.PROGRESS_AI_MODEL)
+                    LOGGER.info("Ticket progress AI model loaded on CPU: %s (backend=%s)", settings.PROGRESS_AI_MODEL, backend)
             except Exception as exc:
                 LOGGER.warning(
                     "Failed to load ticket progress AI model (%s). Falling back to heuristic scorer. Error: %s",
@@ -126,47 +189,180 @@ class _ProgressModel:
                     exc,
                 )
                 self._pipeline = None
+    def predict_distributions(self, texts: list[str]) -> list[dict[int, float] | None]:
+        self._ensure_loaded()
+        texts = [text or EMPTY_UPDATE_TEXT for text in texts]
+        if not texts:
+            return []
+        if self._ordinal:
+            return self._ordinal.predict_distribution_batch(texts)
+        if self._embedder:
+            return [scores or None for scores in self._embedder.predict_scores_batch(texts)]
+        if not self._pipeline:
+            return [None] * len(texts)
+        order = sorted(range(len(texts)), key=lambda index: len(texts[index]))
+        results = self._pipeline(
+            [texts[index] for index in order],
+            candidate_labels=list(PROGRESS_LABELS.values()),
+            hypothesis_template=PROGRESS_HYPOTHESIS_TEMPLATE,
+            multi_label=False,
+            batch_size=max(int(settings.PROGRESS_AI_BATCH_SIZE), 1),
+        )
+        if isinstance(results, dict):
+            results = [results]
+        distributions: list[dict[int, float] | None] = [None] * len(texts)
+        for index, result in zip(order, results):
+            distribution: dict[int, float] = {}
+            for label, score in zip(result.get("labels") or [], result.get("scores") or []):
+                mapped = LABEL_TO_PROGRESS.get(str(label).strip().lower())
+                if mapped:
+                    distribution[mapped] = float(score)
+            distributions[index] = distribution or None
+        return distributions
+    def predict_distribution(self, text: str) -> dict[int, float] | None:
+        return self.predict_distributions([text])[0]
+    def _model_predictions(self, texts: list[str]) -> list[tuple[int, float, str] | None]:
+        texts = [text or EMPTY_UPDATE_TEXT for text in texts]
+        if self._ordinal:
+            return [(step, confidence, "ordinal_regression") for step, confidence in self._ordinal.predict_batch(texts)]
+        results: list[tuple[int, float, str] | None] = [None] * len(texts)
+        pending = list(range(len(texts)))
+        if self._student:
+            try:
+                escalated: list[int] = []
+                for index, scores in zip(pending, self._student.predict_scores_batch(texts)):
+                    step = max(scores, key=scores.get)
+                    window_mass = sum(value for label, value in scores.items() if abs(int(label) - int(step)) <= FAST_ENGINE_WINDOW)
+                    if window_mass >= float(settings.PROGRESS_AI_FAST_MIN_WINDOW_MASS) or not (self._pipeline or self._embedder):
+                        results[index] = (int(step), float(scores[step]), "distilled_student")
+                    else:
+                        AI_PREDICTION_SOURCE.inc(model=self._metrics_model, source="distilled_student_escalated")
+                        escalated.append(index)
+                pending = escalated
+            except Exception as exc:
+                LOGGER.warning("Ticket progress fast engine failed, escalating to zero-shot model: %s", exc)
+        if not pending:
+            return results
+        source = "embedding_similarity" if self._embedder else "zero_shot_pretrained"
+        for index, distribution in zip(pending, self.predict_distributions([texts[index] for index in pending])):
+            if distribution:
+                step = max(distribution, key=distribution.get)
+                results[index] = (step, float(distribution[step]), source)
+        return results
     def predict(self, text: str) -> ProgressPrediction:
-        explicit = _extract_explicit_percent(text)
-        if explicit is not None:
-            return ProgressPrediction(percent=explicit, confidence=0.98, source="explicit_percentage")
+        return self.predict_batch([text])[0]
+    def predict_batch(self, texts: list[str]) -> list[ProgressPrediction]:
+        for text in texts:
+            AI_INPUT_TEXT_CHARS.observe(len(text or ""), model=self._metrics_model)
+        with time_stage(self._metrics_model, "total"):
+            predictions = self._predict_batch(texts)
+        for prediction in predictions:
+            AI_PREDICTION_SOURCE.inc(model=self._metrics_model, source=prediction.source)
+        return predictions
+    def _predict_batch(self, texts: list[str]) -> list[ProgressPrediction]:
+        predictions: list[ProgressPrediction | None] = [None] * len(texts)
+        pending: list[int] = []
+        for index, text in enumerate(texts):
+            explicit = _extract_explicit_percent(text)
+            if explicit is not None:
+                predictions[index] = ProgressPrediction(percent=explicit, confidence=0.98, source="explicit_percentage")
+            else:
+                pending.append(index)
+        if not pending:
+            return predictions
         self._ensure_loaded()
-        if self._pipeline:
+        if len(pending) > 1:
+            AI_BATCH_SIZE.observe(len(pending), model=self._metrics_model)
+        step = max(int(settings.PROGRESS_AI_SLOT_BATCH_SIZE), 1)
+        for offset in range(0, len(pending), step):
+            group = pending[offset : offset + step]
+            if self._breaker is not None and not self._breaker.allow():
+                for index in group:
+                    value, confidence = _heuristic_progress(texts[index])
+                    predictions[index] = ProgressPrediction(percent=value, confidence=confidence, source="heuristic_circuit_open")
+                continue
+            started = time.perf_counter()
+            ok = False
             try:
-                result = self._pipeline(
-                    sequences=text or "field work just started",
-                    candidate_labels=list(PROGRESS_LABELS.values()),
-                    hypothesis_template="This update indicates {}.",
-                    multi_label=False,
-                )
-                labels = result.get("labels") or []
-                scores = result.get("scores") or []
-                if labels:
-                    mapped = LABEL_TO_PROGRESS.get(str(labels[0]).strip().lower())
-                    if mapped:
-                        confidence = float(scores[0]) if scores else 0.6
-                        confidence = round(max(0.0, min(1.0, confidence)), 4)
-                        if confidence >= MIN_ZERO_SHOT_CONFIDENCE:
-                            return ProgressPrediction(
-                                percent=mapped,
-                                confidence=confidence,
-                                source="zero_shot_pretrained",
-                            )
-                        heuristic_value, heuristic_confidence = _heuristic_progress(text)
-                        return ProgressPrediction(
-                            percent=max(mapped, heuristic_value),
-                            confidence=round(max(confidence, heuristic_confidence), 4),
-                            source="hybrid_low_confidence",
-                        )
+                with inference_gate.slot():
+                    started = time.perf_counter()
+                    with time_stage(self._metrics_model, "inference"):
+                        model_results = self._model_predictions([texts[index] for index in group])
+                ok = True
             except Exception as exc:
+                model_results = [None] * len(group)
                 LOGGER.warning("Ticket progress inference failed, using heuristic fallback: %s", exc)
-        value, confidence = _heuristic_progress(text)
-        return ProgressPrediction(percent=value, confidence=confidence, source="heuristic_fallback")
-_progress_model = _ProgressModel()
+            finally:
+                if self._breaker is not None:
+                    per_item = (time.perf_counter() - started) / len(group)
+                    for _ in group:
+                        self._breaker.record(per_item, ok)
+            for index, model_result in zip(group, model_results):
+                predictions[index] = _combine_with_heuristic(texts[index], model_result)
+        return predictions
+def _combine_with_heuristic(text: str, model_result: tuple[int, float, str] | None) -> ProgressPrediction:
+    if model_result:
+        mapped, confidence, source = model_result
+        confidence = round(max(0.0, min(1.0, confidence)), 4)
+        if confidence >= MIN_ZERO_SHOT_CONFIDENCE:
+            return ProgressPrediction(percent=mapped, confidence=confidence, source=source)
+        heuristic_value, heuristic_confidence = _heuristic_progress(text)
+        return ProgressPrediction(
+            percent=max(mapped, heuristic_value),
+            confidence=round(max(confidence, heuristic_confidence), 4),
+            source="hybrid_low_confidence",
+        )
+    value, confidence = _heuristic_progress(text)
+    return ProgressPrediction(percent=value, confidence=confidence, source="heuristic_fallback")
+PROGRESS_MODEL_NAME = "progress"
+WARMUP_TEXT = "Initial inspection completed and repair work started."
+PARITY_PROBES = (
+    "Crew reached the site and started inspection.",
+    "Materials arranged, excavation ongoing.",
+    "Work almost done, final stage of resurfacing.",
+    "All tasks closed and handover complete.",
+    "Waiting for approval, work blocked.",
+)
+def _warmup_model(model: _ProgressModel) -> ProgressPrediction:
+    return model.predict(WARMUP_TEXT)
+def _model_parity(candidate: _ProgressModel, incumbent: _ProgressModel) -> dict:
+    pairs = []
+    degraded = True
+    for probe in PARITY_PROBES:
+        expected = incumbent.predict(probe)
+        actual = candidate.predict(probe)
+        degraded = degraded and expected.source == "heuristic_fallback"
+        pairs.append((abs(actual.percent - expected.percent) <= 15, True))
+    return agreement_report(pairs, degraded=degraded)
+model_registry.register(PROGRESS_MODEL_NAME, _ProgressModel, warmup=_warmup_model, parity=_model_parity)
+def _active_model() -> _ProgressModel:
+    return model_registry.get(PROGRESS_MODEL_NAME)
+def _shadow_progress(candidate: _ProgressModel, inputs: dict) -> ShadowOutcome:
+    prediction = candidate.predict(inputs["text"])
+    return ShadowOutcome(label=prediction.percent, confidence=prediction.confidence, source=prediction.source)
+shadow_evaluator.register(
+    PROGRESS_MODEL_NAME,
+    engine_setting="AI_SHADOW_PROGRESS_ENGINE",
+    factory=lambda engine: _ProgressModel(engine=engine, metrics_model=SHADOW_METRICS_MODEL, breaker=None),
+    runner=_shadow_progress,
+)
 def predict_ticket_progress(update_text: str) -> ProgressPrediction:
-    return _progress_model.predict(update_text)
+    started = time.perf_counter()
+    prediction = _active_model().predict(update_text)
+    if prediction.source != "explicit_percentage":
+        shadow_evaluator.maybe_submit(
+            PROGRESS_MODEL_NAME,
+            inputs={"text": update_text},
+            input_text=update_text,
+            incumbent=ShadowOutcome(label=prediction.percent, confidence=prediction.confidence, source=prediction.source),
+            incumbent_engine=settings.PROGRESS_AI_ENGINE,
+            incumbent_ms=(time.perf_counter() - started) * 1000,
+        )
+    return prediction
+def predict_ticket_progress_batch(texts: list[str]) -> list[ProgressPrediction]:
+    return _active_model().predict_batch(list(texts))
 def warmup_progress_model() -> ProgressPrediction:
-    prediction = _progress_model.predict("Initial inspection completed and repair work started.")
+    prediction = _warmup_model(_active_model())
     LOGGER.info(
         "Ticket progress model warmup completed. source=%s percent=%s confidence=%s",
         prediction.source,
@@ -0,0 +1,100 @@
+from __future__ import annotations
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from pymongo import UpdateOne
+from app.config.settings import settings
+from app.database import progress_predictions
+from app.services.model_registry import model_registry
+from app.services.progress_ai import PROGRESS_MODEL_NAME, ProgressPrediction, predict_ticket_progress_batch
+LOGGER = logging.getLogger(__name__)
+UNCACHEABLE_SOURCES = {"heuristic_circuit_open", "heuristic_fallback"}
+_local_cache: OrderedDict[str, ProgressPrediction] = OrderedDict()
+_local_lock = threading.Lock()
+def _model_identity() -> str:
+    version = model_registry.current_version(PROGRESS_MODEL_NAME)
+    return f"{settings.PROGRESS_AI_ENGINE}:{settings.PROGRESS_AI_MODEL}:v{version.version if version else 1}"
+def progress_context_hash(context: str) -> str:
+    digest = hashlib.sha256(f"{_model_identity()}\n{context}".encode("utf-8"))
+    return digest.hexdigest()[:32]
+def _remember_locally(key: str, prediction: ProgressPrediction) -> None:
+    with _local_lock:
+        _local_cache[key] = prediction
+        _local_cache.move_to_end(key)
+        while len(_local_cache) > max(int(settings.PROGRESS_CONTEXT_CACHE_SIZE), 1):
+            _local_cache.popitem(last=False)
+def _lookup_local(key: str) -> ProgressPrediction | None:
+    with _local_lock:
+        prediction = _local_cache.get(key)
+        if prediction is not None:
+            _local_cache.move_to_end(key)
+        return prediction
+def _prediction_from_row(row: dict) -> ProgressPrediction:
+    return ProgressPrediction(
+        percent=int(row.get("percent") or 0),
+        confidence=float(row.get("confidence") or 0.0),
+        source=str(row.get("source") or ""),
+    )
+def _lookup_shared(keys: list[str]) -> dict[str, ProgressPrediction]:
+    if not keys:
+        return {}
+    try:
+        rows = progress_predictions.find({"_id": {"$in": keys}, "expiresAt": {"$gt": datetime.utcnow()}})
+        return {str(row["_id"]): _prediction_from_row(row) for row in rows}
+    except Exception as exc:
+        LOGGER.debug("Shared progress cache lookup failed: %s", exc)
+        return {}
+def _store_shared(entries: list[tuple[str, ProgressPrediction]]) -> None:
+    if not entries:
+        return
+    now = datetime.utcnow()
+    expires_at = now + timedelta(hours=max(float(settings.PROGRESS_CONTEXT_CACHE_TTL_HOURS), 0.1))
+    operations = [
+        UpdateOne(
+            {"_id": key},
+            {
+                "$set": {
+                    "percent": prediction.percent,
+                    "confidence": prediction.confidence,
+                    "source": prediction.source,
+                    "createdAt": now,
+                    "expiresAt": expires_at,
+                }
+            },
+            upsert=True,
+        )
+        for key, prediction in entries
+    ]
+    try:
+        progress_predictions.bulk_write(operations, ordered=False)
+    except Exception as exc:
+        LOGGER.debug("Shared progress cache write failed: %s", exc)
+def cached_ticket_progress_batch(contexts: list[str], context_hashes: list[str | None] | None = None) -> list[ProgressPrediction]:
+    keys = [
+        context_hash or progress_context_hash(context)
+        for context, context_hash in zip(contexts, context_hashes or [None] * len(contexts))
+    ]
+    predictions: list[ProgressPrediction | None] = [_lookup_local(key) for key in keys]
+    shared = _lookup_shared(sorted({key for key, prediction in zip(keys, predictions) if prediction is None}))
+    for index, key in enumerate(keys):
+        if predictions[index] is None and key in shared:
+            predictions[index] = shared[key]
+            _remember_locally(key, shared[key])
+    misses: dict[str, list[int]] = {}
+    for index, prediction in enumerate(predictions):
+        if prediction is None:
+            misses.setdefault(keys[index], []).append(index)
+    if not misses:
+        return predictions
+    fresh = predict_ticket_progress_batch([contexts[indexes[0]] for indexes in misses.values()])
+    cacheable: list[tuple[str, ProgressPrediction]] = []
+    for (key, indexes), prediction in zip(misses.items(), fresh):
+        for index in indexes:
+            predictions[index] = prediction
+        if prediction.source not in UNCACHEABLE_SOURCES:
+            _remember_locally(key, prediction)
+            cacheable.append((key, prediction))
+    _store_shared(cacheable)
+    return predictions
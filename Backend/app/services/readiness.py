@@ -0,0 +1,83 @@
+from __future__ import annotations
+import importlib
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+LOGGER = logging.getLogger(__name__)
+STATE_PENDING = "pending"
+STATE_READY = "ready"
+STATE_FAILED = "failed"
+STATE_DISABLED = "disabled"
+def _now_iso() -> str:
+    return datetime.utcnow().isoformat()
+class ReadinessTracker:
+    def __init__(self):
+        self._components: dict[str, dict] = {}
+        self._import_timings: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._started_at = _now_iso()
+    def register(self, name: str, *, required: bool = True) -> None:
+        with self._lock:
+            self._components[name] = {"state": STATE_PENDING, "required": required, "since": _now_iso()}
+    def _update(self, name: str, state: str, **details) -> None:
+        with self._lock:
+            component = self._components.setdefault(name, {"required": False})
+            component.update({"state": state, "since": _now_iso(), **details})
+    def mark_ready(self, name: str, *, seconds: float | None = None, detail: str | None = None) -> None:
+        self._update(name, STATE_READY, seconds=seconds, detail=detail)
+    def mark_failed(self, name: str, error: str) -> None:
+        self._update(name, STATE_FAILED, detail=error)
+    def mark_disabled(self, name: str) -> None:
+        self._update(name, STATE_DISABLED)
+    def record_import(self, module: str, seconds: float) -> None:
+        with self._lock:
+            self._import_timings[module] = round(seconds, 4)
+    def is_ready(self) -> bool:
+        with self._lock:
+            return all(
+                row["state"] in {STATE_READY, STATE_DISABLED}
+                for row in self._components.values()
+                if row.get("required")
+            )
+    def snapshot(self) -> dict:
+        with self._lock:
+            components = {name: dict(row) for name, row in self._components.items()}
+            imports = dict(self._import_timings)
+        return {
+            "ready": all(
+                row["state"] in {STATE_READY, STATE_DISABLED} for row in components.values() if row.get("required")
+            ),
+            "startedAt": self._started_at,
+            "components": components,
+            "importSeconds": imports,
+        }
+readiness = ReadinessTracker()
+@contextmanager
+def track_component(name: str):
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception as exc:
+        readiness.mark_failed(name, str(exc))
+        raise
+    readiness.mark_ready(name, seconds=round(time.perf_counter() - started, 3))
+def profile_imports(modules: tuple[str, ...]) -> dict[str, float]:
+    timings: dict[str, float] = {}
+    for module in modules:
+        started = time.perf_counter()
+        try:
+            importlib.import_module(module)
+        except Exception as exc:
+            LOGGER.debug("Import profiling skipped %s: %s", module, exc)
+            continue
+        elapsed = time.perf_counter() - started
+        timings[module] = elapsed
+        readiness.record_import(module, elapsed)
+    if timings:
+        LOGGER.info(
+            "Heavy import timings: %s",
+            ", ".join(f"{module}={seconds:.2f}s" for module, seconds in timings.items()),
+        )
+    return timings
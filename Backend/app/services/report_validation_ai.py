@@ -1,10 +1,11 @@
 from __future__ import annotations
-import base64
-import binascii
 import math
 import re
 from dataclasses import dataclass
+from app.services.image_ingest import IncidentImage
+from app.services.metrics import AI_INPUT_IMAGE_BYTES, AI_PREDICTION_SOURCE, time_stage
 SOURCE = "heuristic_multimodal"
+METRICS_MODEL = "report_validation"
 MIN_VALID_SCORE = 0.55
 MIN_DESCRIPTION_SCORE = 0.35
 MIN_IMAGE_SCORE = 0.2
@@ -53,26 +54,7 @@ def _clean(value: str | None) -> str:
     return (value or "").strip().lower()
 def _word_tokens(value: str) -> list[str]:
     return re.findall(r"[a-z0-9']+", value)
-def _normalize_image_payload(payload: str | None) -> str:
-    value = (payload or "").strip()
-    if not value:
-        return ""
-    if "," in value and "base64" in value[:60].lower():
-        return value.split(",", 1)[1].strip()
-    return value
-def _has_known_image_signature(raw: bytes) -> bool:
-    if raw.startswith(b"\xff\xd8\xff"):
-        return True
-    if raw.startswith(b"\x89PNG\r\n\x1a\n"):
-        return True
-    if raw.startswith((b"GIF87a", b"GIF89a")):
-        return True
-    if raw.startswith(b"RIFF") and b"WEBP" in raw[:16]:
-        return True
-    if raw.startswith((b"BM", b"II*\x00", b"MM\x00*")):
-        return True
-    return False
-def _byte_entropy(raw: bytes) -> float:
+def _byte_entropy(raw: memoryview) -> float:
     if not raw:
         return 0.0
     sample = raw[: min(len(raw), 4096)]
@@ -126,37 +108,30 @@ def _score_description(title: str | None, description: str | None, category: str
         score -= 0.3
         reasons.append("Description looks like a test/dummy report.")
     return _clamp(score, 0.0, 1.0), reasons
-def _score_images(image_payloads: list[str] | None) -> tuple[float, list[str]]:
-    payloads = image_payloads or []
-    if not payloads:
+def _score_images(images: list[IncidentImage | None] | None) -> tuple[float, list[str]]:
+    images = images or []
+    if not images:
         return 0.0, ["At least one incident photo is required for verification."]
     total = 0.0
     valid_images = 0
     reasons: list[str] = []
-    for payload in payloads:
-        normalized = _normalize_image_payload(payload)
-        if not normalized:
-            continue
-        try:
-            raw = base64.b64decode(normalized, validate=True)
-        except (binascii.Error, ValueError):
-            continue
-        if not raw:
+    for image in images:
+        if image is None:
             continue
         valid_images += 1
         score = 0.2
-        size_kb = len(raw) / 1024.0
+        size_kb = image.size_bytes / 1024.0
         if size_kb >= 20:
             score += 0.25
         elif size_kb >= 10:
             score += 0.15
         else:
             score -= 0.1
-        if _has_known_image_signature(raw):
+        if image.format is not None:
             score += 0.3
         else:
             score -= 0.15
-        entropy = _byte_entropy(raw)
+        entropy = _byte_entropy(image.view)
         if entropy >= 5.2:
             score += 0.25
         elif entropy >= 4.2:
@@ -175,10 +150,15 @@ def validate_incident_report(
     title: str | None,
     description: str | None,
     category: str | None,
-    image_payloads: list[str] | None,
+    images: list[IncidentImage | None] | None,
 ) -> ReportValidationPrediction:
-    description_score, description_reasons = _score_description(title, description, category)
-    image_score, image_reasons = _score_images(image_payloads)
+    with time_stage(METRICS_MODEL, "description"):
+        description_score, description_reasons = _score_description(title, description, category)
+    for image in images or []:
+        if image is not None:
+            AI_INPUT_IMAGE_BYTES.observe(image.size_bytes, model=METRICS_MODEL)
+    with time_stage(METRICS_MODEL, "images"):
+        image_score, image_reasons = _score_images(images)
     combined = _clamp((description_score * 0.6) + (image_score * 0.4), 0.0, 1.0)
     is_valid = (
         combined >= MIN_VALID_SCORE
@@ -192,6 +172,7 @@ def validate_incident_report(
     else:
         reason_parts = description_reasons + image_reasons
         reason = reason_parts[0] if reason_parts else "Report requires supervisor review."
+    AI_PREDICTION_SOURCE.inc(model=METRICS_MODEL, source="valid" if is_valid else "review_required")
     return ReportValidationPrediction(
         is_valid=is_valid,
         confidence=confidence,
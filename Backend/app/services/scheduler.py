@@ -0,0 +1,166 @@
+from __future__ import annotations
+import asyncio
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable
+from app.config.settings import settings
+from app.services.metrics import metrics
+LOGGER = logging.getLogger(__name__)
+JOB_DURATION_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+SCHEDULER_JOB_RUNS = metrics.counter(
+    "safelive_scheduler_job_runs_total",
+    "Periodic background job runs by outcome.",
+    ("job", "outcome"),
+)
+SCHEDULER_JOB_DURATION = metrics.histogram(
+    "safelive_scheduler_job_duration_seconds",
+    "Wall time of periodic background job runs.",
+    ("job",),
+    buckets=JOB_DURATION_BUCKETS,
+)
+SCHEDULER_JOB_LAST_RUN = metrics.gauge(
+    "safelive_scheduler_job_last_run_timestamp_seconds",
+    "Unix time at which a periodic background job last finished.",
+    ("job",),
+)
+SCHEDULER_JOB_INTERVAL = metrics.gauge(
+    "safelive_scheduler_job_interval_seconds",
+    "Current adaptive interval of a periodic background job.",
+    ("job",),
+)
+SCHEDULER_JOB_WORK = metrics.gauge(
+    "safelive_scheduler_job_last_work_items",
+    "Work items reported by the last run of a periodic background job.",
+    ("job",),
+)
+@dataclass
+class PeriodicJob:
+    name: str
+    func: Callable[[], int | None]
+    interval_seconds: float
+    min_interval_seconds: float | None = None
+    max_interval_seconds: float | None = None
+    busy_work: int = 1
+    timeout_seconds: float | None = None
+    interval: float = field(init=False)
+    running: bool = field(default=False, init=False)
+    last_started_at: str | None = field(default=None, init=False)
+    last_finished_at: str | None = field(default=None, init=False)
+    last_duration_seconds: float | None = field(default=None, init=False)
+    last_work: int | None = field(default=None, init=False)
+    last_outcome: str | None = field(default=None, init=False)
+    last_error: str | None = field(default=None, init=False)
+    def __post_init__(self):
+        self.interval = float(self.interval_seconds)
+    @property
+    def floor(self) -> float:
+        return float(self.min_interval_seconds or self.interval_seconds)
+    @property
+    def ceiling(self) -> float:
+        return float(self.max_interval_seconds or self.interval_seconds)
+    def adapt(self, work: int | None) -> None:
+        if work is None:
+            self.interval = float(self.interval_seconds)
+        elif work <= 0:
+            self.interval = min(self.interval * 1.5, self.ceiling)
+        elif work >= self.busy_work:
+            self.interval = max(self.interval / 2.0, self.floor)
+        else:
+            self.interval = min(max(float(self.interval_seconds), self.floor), self.ceiling)
+        SCHEDULER_JOB_INTERVAL.set(self.interval, job=self.name)
+    def status(self) -> dict:
+        return {
+            "job": self.name,
+            "running": self.running,
+            "intervalSeconds": round(self.interval, 3),
+            "baseIntervalSeconds": self.interval_seconds,
+            "lastStartedAt": self.last_started_at,
+            "lastFinishedAt": self.last_finished_at,
+            "lastDurationSeconds": self.last_duration_seconds,
+            "lastWork": self.last_work,
+            "lastOutcome": self.last_outcome,
+            "lastError": self.last_error,
+        }
+class BackgroundScheduler:
+    def __init__(self):
+        self._jobs: dict[str, PeriodicJob] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._executor: ThreadPoolExecutor | None = None
+    def add(self, job: PeriodicJob) -> None:
+        self._jobs[job.name] = job
+        SCHEDULER_JOB_INTERVAL.set(job.interval, job=job.name)
+    def _jittered(self, seconds: float) -> float:
+        ratio = min(max(float(settings.SCHEDULER_JITTER_RATIO), 0.0), 1.0)
+        return max(seconds * (1.0 + random.uniform(-ratio, ratio)), 0.0)
+    def start(self) -> None:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=max(int(settings.SCHEDULER_MAX_WORKERS), 1),
+                thread_name_prefix="scheduler",
+            )
+        for name, job in self._jobs.items():
+            if name not in self._tasks or self._tasks[name].done():
+                self._tasks[name] = asyncio.get_running_loop().create_task(self._loop(job), name=f"job-{name}")
+                LOGGER.info("Scheduled background job %s every ~%ss", name, job.interval_seconds)
+    async def stop(self) -> None:
+        tasks = list(self._tasks.values())
+        self._tasks = {}
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+    async def _loop(self, job: PeriodicJob) -> None:
+        await asyncio.sleep(random.uniform(0.0, self._jittered(job.interval)))
+        while True:
+            await self.run_once(job.name)
+            await asyncio.sleep(self._jittered(job.interval))
+    def _execute(self, job: PeriodicJob) -> int | None:
+        started = time.perf_counter()
+        outcome = "ok"
+        try:
+            work = job.func()
+            job.last_work = None if work is None else int(work)
+            job.last_error = None
+            if job.last_work is not None:
+                SCHEDULER_JOB_WORK.set(job.last_work, job=job.name)
+            return job.last_work
+        except Exception as exc:
+            outcome = "error"
+            job.last_error = str(exc)
+            LOGGER.warning("Background job %s failed: %s", job.name, exc)
+            return None
+        finally:
+            duration = time.perf_counter() - started
+            job.running = False
+            job.last_outcome = outcome
+            job.last_duration_seconds = round(duration, 4)
+            job.last_finished_at = datetime.utcnow().isoformat()
+            SCHEDULER_JOB_DURATION.observe(duration, job=job.name)
+            SCHEDULER_JOB_LAST_RUN.set(time.time(), job=job.name)
+            SCHEDULER_JOB_RUNS.inc(job=job.name, outcome=outcome)
+    async def run_once(self, name: str) -> bool:
+        job = self._jobs[name]
+        if job.running or self._executor is None:
+            SCHEDULER_JOB_RUNS.inc(job=name, outcome="skipped")
+            return False
+        job.running = True
+        job.last_started_at = datetime.utcnow().isoformat()
+        future = asyncio.get_running_loop().run_in_executor(self._executor, self._execute, job)
+        try:
+            work = await asyncio.wait_for(asyncio.shield(future), timeout=job.timeout_seconds)
+        except asyncio.TimeoutError:
+            SCHEDULER_JOB_RUNS.inc(job=name, outcome="timeout")
+            LOGGER.warning("Background job %s exceeded %ss; later runs are skipped until it finishes.", name, job.timeout_seconds)
+            job.adapt(None)
+            return False
+        job.adapt(work)
+        return True
+    def status(self) -> list[dict]:
+        return [self._jobs[name].status() for name in sorted(self._jobs)]
+scheduler = BackgroundScheduler()
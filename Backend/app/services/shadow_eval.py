@@ -0,0 +1,190 @@
+from __future__ import annotations
+import hashlib
+import logging
+import random
+import resource
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable
+from app.config.settings import settings
+from app.database import ai_shadow_results
+from app.services.cpu_governor import background_inference
+from app.services.metrics import metrics
+from app.services.model_registry import model_registry
+LOGGER = logging.getLogger(__name__)
+AI_SHADOW_EVALUATIONS = metrics.counter(
+    "safelive_ai_shadow_evaluations_total",
+    "Shadow evaluations of candidate engines by outcome.",
+    ("task", "engine", "outcome"),
+)
+@dataclass(frozen=True)
+class ShadowOutcome:
+    label: object
+    confidence: float
+    source: str
+@dataclass
+class _ShadowTask:
+    engine_setting: str
+    factory: Callable[[str], object]
+    runner: Callable[[object, dict], ShadowOutcome]
+def _now_iso() -> str:
+    return datetime.utcnow().isoformat()
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 2)
+class ShadowEvaluator:
+    def __init__(self):
+        self._tasks: dict[str, _ShadowTask] = {}
+        self._candidates: dict[tuple[str, str, int], object] = {}
+        self._executor: ThreadPoolExecutor | None = None
+        self._pending = 0
+        self._lock = threading.Lock()
+    def register(
+        self,
+        task: str,
+        *,
+        engine_setting: str,
+        factory: Callable[[str], object],
+        runner: Callable[[object, dict], ShadowOutcome],
+    ) -> None:
+        self._tasks[task] = _ShadowTask(engine_setting=engine_setting, factory=factory, runner=runner)
+    def candidate_engine(self, task: str) -> str:
+        shadow_task = self._tasks.get(task)
+        if shadow_task is None:
+            return ""
+        return str(getattr(settings, shadow_task.engine_setting, "") or "").strip().lower()
+    def _candidate(self, task: str, engine: str) -> object:
+        version = model_registry.current_version(task)
+        key = (task, engine, version.version if version else 0)
+        candidate = self._candidates.get(key)
+        if candidate is None:
+            with self._lock:
+                candidate = self._candidates.get(key)
+                if candidate is None:
+                    for stale in [existing for existing in self._candidates if existing[0] == task]:
+                        del self._candidates[stale]
+                    candidate = self._tasks[task].factory(engine)
+                    self._candidates[key] = candidate
+        return candidate
+    def maybe_submit(
+        self,
+        task: str,
+        *,
+        inputs: dict,
+        input_text: str,
+        incumbent: ShadowOutcome,
+        incumbent_engine: str,
+        incumbent_ms: float,
+    ) -> bool:
+        engine = self.candidate_engine(task)
+        if not engine or random.random() >= float(settings.AI_SHADOW_SAMPLE_RATE):
+            return False
+        with self._lock:
+            if self._pending >= max(int(settings.AI_SHADOW_MAX_PENDING), 1):
+                AI_SHADOW_EVALUATIONS.inc(task=task, engine=engine, outcome="dropped")
+                return False
+            self._pending += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ai-shadow")
+        self._executor.submit(
+            self._evaluate,
+            task,
+            engine,
+            inputs,
+            input_text,
+            incumbent,
+            incumbent_engine,
+            incumbent_ms,
+        )
+        return True
+    @background_inference()
+    def _evaluate(
+        self,
+        task: str,
+        engine: str,
+        inputs: dict,
+        input_text: str,
+        incumbent: ShadowOutcome,
+        incumbent_engine: str,
+        incumbent_ms: float,
+    ) -> None:
+        try:
+            candidate = self._candidate(task, engine)
+            started = time.perf_counter()
+            outcome = self._tasks[task].runner(candidate, inputs)
+            candidate_ms = (time.perf_counter() - started) * 1000
+            record = {
+                "task": task,
+                "candidateEngine": engine,
+                "incumbentEngine": incumbent_engine,
+                "agreement": outcome.label == incumbent.label,
+                "incumbent": {
+                    "label": incumbent.label,
+                    "confidence": incumbent.confidence,
+                    "source": incumbent.source,
+                    "latencyMs": round(incumbent_ms, 3),
+                },
+                "candidate": {
+                    "label": outcome.label,
+                    "confidence": outcome.confidence,
+                    "source": outcome.source,
+                    "latencyMs": round(candidate_ms, 3),
+                },
+                "inputChars": len(input_text or ""),
+                "inputHash": hashlib.sha256((input_text or "").encode("utf-8")).hexdigest()[:16],
+                "peakRssMb": _peak_rss_mb(),
+                "createdAt": _now_iso(),
+            }
+            if isinstance(outcome.label, (int, float)) and isinstance(incumbent.label, (int, float)):
+                record["absoluteError"] = abs(outcome.label - incumbent.label)
+            ai_shadow_results.insert_one(record)
+            AI_SHADOW_EVALUATIONS.inc(task=task, engine=engine, outcome="agree" if record["agreement"] else "disagree")
+        except Exception as exc:
+            AI_SHADOW_EVALUATIONS.inc(task=task, engine=engine, outcome="failed")
+            LOGGER.warning("Shadow evaluation of %s engine %s failed: %s", task, engine, exc)
+        finally:
+            with self._lock:
+                self._pending -= 1
+def summarize_shadow_results(task: str | None = None, since: str | None = None) -> list[dict]:
+    match: dict = {}
+    if task:
+        match["task"] = task
+    if since:
+        match["createdAt"] = {"$gte": since}
+    pipeline = [
+        {"$match": match},
+        {
+            "$group": {
+                "_id": {"task": "$task", "candidateEngine": "$candidateEngine", "incumbentEngine": "$incumbentEngine"},
+                "samples": {"$sum": 1},
+                "agreements": {"$sum": {"$cond": ["$agreement", 1, 0]}},
+                "incumbentLatencyMs": {"$avg": "$incumbent.latencyMs"},
+                "candidateLatencyMs": {"$avg": "$candidate.latencyMs"},
+                "candidateMaxLatencyMs": {"$max": "$candidate.latencyMs"},
+                "incumbentConfidence": {"$avg": "$incumbent.confidence"},
+                "candidateConfidence": {"$avg": "$candidate.confidence"},
+                "meanAbsoluteError": {"$avg": "$absoluteError"},
+                "peakRssMb": {"$max": "$peakRssMb"},
+                "firstAt": {"$min": "$createdAt"},
+                "lastAt": {"$max": "$createdAt"},
+            }
+        },
+        {"$sort": {"_id.task": 1, "_id.candidateEngine": 1}},
+    ]
+    rows: list[dict] = []
+    for row in ai_shadow_results.aggregate(pipeline):
+        key = row.pop("_id")
+        samples = row["samples"]
+        rows.append(
+            {
+                **key,
+                **{name: round(value, 4) if isinstance(value, float) else value for name, value in row.items()},
+                "agreementRate": round(row["agreements"] / samples, 4) if samples else None,
+            }
+        )
+    return rows
+shadow_evaluator = ShadowEvaluator()
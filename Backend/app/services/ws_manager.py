@@ -1,8 +1,10 @@
 import asyncio
 import logging
 import threading
+from collections import OrderedDict
 from typing import List
 from fastapi import WebSocket
+from app.config.settings import settings
 
 LOGGER = logging.getLogger(__name__)
 
@@ -12,6 +14,9 @@ class ConnectionManager:
         self.active_connections: List[WebSocket] = []
         self._lock = threading.Lock()
         self._loop: asyncio.AbstractEventLoop | None = None
+        self._pending_deltas: dict[str, OrderedDict[str, dict]] = {}
+        self._delta_lock = threading.Lock()
+        self._delta_flush_scheduled = False
 
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
@@ -46,6 +51,42 @@ class ConnectionManager:
         except Exception as exc:
             LOGGER.warning("Websocket publish failed: %s", exc)
 
+    def publish_ticket_delta(self, delta: dict, reason: str) -> None:
+        loop = self._loop
+        ticket_id = str(delta.get("id") or "")
+        if not ticket_id or not loop or loop.is_closed():
+            return
+        with self._delta_lock:
+            pending = self._pending_deltas.setdefault(reason, OrderedDict())
+            pending[ticket_id] = {**pending.get(ticket_id, {}), **delta}
+            flush_now = sum(len(rows) for rows in self._pending_deltas.values()) >= max(int(settings.WS_COALESCE_MAX_BATCH), 1)
+            if self._delta_flush_scheduled and not flush_now:
+                return
+            self._delta_flush_scheduled = True
+        try:
+            if flush_now:
+                loop.call_soon_threadsafe(self._flush_deltas)
+            else:
+                delay = max(float(settings.WS_COALESCE_WINDOW_MS), 0.0) / 1000.0
+                loop.call_soon_threadsafe(loop.call_later, delay, self._flush_deltas)
+        except Exception as exc:
+            with self._delta_lock:
+                self._delta_flush_scheduled = False
+            LOGGER.warning("Websocket delta scheduling failed: %s", exc)
+
+    def _flush_deltas(self) -> None:
+        with self._delta_lock:
+            pending = self._pending_deltas
+            self._pending_deltas = {}
+            self._delta_flush_scheduled = False
+        for reason, rows in pending.items():
+            if not rows:
+                continue
+            task = asyncio.ensure_future(
+                self.broadcast({"type": "TICKETS_UPDATED", "reason": reason, "data": list(rows.values())})
+            )
+            task.add_done_callback(self._handle_future_result)
+
     @staticmethod
     def _handle_future_result(future):
         try:
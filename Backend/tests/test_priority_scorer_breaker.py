@@ -0,0 +1,44 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+import pytest
+from app.config.settings import settings
+from app.services import priority_ai
+from app.services.circuit_breaker import STATE_HALF_OPEN, STATE_OPEN, CircuitBreaker
+@pytest.fixture
+def half_open_breaker(monkeypatch):
+    monkeypatch.setattr(settings, "AI_BREAKER_ENABLED", True)
+    monkeypatch.setattr(settings, "AI_BREAKER_COOLDOWN_SECONDS", 0.0)
+    breaker = CircuitBreaker("test_priority_text", slo_seconds=1.0)
+    breaker._transition(STATE_OPEN, "test")
+    monkeypatch.setitem(priority_ai.STAGE_BREAKERS, "text", breaker)
+    monkeypatch.setattr(priority_ai, "_abandoned_scorers", {})
+    return breaker
+def test_busy_straggler_does_not_take_the_half_open_probe(half_open_breaker):
+    straggler = Future()
+    priority_ai._abandoned_scorers["text"] = straggler
+    classifier = priority_ai.PriorityClassifier()
+    results, missing, skipped = classifier._run_scorers({"text": (1.0, lambda: {"high": 1.0})})
+    assert results == {}
+    assert missing == ("text",)
+    assert skipped == ("text",)
+    assert half_open_breaker._probes_in_flight == 0
+    assert half_open_breaker.allow()
+    assert half_open_breaker.state == STATE_HALF_OPEN
+def test_cancelled_future_releases_the_half_open_probe(half_open_breaker, monkeypatch):
+    executor = ThreadPoolExecutor(max_workers=1)
+    release = threading.Event()
+    executor.submit(release.wait)
+    monkeypatch.setattr(priority_ai, "_scorer_executor", lambda: executor)
+    try:
+        classifier = priority_ai.PriorityClassifier()
+        results, missing, skipped = classifier._run_scorers({"text": (0.05, lambda: {"high": 1.0})})
+    finally:
+        release.set()
+        executor.shutdown(wait=True)
+    assert results == {}
+    assert missing == ("text",)
+    assert skipped == ()
+    assert "text" not in priority_ai._abandoned_scorers
+    assert half_open_breaker.state == STATE_HALF_OPEN
+    assert half_open_breaker._probes_in_flight == 0
+    assert half_open_breaker.allow()
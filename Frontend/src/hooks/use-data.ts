@@ -82,7 +82,7 @@ export const useIncidents = () => {
     socket.onmessage = (event) => {
       try {
         const payload = JSON.parse(event.data);
-        if (payload?.type === 'NEW_INCIDENT' && payload.data) {
+        if ((payload?.type === 'NEW_INCIDENT' || payload?.type === 'INCIDENT_UPDATED') && payload.data) {
           const normalizedIncident = normalizeIncidentMedia(payload.data as Incident);
           setIncidents((prev) => {
             const exists = prev.find((i) => i.id === normalizedIncident.id);
@@ -213,6 +213,24 @@ export const useTickets = (filters?: { status?: string; priority?: string; categ
           upsertTicket(payload.data as Ticket);
           return;
         }
+        if (payload.type === 'TICKETS_UPDATED' && Array.isArray(payload.data)) {
+          const deltas = new Map<string, Partial<Ticket>>();
+          (payload.data as Array<Partial<Ticket>>).forEach((delta) => {
+            if (delta?.id) {
+              deltas.set(String(delta.id), delta);
+            }
+          });
+          if (deltas.size === 0) {
+            return;
+          }
+          setTickets((prev) =>
+            prev.map((ticket) => {
+              const delta = deltas.get(ticket.id);
+              return delta ? { ...ticket, ...delta } : ticket;
+            })
+          );
+          return;
+        }
         if (payload.type === 'TICKET_DELETED') {
           const ticketId = String(payload?.data?.id || payload?.ticketId || '').trim();
           if (!ticketId) {